@@ -0,0 +1,702 @@
+"""Baseline schema
+
+The tables as local bootstrap created them with ``create_all`` before migrations were
+introduced. Every table and index is created only if missing, so databases built that way,
+whichever of these tables they already have, adopt the chain by running this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 23:46:56.486826
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bootstrap_state",
+        sa.Column("key", sa.String(length=50), nullable=False),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column(
+            "completed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("key"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "movies",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("runtime_minutes", sa.Integer(), nullable=False),
+        sa.Column("rating", sa.String(length=10), nullable=False),
+        sa.Column("release_date", sa.Date(), nullable=True),
+        sa.Column("poster_url", sa.String(length=1024), nullable=True),
+        sa.Column("metadata_json", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(op.f("ix_movies_title"), "movies", ["title"], unique=False, if_not_exists=True)
+    op.create_table(
+        "recommendation_variants",
+        sa.Column("name", sa.String(length=20), nullable=False),
+        sa.Column("traffic_weight", sa.Integer(), nullable=False),
+        sa.Column("personalized_weight", sa.Float(), nullable=False),
+        sa.Column("popularity_weight", sa.Float(), nullable=False),
+        sa.Column("freshness_weight", sa.Float(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("name"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "seat_maps",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=120), nullable=False),
+        sa.Column("layout_json", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "theaters",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("address", sa.String(length=500), nullable=False),
+        sa.Column("city", sa.String(length=100), nullable=False),
+        sa.Column("timezone", sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_theaters_city"),
+        "theaters",
+        ["city"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("password_hash", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.String(length=50), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(op.f("ix_users_email"), "users", ["email"], unique=True, if_not_exists=True)
+    op.create_table(
+        "auditoriums",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("theater_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("seatmap_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["seatmap_id"],
+            ["seat_maps.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["theater_id"],
+            ["theaters.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "movie_similarity",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("movie_id", sa.Integer(), nullable=False),
+        sa.Column("similar_movie_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("co_watch_count", sa.Integer(), nullable=False),
+        sa.Column("shared_genre_count", sa.Integer(), nullable=False),
+        sa.Column("runtime_distance", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["movie_id"],
+            ["movies.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["similar_movie_id"],
+            ["movies.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("movie_id", "similar_movie_id", name="uq_movie_similarity_pair"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_movie_similarity_movie_id"),
+        "movie_similarity",
+        ["movie_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_movie_similarity_similar_movie_id"),
+        "movie_similarity",
+        ["similar_movie_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "recommendation_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("movie_id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=30), nullable=False),
+        sa.Column("variant", sa.String(length=20), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["movie_id"],
+            ["movies.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_recommendation_events_event_type"),
+        "recommendation_events",
+        ["event_type"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_recommendation_events_movie_id"),
+        "recommendation_events",
+        ["movie_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_recommendation_events_occurred_at"),
+        "recommendation_events",
+        ["occurred_at"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_recommendation_events_user_id"),
+        "recommendation_events",
+        ["user_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "refresh_token_sessions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token_hash", sa.String(length=128), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_refresh_token_sessions_expires_at"),
+        "refresh_token_sessions",
+        ["expires_at"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_refresh_token_sessions_token_hash"),
+        "refresh_token_sessions",
+        ["token_hash"],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_refresh_token_sessions_user_id"),
+        "refresh_token_sessions",
+        ["user_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "user_movie_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("movie_id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=30), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["movie_id"],
+            ["movies.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "movie_id", "event_type", name="uq_user_movie_event"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_user_movie_events_event_type"),
+        "user_movie_events",
+        ["event_type"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_user_movie_events_movie_id"),
+        "user_movie_events",
+        ["movie_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_user_movie_events_user_id"),
+        "user_movie_events",
+        ["user_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "user_recommendation_candidates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("variant", sa.String(length=20), nullable=False),
+        sa.Column("movie_id", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("base_score", sa.Float(), nullable=False),
+        sa.Column("primary_genre", sa.String(length=60), nullable=True),
+        sa.Column("source_movie_id", sa.Integer(), nullable=True),
+        sa.Column("reason", sa.String(length=255), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["movie_id"],
+            ["movies.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["source_movie_id"],
+            ["movies.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "user_id", "variant", "movie_id", name="uq_user_recommendation_candidate"
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_user_recommendation_candidates_movie_id"),
+        "user_recommendation_candidates",
+        ["movie_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_user_recommendation_candidates_user_id"),
+        "user_recommendation_candidates",
+        ["user_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "seats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("auditorium_id", sa.Integer(), nullable=False),
+        sa.Column("seat_code", sa.String(length=10), nullable=False),
+        sa.Column("row_label", sa.String(length=10), nullable=False),
+        sa.Column("seat_number", sa.Integer(), nullable=False),
+        sa.Column("seat_type", sa.String(length=30), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["auditorium_id"],
+            ["auditoriums.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("auditorium_id", "seat_code", name="uq_auditorium_seat"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "showtimes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("movie_id", sa.Integer(), nullable=False),
+        sa.Column("auditorium_id", sa.Integer(), nullable=False),
+        sa.Column("starts_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("ends_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(length=30), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["auditorium_id"],
+            ["auditoriums.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["movie_id"],
+            ["movies.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_showtimes_auditorium_id"),
+        "showtimes",
+        ["auditorium_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_showtimes_movie_id"),
+        "showtimes",
+        ["movie_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_showtimes_starts_at"),
+        "showtimes",
+        ["starts_at"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "reservations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("showtime_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=30), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["showtime_id"],
+            ["showtimes.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_reservations_expires_at"),
+        "reservations",
+        ["expires_at"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_reservations_showtime_id"),
+        "reservations",
+        ["showtime_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_reservations_status"),
+        "reservations",
+        ["status"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "showtime_sales_rollups",
+        sa.Column("showtime_id", sa.Integer(), nullable=False),
+        sa.Column("capacity", sa.Integer(), nullable=False),
+        sa.Column("sold_seats", sa.Integer(), nullable=False),
+        sa.Column("held_seats", sa.Integer(), nullable=False),
+        sa.Column("active_holds", sa.Integer(), nullable=False),
+        sa.Column("paid_orders", sa.Integer(), nullable=False),
+        sa.Column("revenue_cents", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["showtime_id"],
+            ["showtimes.id"],
+        ),
+        sa.PrimaryKeyConstraint("showtime_id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("showtime_id", sa.Integer(), nullable=False),
+        sa.Column("reservation_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=30), nullable=False),
+        sa.Column("total_cents", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("provider", sa.String(length=30), nullable=False),
+        sa.Column("provider_session_id", sa.String(length=255), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["reservation_id"],
+            ["reservations.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["showtime_id"],
+            ["showtimes.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("reservation_id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_orders_provider_session_id"),
+        "orders",
+        ["provider_session_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_orders_showtime_id"),
+        "orders",
+        ["showtime_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_orders_status"),
+        "orders",
+        ["status"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_orders_user_id"),
+        "orders",
+        ["user_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "reservation_seats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("reservation_id", sa.Integer(), nullable=False),
+        sa.Column("seat_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["reservation_id"],
+            ["reservations.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["seat_id"],
+            ["seats.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("reservation_id", "seat_id", name="uq_reservation_seat"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "showtime_seat_status",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("showtime_id", sa.Integer(), nullable=False),
+        sa.Column("seat_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("held_by_reservation_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["held_by_reservation_id"],
+            ["reservations.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["seat_id"],
+            ["seats.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["showtime_id"],
+            ["showtimes.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("showtime_id", "seat_id", name="uq_showtime_seat"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_showtime_seat_status_seat_id"),
+        "showtime_seat_status",
+        ["seat_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_showtime_seat_status_showtime_id"),
+        "showtime_seat_status",
+        ["showtime_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_showtime_seat_status_status"),
+        "showtime_seat_status",
+        ["status"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "tickets",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("seat_id", sa.Integer(), nullable=False),
+        sa.Column("qr_token", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("used_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["order_id"],
+            ["orders.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["seat_id"],
+            ["seats.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("qr_token", name="uq_ticket_qr_token"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_tickets_order_id"),
+        "tickets",
+        ["order_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_tickets_status"),
+        "tickets",
+        ["status"],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_tickets_status"), table_name="tickets")
+    op.drop_index(op.f("ix_tickets_order_id"), table_name="tickets")
+    op.drop_table("tickets")
+    op.drop_index(op.f("ix_showtime_seat_status_status"), table_name="showtime_seat_status")
+    op.drop_index(op.f("ix_showtime_seat_status_showtime_id"), table_name="showtime_seat_status")
+    op.drop_index(op.f("ix_showtime_seat_status_seat_id"), table_name="showtime_seat_status")
+    op.drop_table("showtime_seat_status")
+    op.drop_table("reservation_seats")
+    op.drop_index(op.f("ix_orders_user_id"), table_name="orders")
+    op.drop_index(op.f("ix_orders_status"), table_name="orders")
+    op.drop_index(op.f("ix_orders_showtime_id"), table_name="orders")
+    op.drop_index(op.f("ix_orders_provider_session_id"), table_name="orders")
+    op.drop_table("orders")
+    op.drop_table("showtime_sales_rollups")
+    op.drop_index(op.f("ix_reservations_status"), table_name="reservations")
+    op.drop_index(op.f("ix_reservations_showtime_id"), table_name="reservations")
+    op.drop_index(op.f("ix_reservations_expires_at"), table_name="reservations")
+    op.drop_table("reservations")
+    op.drop_index(op.f("ix_showtimes_starts_at"), table_name="showtimes")
+    op.drop_index(op.f("ix_showtimes_movie_id"), table_name="showtimes")
+    op.drop_index(op.f("ix_showtimes_auditorium_id"), table_name="showtimes")
+    op.drop_table("showtimes")
+    op.drop_table("seats")
+    op.drop_index(
+        op.f("ix_user_recommendation_candidates_user_id"),
+        table_name="user_recommendation_candidates",
+    )
+    op.drop_index(
+        op.f("ix_user_recommendation_candidates_movie_id"),
+        table_name="user_recommendation_candidates",
+    )
+    op.drop_table("user_recommendation_candidates")
+    op.drop_index(op.f("ix_user_movie_events_user_id"), table_name="user_movie_events")
+    op.drop_index(op.f("ix_user_movie_events_movie_id"), table_name="user_movie_events")
+    op.drop_index(op.f("ix_user_movie_events_event_type"), table_name="user_movie_events")
+    op.drop_table("user_movie_events")
+    op.drop_index(op.f("ix_refresh_token_sessions_user_id"), table_name="refresh_token_sessions")
+    op.drop_index(op.f("ix_refresh_token_sessions_token_hash"), table_name="refresh_token_sessions")
+    op.drop_index(op.f("ix_refresh_token_sessions_expires_at"), table_name="refresh_token_sessions")
+    op.drop_table("refresh_token_sessions")
+    op.drop_index(op.f("ix_recommendation_events_user_id"), table_name="recommendation_events")
+    op.drop_index(op.f("ix_recommendation_events_occurred_at"), table_name="recommendation_events")
+    op.drop_index(op.f("ix_recommendation_events_movie_id"), table_name="recommendation_events")
+    op.drop_index(op.f("ix_recommendation_events_event_type"), table_name="recommendation_events")
+    op.drop_table("recommendation_events")
+    op.drop_index(op.f("ix_movie_similarity_similar_movie_id"), table_name="movie_similarity")
+    op.drop_index(op.f("ix_movie_similarity_movie_id"), table_name="movie_similarity")
+    op.drop_table("movie_similarity")
+    op.drop_table("auditoriums")
+    op.drop_index(op.f("ix_users_email"), table_name="users")
+    op.drop_table("users")
+    op.drop_index(op.f("ix_theaters_city"), table_name="theaters")
+    op.drop_table("theaters")
+    op.drop_table("seat_maps")
+    op.drop_table("recommendation_variants")
+    op.drop_index(op.f("ix_movies_title"), table_name="movies")
+    op.drop_table("movies")
+    op.drop_table("bootstrap_state")
@@ -0,0 +1,125 @@
+"""Hot path indexes
+
+Partial indexes for the active-hold and available-seat lookups, the held-by lookup used
+when holds are released, and a composite index for order history. Single-column indexes
+that the new ones (or existing unique constraints) make redundant are dropped to keep seat
+and hold writes cheap.
+
+Every index is built and dropped CONCURRENTLY outside the migration transaction, so holds and
+checkouts keep writing to these tables while it runs. A concurrent build that fails leaves
+an INVALID index behind which ``IF NOT EXISTS`` would then skip; drop it before rerunning.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 23:47:28.673749
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+ACTIVE_RESERVATION = sa.text("status = 'ACTIVE'")
+
+
+def upgrade() -> None:
+    # if_(not_)exists lets databases first built by create_all adopt the chain from 0001.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_reservations_active_expires_at",
+            "reservations",
+            ["expires_at"],
+            postgresql_where=ACTIVE_RESERVATION,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_reservations_active_user_showtime",
+            "reservations",
+            ["user_id", "showtime_id", "created_at"],
+            postgresql_where=ACTIVE_RESERVATION,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for index_name in ("ix_reservations_expires_at", "ix_reservations_status"):
+            op.drop_index(
+                index_name,
+                table_name="reservations",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+        op.create_index(
+            "ix_showtime_seat_status_available",
+            "showtime_seat_status",
+            ["showtime_id", "seat_id"],
+            postgresql_where=sa.text("status = 'AVAILABLE'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_showtime_seat_status_held_by",
+            "showtime_seat_status",
+            ["held_by_reservation_id"],
+            postgresql_where=sa.text("held_by_reservation_id IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # uq_showtime_seat (showtime_id, seat_id) already serves showtime_id lookups.
+        for index_name in ("ix_showtime_seat_status_status", "ix_showtime_seat_status_showtime_id"):
+            op.drop_index(
+                index_name,
+                table_name="showtime_seat_status",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+        op.create_index(
+            "ix_orders_user_created_at",
+            "orders",
+            ["user_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_orders_user_id",
+            table_name="orders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_orders_user_id", "orders", ["user_id"], postgresql_concurrently=True)
+        op.drop_index(
+            "ix_orders_user_created_at", table_name="orders", postgresql_concurrently=True
+        )
+
+        for index_name, column in (
+            ("ix_showtime_seat_status_status", "status"),
+            ("ix_showtime_seat_status_showtime_id", "showtime_id"),
+        ):
+            op.create_index(
+                index_name, "showtime_seat_status", [column], postgresql_concurrently=True
+            )
+        for index_name in ("ix_showtime_seat_status_held_by", "ix_showtime_seat_status_available"):
+            op.drop_index(
+                index_name, table_name="showtime_seat_status", postgresql_concurrently=True
+            )
+
+        for index_name, column in (
+            ("ix_reservations_status", "status"),
+            ("ix_reservations_expires_at", "expires_at"),
+        ):
+            op.create_index(index_name, "reservations", [column], postgresql_concurrently=True)
+        for index_name in (
+            "ix_reservations_active_user_showtime",
+            "ix_reservations_active_expires_at",
+        ):
+            op.drop_index(index_name, table_name="reservations", postgresql_concurrently=True)
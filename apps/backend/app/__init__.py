@@ -0,0 +1,4 @@
+from time import perf_counter
+
+# Taken before any application module loads so startup profiling can time imports.
+IMPORT_STARTED_AT = perf_counter()
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from app.api.v1 import (
     admin_catalog,
+    admin_recommendations,
     admin_reports,
     auth,
     checkout,
@@ -20,6 +21,11 @@ api_router.include_router(theaters.router, prefix="/theaters", tags=["theaters"]
 api_router.include_router(showtimes.router, prefix="/showtimes", tags=["showtimes"])
 api_router.include_router(admin_catalog.router, prefix="/admin", tags=["admin"])
 api_router.include_router(admin_reports.router, prefix="/admin/reports", tags=["admin"])
+api_router.include_router(
+    admin_recommendations.router,
+    prefix="/admin/recommendations",
+    tags=["admin"],
+)
 api_router.include_router(reservations.router, prefix="/reservations", tags=["reservations"])
 api_router.include_router(me.router, prefix="/me", tags=["me"])
 api_router.include_router(checkout.checkout_router, prefix="/checkout", tags=["checkout"])
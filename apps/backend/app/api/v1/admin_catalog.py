@@ -5,12 +5,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import require_admin_user
 from app.core.cache import delete_cache_prefix
+from app.core.config import settings
 from app.db.session import get_db_session
 from app.models.movie import Movie
 from app.models.order import Order
-from app.models.recommendation import MovieSimilarity, UserMovieEvent
+from app.models.recommendation import (
+    MovieSimilarity,
+    RecommendationEvent,
+    UserMovieEvent,
+    UserRecommendationCandidate,
+)
 from app.models.reservation import Reservation, ReservationSeat, ShowtimeSeatStatus
-from app.models.showtime import Auditorium, Showtime, Theater
+from app.models.sales_rollup import ShowtimeSalesRollup
+from app.models.showtime import Auditorium, SeatMap, Showtime, Theater
 from app.schemas.catalog import (
     AuditoriumCreate,
     AuditoriumListResponse,
@@ -18,17 +25,25 @@ from app.schemas.catalog import (
     MovieCreate,
     MovieDetail,
     MovieUpdate,
+    ShowtimeBulkCreate,
+    ShowtimeBulkCreateResponse,
     ShowtimeCreate,
     ShowtimeRead,
     ShowtimeUpdate,
     TheaterCreate,
     TheaterRead,
     TheaterUpdate,
+    WaitingRoomConfig,
+    WaitingRoomConfigRead,
 )
+from app.services import waiting_room
+from app.services.recommendation_pool_service import invalidate_candidate_pool
+from app.services.sales_rollup_service import SHOWTIME_SEAT_COUNT_COLUMNS
 from app.services.seat_inventory import (
     ensure_auditorium_seat_inventory,
     sync_showtime_seat_statuses,
 )
+from app.services.showtime_scheduling_service import schedule_showtimes
 
 router = APIRouter(dependencies=[Depends(require_admin_user)])
 
@@ -38,6 +53,7 @@ async def _invalidate_catalog_cache() -> None:
     await delete_cache_prefix("catalog:movie:")
     await delete_cache_prefix("catalog:theaters:")
     await delete_cache_prefix("catalog:showtimes:")
+    await invalidate_candidate_pool()
 
 
 def _apply_updates(instance: object, updates: dict) -> None:
@@ -56,9 +72,11 @@ async def _get_showtime_read(session: AsyncSession, showtime_id: int) -> Showtim
             Showtime.starts_at,
             Showtime.ends_at,
             Showtime.status,
+            *SHOWTIME_SEAT_COUNT_COLUMNS,
         )
         .join(Auditorium, Auditorium.id == Showtime.auditorium_id)
         .join(Theater, Theater.id == Auditorium.theater_id)
+        .outerjoin(ShowtimeSalesRollup, ShowtimeSalesRollup.showtime_id == Showtime.id)
         .where(Showtime.id == showtime_id)
     )
     row = (await session.execute(stmt)).mappings().first()
@@ -142,9 +160,23 @@ async def delete_movie(
         await session.execute(
             delete(ShowtimeSeatStatus).where(ShowtimeSeatStatus.showtime_id.in_(showtime_ids))
         )
+        await session.execute(
+            delete(ShowtimeSalesRollup).where(ShowtimeSalesRollup.showtime_id.in_(showtime_ids))
+        )
         await session.execute(delete(Showtime).where(Showtime.id.in_(showtime_ids)))
 
     await session.execute(delete(UserMovieEvent).where(UserMovieEvent.movie_id == movie_id))
+    await session.execute(
+        delete(RecommendationEvent).where(RecommendationEvent.movie_id == movie_id)
+    )
+    await session.execute(
+        delete(UserRecommendationCandidate).where(
+            or_(
+                UserRecommendationCandidate.movie_id == movie_id,
+                UserRecommendationCandidate.source_movie_id == movie_id,
+            )
+        )
+    )
     await session.execute(
         delete(MovieSimilarity).where(
             or_(
@@ -306,7 +338,15 @@ async def create_auditorium(
     if theater is None:
         raise HTTPException(status_code=404, detail="Theater not found")
 
-    auditorium = Auditorium(**payload.model_dump())
+    if payload.layout_json is not None and payload.seatmap_id is not None:
+        raise HTTPException(status_code=400, detail="Provide either seatmap_id or layout_json")
+
+    auditorium = Auditorium(**payload.model_dump(exclude={"layout_json"}))
+    if payload.layout_json is not None:
+        seatmap = SeatMap(name=f"{payload.name} Layout", layout_json=payload.layout_json)
+        session.add(seatmap)
+        await session.flush()
+        auditorium.seatmap_id = seatmap.id
     session.add(auditorium)
     await session.flush()
     await ensure_auditorium_seat_inventory(session, auditorium)
@@ -351,6 +391,21 @@ async def create_showtime(
     return await _get_showtime_read(session, showtime.id)
 
 
+@router.post(
+    "/showtimes/bulk",
+    response_model=ShowtimeBulkCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_showtimes(
+    payload: ShowtimeBulkCreate,
+    session: AsyncSession = Depends(get_db_session),
+) -> ShowtimeBulkCreateResponse:
+    showtime_ids = await schedule_showtimes(session, payload)
+    await session.commit()
+    await _invalidate_catalog_cache()
+    return ShowtimeBulkCreateResponse(created=len(showtime_ids), showtime_ids=showtime_ids)
+
+
 @router.patch("/showtimes/{showtime_id}", response_model=ShowtimeRead)
 async def update_showtime(
     showtime_id: int,
@@ -411,6 +466,9 @@ async def delete_showtime(
     await session.execute(
         delete(ShowtimeSeatStatus).where(ShowtimeSeatStatus.showtime_id == showtime_id)
     )
+    await session.execute(
+        delete(ShowtimeSalesRollup).where(ShowtimeSalesRollup.showtime_id == showtime_id)
+    )
     await session.delete(showtime)
     try:
         await session.commit()
@@ -422,3 +480,28 @@ async def delete_showtime(
         ) from exc
     await _invalidate_catalog_cache()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.put("/showtimes/{showtime_id}/waiting-room", response_model=WaitingRoomConfigRead)
+async def configure_showtime_waiting_room(
+    showtime_id: int,
+    payload: WaitingRoomConfig,
+    session: AsyncSession = Depends(get_db_session),
+) -> WaitingRoomConfigRead:
+    showtime_exists = (
+        await session.execute(select(Showtime.id).where(Showtime.id == showtime_id))
+    ).scalar_one_or_none()
+    if showtime_exists is None:
+        raise HTTPException(status_code=404, detail="Showtime not found")
+
+    active_shoppers = None
+    if payload.enabled:
+        active_shoppers = (
+            payload.active_shoppers or settings.waiting_room_default_active_shoppers
+        )
+    await waiting_room.configure_room(showtime_id, active_shoppers=active_shoppers)
+    return WaitingRoomConfigRead(
+        showtime_id=showtime_id,
+        enabled=payload.enabled,
+        active_shoppers=active_shoppers,
+    )
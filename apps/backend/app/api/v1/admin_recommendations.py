@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Path
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_admin_user
+from app.core.cache import delete_cache_prefix
+from app.db.session import get_db_session
+from app.models.recommendation import RecommendationVariant, UserRecommendationCandidate
+from app.schemas.portal import (
+    RecommendationVariantListResponse,
+    RecommendationVariantRead,
+    RecommendationVariantWrite,
+)
+from app.services.recommendation_variant_service import invalidate_variant_table
+
+router = APIRouter(dependencies=[Depends(require_admin_user)])
+
+
+@router.get("/variants", response_model=RecommendationVariantListResponse)
+async def list_recommendation_variants(
+    session: AsyncSession = Depends(get_db_session),
+) -> RecommendationVariantListResponse:
+    rows = (
+        await session.execute(
+            select(RecommendationVariant).order_by(RecommendationVariant.name.asc())
+        )
+    ).scalars()
+    items = [RecommendationVariantRead.model_validate(row) for row in rows]
+    return RecommendationVariantListResponse(items=items, total=len(items))
+
+
+@router.put("/variants/{name}", response_model=RecommendationVariantRead)
+async def upsert_recommendation_variant(
+    payload: RecommendationVariantWrite,
+    name: str = Path(min_length=1, max_length=20, pattern="^[A-Za-z0-9_-]+$"),
+    session: AsyncSession = Depends(get_db_session),
+) -> RecommendationVariantRead:
+    name = name.upper()
+    async with session.begin():
+        stmt = insert(RecommendationVariant).values(name=name, **payload.model_dump())
+        variant = (
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[RecommendationVariant.name],
+                    set_={**payload.model_dump(), "updated_at": func.now()},
+                ).returning(RecommendationVariant)
+            )
+        ).scalar_one()
+        # Stored candidates were scored with the old weights; drop them so users rebuild.
+        await session.execute(
+            delete(UserRecommendationCandidate).where(UserRecommendationCandidate.variant == name)
+        )
+        response = RecommendationVariantRead.model_validate(variant)
+
+    invalidate_variant_table()
+    await delete_cache_prefix("recommendations:")
+    return response
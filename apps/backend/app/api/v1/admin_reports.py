@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, Query
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -6,10 +9,20 @@ from app.api.deps import require_admin_user
 from app.core.metrics import get_metric_value
 from app.db.session import get_db_session
 from app.models.movie import Movie
-from app.models.order import Order, Ticket
-from app.models.reservation import Reservation, ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
 from app.models.showtime import Auditorium, Showtime, Theater
-from app.schemas.portal import AdminSalesReportResponse, AdminShowtimeSalesItem
+from app.schemas.portal import (
+    AdminSalesReportResponse,
+    AdminSalesTimeSeriesPoint,
+    AdminSalesTimeSeriesResponse,
+    AdminShowtimeSalesItem,
+)
+from app.services.report_export_service import (
+    EXPORT_DATASETS,
+    EXPORT_MEDIA_TYPES,
+    stream_report_export,
+)
+from app.services.sales_timeseries_service import build_sales_timeseries
 
 router = APIRouter(dependencies=[Depends(require_admin_user)])
 
@@ -19,66 +32,40 @@ async def sales_report(
     limit: int = Query(default=10, ge=1, le=50),
     session: AsyncSession = Depends(get_db_session),
 ) -> AdminSalesReportResponse:
-    paid_orders = (
-        await session.execute(select(func.count(Order.id)).where(Order.status == "PAID"))
-    ).scalar_one()
-    gross_revenue_cents = (
-        await session.execute(
-            select(func.coalesce(func.sum(Order.total_cents), 0)).where(Order.status == "PAID")
-        )
-    ).scalar_one()
-    tickets_sold = (
+    totals = (
         await session.execute(
-            select(func.count(Ticket.id))
-            .join(Order, Order.id == Ticket.order_id)
-            .where(Order.status == "PAID")
-        )
-    ).scalar_one()
-    active_holds = (
-        await session.execute(
-            select(func.count(Reservation.id)).where(Reservation.status == "ACTIVE")
+            select(
+                func.coalesce(func.sum(ShowtimeSalesRollup.paid_orders), 0).label("paid_orders"),
+                func.coalesce(func.sum(ShowtimeSalesRollup.revenue_cents), 0).label(
+                    "gross_revenue_cents"
+                ),
+                func.coalesce(func.sum(ShowtimeSalesRollup.sold_seats), 0).label("tickets_sold"),
+                func.coalesce(func.sum(ShowtimeSalesRollup.active_holds), 0).label(
+                    "active_holds"
+                ),
+            )
         )
-    ).scalar_one()
+    ).mappings().one()
 
-    sold_subquery = (
-        select(
-            ShowtimeSeatStatus.showtime_id.label("showtime_id"),
-            func.count(ShowtimeSeatStatus.id).label("sold_seats"),
-        )
-        .where(ShowtimeSeatStatus.status == "SOLD")
-        .group_by(ShowtimeSeatStatus.showtime_id)
-        .subquery()
-    )
-    capacity_subquery = (
-        select(
-            ShowtimeSeatStatus.showtime_id.label("showtime_id"),
-            func.count(ShowtimeSeatStatus.id).label("capacity"),
-        )
-        .group_by(ShowtimeSeatStatus.showtime_id)
-        .subquery()
-    )
+    sold_seats = func.coalesce(ShowtimeSalesRollup.sold_seats, 0)
+    capacity = func.coalesce(ShowtimeSalesRollup.capacity, 0)
     stmt = (
         select(
             Showtime.id.label("showtime_id"),
             Movie.title.label("movie_title"),
             Theater.name.label("theater_name"),
             Showtime.starts_at,
-            func.coalesce(sold_subquery.c.sold_seats, 0).label("sold_seats"),
-            func.coalesce(capacity_subquery.c.capacity, 0).label("capacity"),
+            sold_seats.label("sold_seats"),
+            capacity.label("capacity"),
             case(
-                (func.coalesce(capacity_subquery.c.capacity, 0) == 0, 0.0),
-                else_=(
-                    func.coalesce(sold_subquery.c.sold_seats, 0)
-                    * 100.0
-                    / capacity_subquery.c.capacity
-                ),
+                (capacity == 0, 0.0),
+                else_=sold_seats * 100.0 / capacity,
             ).label("occupancy_percent"),
         )
         .join(Movie, Movie.id == Showtime.movie_id)
         .join(Auditorium, Auditorium.id == Showtime.auditorium_id)
         .join(Theater, Theater.id == Auditorium.theater_id)
-        .outerjoin(sold_subquery, sold_subquery.c.showtime_id == Showtime.id)
-        .outerjoin(capacity_subquery, capacity_subquery.c.showtime_id == Showtime.id)
+        .outerjoin(ShowtimeSalesRollup, ShowtimeSalesRollup.showtime_id == Showtime.id)
         .order_by(Showtime.starts_at.desc())
         .limit(limit)
     )
@@ -98,10 +85,10 @@ async def sales_report(
         )
 
     return AdminSalesReportResponse(
-        paid_orders=paid_orders,
-        gross_revenue_cents=gross_revenue_cents,
-        tickets_sold=tickets_sold,
-        active_holds=active_holds,
+        paid_orders=totals["paid_orders"],
+        gross_revenue_cents=totals["gross_revenue_cents"],
+        tickets_sold=totals["tickets_sold"],
+        active_holds=totals["active_holds"],
         showtimes=showtimes,
         recommendation_impressions=get_metric_value("recommendation_impression_total"),
         recommendation_clicks=get_metric_value("recommendation_click_total"),
@@ -132,3 +119,58 @@ async def sales_report(
             2,
         ),
     )
+
+
+@router.get("/timeseries", response_model=AdminSalesTimeSeriesResponse)
+async def sales_timeseries_report(
+    date_from: datetime,
+    date_to: datetime,
+    bucket: str = Query(default="day", pattern="^(hour|day|week)$"),
+    group_by: str = Query(default="none", pattern="^(none|theater|movie)$"),
+    session: AsyncSession = Depends(get_db_session),
+) -> AdminSalesTimeSeriesResponse:
+    if date_from.tzinfo is None or date_to.tzinfo is None:
+        raise HTTPException(status_code=400, detail="date_from and date_to must include a timezone")
+    if date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be earlier than date_to")
+
+    points = await build_sales_timeseries(
+        session,
+        bucket=bucket,
+        group_by=group_by,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return AdminSalesTimeSeriesResponse(
+        bucket=bucket,
+        group_by=group_by,
+        date_from=date_from,
+        date_to=date_to,
+        points=[AdminSalesTimeSeriesPoint.model_validate(point) for point in points],
+    )
+
+
+@router.get("/exports/{dataset}")
+async def export_report(
+    dataset: str,
+    export_format: str = Query(default="csv", alias="format", pattern="^(csv|ndjson)$"),
+    date_from: datetime | None = Query(default=None),
+    date_to: datetime | None = Query(default=None),
+) -> StreamingResponse:
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail="Export dataset not found")
+    if date_from is not None and date_to is not None and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be earlier than date_to")
+
+    return StreamingResponse(
+        stream_report_export(
+            dataset=dataset,
+            export_format=export_format,
+            date_from=date_from,
+            date_to=date_to,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{dataset}-export.{export_format}"',
+        },
+    )
@@ -1,13 +1,17 @@
+import asyncio
 import json
+import logging
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user_id
+from app.core import idempotency
 from app.core.config import settings
 from app.core.metrics import increment_metric
 from app.core.rate_limit import create_rate_limiter
+from app.db.retry import run_transaction
 from app.db.session import get_db_session
 from app.schemas.payment import (
     CheckoutDemoConfirmRequest,
@@ -18,12 +22,9 @@ from app.schemas.payment import (
     StripeWebhookAck,
     StripeWebhookEvent,
 )
-from app.services.payment_service import PaymentService
+from app.services.payment_service import PaymentService, load_stripe_sdk
 
-try:
-    import stripe
-except ModuleNotFoundError:  # pragma: no cover - resolved once dependency is installed
-    stripe = None
+logger = logging.getLogger(__name__)
 
 checkout_router = APIRouter()
 webhook_router = APIRouter()
@@ -35,6 +36,22 @@ checkout_session_rate_limiter = create_rate_limiter(
 )
 
 
+async def _precompute_buyer_candidates(user_id: int) -> None:
+    """Rebuild the candidates that paying for an order cleared, off the request path."""
+    # Imported here so API startup does not load Celery and the worker task modules.
+    from app.workers.celery_app import celery_app
+
+    try:
+        # Publishing to the broker is blocking I/O.
+        await asyncio.to_thread(
+            celery_app.send_task,
+            "recommendation.precompute_user_candidates",
+            args=[user_id],
+        )
+    except Exception:
+        logger.warning("recommendation_precompute_enqueue_failed", extra={"user_id": user_id})
+
+
 @checkout_router.post(
     "/session",
     response_model=CheckoutSessionRead,
@@ -42,24 +59,53 @@ checkout_session_rate_limiter = create_rate_limiter(
 )
 async def create_checkout_session(
     payload: CheckoutSessionCreate,
+    response: Response,
     session: AsyncSession = Depends(get_db_session),
     _: None = Depends(checkout_session_rate_limiter),
     user_id: int = Depends(get_current_user_id),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
 ) -> CheckoutSessionRead:
-    increment_metric("checkout_session_attempt_total")
-    try:
-        async with session.begin():
-            checkout_session = await payment_service.create_checkout_session(
+    async def open_checkout() -> CheckoutSessionRead:
+        return await payment_service.create_checkout_session(
+            session,
+            user_id=user_id,
+            reservation_id=payload.reservation_id,
+            provider=payload.provider,
+        )
+
+    async def create() -> CheckoutSessionRead:
+        increment_metric("checkout_session_attempt_total")
+        try:
+            checkout_session = await run_transaction(
                 session,
-                user_id=user_id,
-                reservation_id=payload.reservation_id,
-                provider=payload.provider,
+                open_checkout,
+                operation="checkout_session",
             )
-    except HTTPException:
-        increment_metric("checkout_session_failure_total")
-        raise
-    increment_metric("checkout_session_success_total")
-    return checkout_session
+            # Also covers a Stripe order left without a session by an earlier failure.
+            if (
+                checkout_session.provider == "STRIPE_CHECKOUT"
+                and not checkout_session.provider_session_id
+            ):
+                checkout_session = await payment_service.open_stripe_checkout(
+                    session,
+                    checkout=checkout_session,
+                    user_id=user_id,
+                )
+        except HTTPException:
+            increment_metric("checkout_session_failure_total")
+            raise
+        increment_metric("checkout_session_success_total")
+        return checkout_session
+
+    return await idempotency.run_once(
+        idempotency_key,
+        scope="checkout:session",
+        user_id=user_id,
+        request_payload=payload.model_dump(mode="json"),
+        response=response,
+        model=CheckoutSessionRead,
+        handler=create,
+    )
 
 
 @checkout_router.post("/demo/confirm", response_model=CheckoutFinalizeRead)
@@ -68,14 +114,22 @@ async def confirm_demo_checkout(
     session: AsyncSession = Depends(get_db_session),
     user_id: int = Depends(get_current_user_id),
 ) -> CheckoutFinalizeRead:
+    paid_now = False
+
+    async def finalize() -> CheckoutFinalizeRead:
+        nonlocal paid_now
+        order = await payment_service.get_order_for_user(
+            session,
+            order_id=payload.order_id,
+            user_id=user_id,
+        )
+        was_paid = order.status == "PAID"
+        finalized = await payment_service.finalize_paid_order(session, order=order)
+        paid_now = not was_paid and finalized.order_status == "PAID"
+        return finalized
+
     try:
-        async with session.begin():
-            order = await payment_service.get_order_for_user(
-                session,
-                order_id=payload.order_id,
-                user_id=user_id,
-            )
-            finalized = await payment_service.finalize_paid_order(session, order=order)
+        finalized = await run_transaction(session, finalize, operation="checkout_finalize")
     except HTTPException:
         increment_metric("checkout_finalize_failure_total")
         raise
@@ -83,6 +137,8 @@ async def confirm_demo_checkout(
         increment_metric("checkout_finalize_success_total")
     else:
         increment_metric("checkout_finalize_failure_total")
+    if paid_now:
+        await _precompute_buyer_candidates(user_id)
     return finalized
 
 
@@ -112,8 +168,7 @@ async def stripe_webhook(
     order_id: int | None = None
 
     if stripe_signature and settings.stripe_webhook_signing_secret:
-        if stripe is None:
-            raise HTTPException(status_code=503, detail="Stripe SDK not installed")
+        stripe = load_stripe_sdk()
         try:
             stripe_event = stripe.Webhook.construct_event(
                 payload=raw_payload,
@@ -164,7 +219,10 @@ async def stripe_webhook(
     if event_type != "checkout.session.completed":
         return StripeWebhookAck(acknowledged=True, duplicate=False, finalized=False)
 
-    async with session.begin():
+    paid_user_id: int | None = None
+
+    async def finalize() -> CheckoutFinalizeRead:
+        nonlocal paid_user_id
         if provider_session_id:
             order = await payment_service.get_order_by_provider_session(
                 session,
@@ -180,15 +238,21 @@ async def stripe_webhook(
                 status_code=400,
                 detail="Webhook data must include provider_session_id or order_id",
             )
-
+        was_paid = order.status == "PAID"
         finalized = await payment_service.finalize_paid_order(session, order=order)
-        if finalized.order_status == "PAID":
-            increment_metric("checkout_finalize_success_total")
-        else:
-            increment_metric("checkout_finalize_failure_total")
-        return StripeWebhookAck(
-            acknowledged=True,
-            duplicate=False,
-            finalized=True,
-            order_status=finalized.order_status,
-        )
+        paid_user_id = order.user_id if not was_paid and finalized.order_status == "PAID" else None
+        return finalized
+
+    finalized = await run_transaction(session, finalize, operation="checkout_finalize")
+    if finalized.order_status == "PAID":
+        increment_metric("checkout_finalize_success_total")
+    else:
+        increment_metric("checkout_finalize_failure_total")
+    if paid_user_id is not None:
+        await _precompute_buyer_candidates(paid_user_id)
+    return StripeWebhookAck(
+        acknowledged=True,
+        duplicate=False,
+        finalized=True,
+        order_status=finalized.order_status,
+    )
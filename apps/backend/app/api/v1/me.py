@@ -1,6 +1,6 @@
-from collections import Counter, defaultdict
-from datetime import UTC, date, datetime
-from math import log1p
+from collections import Counter
+from datetime import UTC, datetime
+from time import perf_counter
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import delete, func, select
@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_current_user_id
 from app.core.cache import delete_cache_prefix, get_cache_json, set_cache_json
 from app.core.config import settings
-from app.core.metrics import increment_metric
+from app.core.metrics import increment_metric, observe_metric
 from app.core.ticket_lifecycle import (
     build_ticket_lifecycle_window,
     resolve_ticket_lifecycle_state,
@@ -17,7 +17,7 @@ from app.core.ticket_lifecycle import (
 from app.db.session import get_db_session
 from app.models.movie import Movie
 from app.models.order import Order, Ticket
-from app.models.recommendation import MovieSimilarity, UserMovieEvent
+from app.models.recommendation import UserMovieEvent
 from app.models.showtime import Auditorium, Seat, Showtime, Theater
 from app.schemas.portal import (
     MovieRecommendationItem,
@@ -26,83 +26,28 @@ from app.schemas.portal import (
     MyOrderListResponse,
     MyTicketItem,
     MyTicketListResponse,
+    RecommendationEventBatchRead,
+    RecommendationEventBatchWrite,
     RecommendationEventRead,
     RecommendationEventWrite,
     RecommendationFeedbackRead,
     RecommendationFeedbackWrite,
 )
+from app.services.recommendation_event_service import (
+    build_event_records,
+    enqueue_recommendation_events,
+    insert_recommendation_events,
+)
+from app.services.recommendation_pool_service import get_candidate_pool
+from app.services.recommendation_service import (
+    NOT_INTERESTED,
+    SAVE_FOR_LATER,
+    get_user_candidates,
+    select_diverse_candidates,
+)
+from app.services.recommendation_variant_service import resolve_user_variant
 
 router = APIRouter()
-NOT_INTERESTED = "NOT_INTERESTED"
-SAVE_FOR_LATER = "SAVE_FOR_LATER"
-
-
-def _extract_genres(metadata_json: dict | None) -> list[str]:
-    if not isinstance(metadata_json, dict):
-        return []
-    genres = metadata_json.get("genre")
-    if not isinstance(genres, list):
-        return []
-    normalized = []
-    for genre in genres:
-        if isinstance(genre, str) and genre.strip():
-            normalized.append(genre.strip())
-    return normalized
-
-
-def _freshness_score(
-    *,
-    now: datetime,
-    next_showtime_starts_at: datetime,
-    release_date: date | None,
-) -> float:
-    hours_until_showtime = max(
-        (next_showtime_starts_at - now).total_seconds() / 3600,
-        0.0,
-    )
-    showtime_freshness = max(0.0, 1.0 - min(hours_until_showtime / 96.0, 1.0))
-
-    release_freshness = 0.0
-    if release_date is not None:
-        age_days = (now.date() - release_date).days
-        if age_days <= 0:
-            release_freshness = 1.0
-        else:
-            release_freshness = max(0.0, 1.0 - min(age_days / 140.0, 1.0))
-
-    return (showtime_freshness * 0.65) + (release_freshness * 0.35)
-
-
-def _weights_for_variant(variant: str) -> tuple[float, float, float]:
-    if variant.upper() == "B":
-        return (0.48, 0.32, 0.20)
-    return (0.60, 0.22, 0.18)
-
-
-def _recommendation_reason(
-    *,
-    source_movie_id: int | None,
-    watched_titles: dict[int, str],
-    genres: list[str],
-    genre_weights: dict[str, float],
-    tickets_sold: int,
-    is_saved_for_later: bool,
-) -> str:
-    if is_saved_for_later:
-        return "Saved for later"
-
-    if source_movie_id is not None and source_movie_id in watched_titles:
-        return f"Because you watched {watched_titles[source_movie_id]}"
-
-    if genres:
-        matching_genres = [genre for genre in genres if genre_weights.get(genre.lower(), 0.0) > 0]
-        if matching_genres:
-            return f"Because you watch {matching_genres[0]} movies"
-
-    if tickets_sold > 0:
-        return "Trending with other moviegoers"
-
-    return "Fresh pick for tonight"
 
 
 @router.get("/tickets", response_model=MyTicketListResponse)
@@ -257,6 +202,29 @@ async def submit_recommendation_feedback(
     )
 
 
+async def _record_recommendation_events(
+    session: AsyncSession,
+    *,
+    user_id: int,
+    events: list[RecommendationEventWrite],
+) -> None:
+    records = build_event_records(
+        user_id=user_id,
+        events=[(event.movie_id, event.event_type) for event in events],
+        variant=(await resolve_user_variant(user_id)).name,
+    )
+    if not await enqueue_recommendation_events(records):
+        # Without the stream, write synchronously rather than drop the events.
+        async with session.begin():
+            await insert_recommendation_events(session, records)
+
+    event_counts = Counter(event.event_type for event in events)
+    if event_counts["IMPRESSION"]:
+        increment_metric("recommendation_impression_total", event_counts["IMPRESSION"])
+    if event_counts["CLICK"]:
+        increment_metric("recommendation_click_total", event_counts["CLICK"])
+
+
 @router.post(
     "/recommendations/events",
     response_model=RecommendationEventRead,
@@ -267,18 +235,15 @@ async def record_recommendation_event(
     session: AsyncSession = Depends(get_db_session),
     user_id: int = Depends(get_current_user_id),
 ) -> RecommendationEventRead:
-    movie_exists = (
-        await session.execute(select(Movie.id).where(Movie.id == payload.movie_id))
-    ).scalar_one_or_none()
+    # One primary-key lookup keeps the single-event 404; batches are checked at flush time.
+    async with session.begin():
+        movie_exists = (
+            await session.execute(select(Movie.id).where(Movie.id == payload.movie_id))
+        ).scalar_one_or_none()
     if movie_exists is None:
         raise HTTPException(status_code=404, detail="Movie not found")
 
-    metric_name = (
-        "recommendation_impression_total"
-        if payload.event_type == "IMPRESSION"
-        else "recommendation_click_total"
-    )
-    increment_metric(metric_name)
+    await _record_recommendation_events(session, user_id=user_id, events=[payload])
     return RecommendationEventRead(
         movie_id=payload.movie_id,
         event_type=payload.event_type,
@@ -286,252 +251,131 @@ async def record_recommendation_event(
     )
 
 
+@router.post(
+    "/recommendations/events/batch",
+    response_model=RecommendationEventBatchRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def record_recommendation_events_batch(
+    payload: RecommendationEventBatchWrite,
+    session: AsyncSession = Depends(get_db_session),
+    user_id: int = Depends(get_current_user_id),
+) -> RecommendationEventBatchRead:
+    await _record_recommendation_events(session, user_id=user_id, events=payload.events)
+    return RecommendationEventBatchRead(accepted=len(payload.events))
+
+
 @router.get("/recommendations", response_model=MovieRecommendationResponse)
 async def list_my_recommendations(
     limit: int = Query(default=8, ge=1, le=20),
     session: AsyncSession = Depends(get_db_session),
     user_id: int = Depends(get_current_user_id),
 ) -> MovieRecommendationResponse:
-    variant = settings.recommendation_ranker_variant.upper()
-    cache_key = f"recommendations:{user_id}:{variant}:{limit}"
+    variant = await resolve_user_variant(user_id)
+    variant_labels = {"variant": variant.name}
+    increment_metric("recommendation_variant_assigned_total", labels=variant_labels)
+    cache_key = f"recommendations:{user_id}:{variant.name}:{limit}"
     cached_payload = await get_cache_json(cache_key)
     if cached_payload is not None:
         return MovieRecommendationResponse.model_validate(cached_payload)
 
+    ranking_started_at = perf_counter()
+
     now = datetime.now(tz=UTC)
-    feedback_rows = (
-        await session.execute(
-            select(UserMovieEvent.movie_id, UserMovieEvent.event_type).where(
-                UserMovieEvent.user_id == user_id,
-                UserMovieEvent.event_type.in_([NOT_INTERESTED, SAVE_FOR_LATER]),
+    async with session.begin():
+        feedback_rows = (
+            await session.execute(
+                select(UserMovieEvent.movie_id, UserMovieEvent.event_type).where(
+                    UserMovieEvent.user_id == user_id,
+                    UserMovieEvent.event_type.in_([NOT_INTERESTED, SAVE_FOR_LATER]),
+                )
             )
-        )
-    ).all()
-    not_interested_movie_ids = {
-        int(movie_id)
-        for movie_id, event_type in feedback_rows
-        if event_type == NOT_INTERESTED
-    }
-    saved_for_later_movie_ids = {
-        int(movie_id)
-        for movie_id, event_type in feedback_rows
-        if event_type == SAVE_FOR_LATER
-    }
+        ).all()
+        not_interested_movie_ids = {
+            int(movie_id)
+            for movie_id, event_type in feedback_rows
+            if event_type == NOT_INTERESTED
+        }
+        saved_for_later_movie_ids = {
+            int(movie_id)
+            for movie_id, event_type in feedback_rows
+            if event_type == SAVE_FOR_LATER
+        }
 
-    watch_history_stmt = (
-        select(
-            Movie.id.label("movie_id"),
-            Movie.title.label("movie_title"),
-            Movie.rating.label("rating"),
-            Movie.metadata_json.label("metadata_json"),
-            func.count(Ticket.id).label("watch_count"),
-        )
-        .join(Showtime, Showtime.movie_id == Movie.id)
-        .join(Order, Order.showtime_id == Showtime.id)
-        .join(Ticket, Ticket.order_id == Order.id)
-        .where(
-            Order.user_id == user_id,
-            Order.status == "PAID",
-        )
-        .group_by(Movie.id, Movie.rating, Movie.metadata_json)
-    )
-    watch_history_rows = (await session.execute(watch_history_stmt)).mappings().all()
+        next_showtime_by_movie = {
+            movie.movie_id: movie.next_showtime_starts_at
+            for movie in await get_candidate_pool(session, now=now)
+        }
+        candidates = [
+            candidate
+            for candidate in await get_user_candidates(
+                session,
+                user_id=user_id,
+                variant=variant,
+                now=now,
+            )
+            if candidate.movie_id not in not_interested_movie_ids
+            and candidate.movie_id in next_showtime_by_movie
+        ]
+        candidate_ids = [candidate.movie_id for candidate in candidates]
+        movie_rows = {}
+        if candidate_ids:
+            movie_rows = {
+                int(row["movie_id"]): row
+                for row in (
+                    await session.execute(
+                        select(
+                            Movie.id.label("movie_id"),
+                            Movie.title,
+                            Movie.description,
+                            Movie.runtime_minutes,
+                            Movie.rating,
+                            Movie.release_date,
+                            Movie.poster_url,
+                        ).where(Movie.id.in_(candidate_ids))
+                    )
+                ).mappings()
+            }
 
-    watched_movie_ids = {int(row["movie_id"]) for row in watch_history_rows}
-    watched_titles = {
-        int(row["movie_id"]): str(row["movie_title"])
-        for row in watch_history_rows
-        if row["movie_title"]
-    }
-    watch_count_by_movie = {
-        int(row["movie_id"]): float(row["watch_count"] or 1)
-        for row in watch_history_rows
+    save_for_later_boosts = {
+        movie_id: settings.recommendation_save_for_later_boost
+        for movie_id in saved_for_later_movie_ids
     }
-    genre_weights: defaultdict[str, float] = defaultdict(float)
-    rating_weights: defaultdict[str, float] = defaultdict(float)
-    for row in watch_history_rows:
-        weight = float(row["watch_count"] or 1)
-        rating = str(row["rating"] or "").strip()
-        if rating:
-            rating_weights[rating] += weight
-        for genre in _extract_genres(row["metadata_json"]):
-            genre_weights[genre.lower()] += weight
-
-    similarity_score_by_movie: defaultdict[int, float] = defaultdict(float)
-    top_source_by_movie: dict[int, tuple[float, int]] = {}
-    if watched_movie_ids:
-        similarity_stmt = select(
-            MovieSimilarity.movie_id.label("source_movie_id"),
-            MovieSimilarity.similar_movie_id.label("candidate_movie_id"),
-            MovieSimilarity.score.label("score"),
-        ).where(MovieSimilarity.movie_id.in_(watched_movie_ids))
-        similarity_rows = (await session.execute(similarity_stmt)).mappings().all()
-        for row in similarity_rows:
-            source_movie_id = int(row["source_movie_id"])
-            candidate_movie_id = int(row["candidate_movie_id"])
-            watch_weight = watch_count_by_movie.get(source_movie_id, 1.0)
-            contribution = float(row["score"] or 0.0) * (1.0 + log1p(watch_weight))
-            if contribution <= 0:
-                continue
-            similarity_score_by_movie[candidate_movie_id] += contribution
-            top_source = top_source_by_movie.get(candidate_movie_id)
-            if top_source is None or contribution > top_source[0]:
-                top_source_by_movie[candidate_movie_id] = (contribution, source_movie_id)
-
-    upcoming_showtimes_subquery = (
-        select(
-            Showtime.movie_id.label("movie_id"),
-            func.min(Showtime.starts_at).label("next_showtime_starts_at"),
-        )
-        .where(
-            Showtime.starts_at >= now,
-            Showtime.status == "SCHEDULED",
-        )
-        .group_by(Showtime.movie_id)
-        .subquery()
-    )
-    trending_sales_subquery = (
-        select(
-            Showtime.movie_id.label("movie_id"),
-            func.count(Ticket.id).label("tickets_sold"),
-        )
-        .join(Order, Order.showtime_id == Showtime.id)
-        .join(Ticket, Ticket.order_id == Order.id)
-        .where(
-            Order.status == "PAID",
-            Showtime.starts_at >= now,
-        )
-        .group_by(Showtime.movie_id)
-        .subquery()
+    selected = select_diverse_candidates(
+        [candidate for candidate in candidates if candidate.movie_id in movie_rows],
+        limit=limit,
+        diversity_penalty=settings.recommendation_diversity_penalty,
+        score_boosts=save_for_later_boosts,
     )
 
-    recommendations_stmt = (
-        select(
-            Movie.id.label("movie_id"),
-            Movie.title,
-            Movie.description,
-            Movie.runtime_minutes,
-            Movie.rating,
-            Movie.release_date,
-            Movie.poster_url,
-            upcoming_showtimes_subquery.c.next_showtime_starts_at,
-            func.coalesce(trending_sales_subquery.c.tickets_sold, 0).label("tickets_sold"),
-            Movie.metadata_json.label("metadata_json"),
-        )
-        .join(upcoming_showtimes_subquery, upcoming_showtimes_subquery.c.movie_id == Movie.id)
-        .outerjoin(trending_sales_subquery, trending_sales_subquery.c.movie_id == Movie.id)
-    )
-    if watched_movie_ids:
-        recommendations_stmt = recommendations_stmt.where(~Movie.id.in_(watched_movie_ids))
-    if not_interested_movie_ids:
-        recommendations_stmt = recommendations_stmt.where(~Movie.id.in_(not_interested_movie_ids))
-
-    recommendation_rows = (await session.execute(recommendations_stmt)).mappings().all()
-    max_similarity = max(similarity_score_by_movie.values(), default=0.0)
-    max_popularity = max(
-        (log1p(int(row["tickets_sold"] or 0)) for row in recommendation_rows),
-        default=0.0,
-    )
-    personalized_weight, popularity_weight, freshness_weight = _weights_for_variant(variant)
-    candidate_rows = []
-    for row in recommendation_rows:
-        movie_id = int(row["movie_id"])
-        genres = _extract_genres(row["metadata_json"])
-        primary_genre = genres[0].lower() if genres else None
-        tickets_sold = int(row["tickets_sold"] or 0)
-        similarity_raw = similarity_score_by_movie.get(movie_id, 0.0)
-        similarity_score = similarity_raw / max_similarity if max_similarity > 0 else 0.0
-        popularity_raw = log1p(tickets_sold)
-        popularity_score = popularity_raw / max_popularity if max_popularity > 0 else 0.0
-        freshness_score = _freshness_score(
-            now=now,
-            next_showtime_starts_at=row["next_showtime_starts_at"],
-            release_date=row["release_date"],
-        )
-        rating_score = rating_weights.get(str(row["rating"] or "").strip(), 0.0)
-        rating_bonus = min(rating_score / 4.0, 0.10) if rating_score > 0 else 0.0
-        save_for_later_bonus = (
-            settings.recommendation_save_for_later_boost
-            if movie_id in saved_for_later_movie_ids
-            else 0.0
-        )
-        base_score = (
-            (similarity_score * personalized_weight)
-            + (popularity_score * popularity_weight)
-            + (freshness_score * freshness_weight)
-            + rating_bonus
-            + save_for_later_bonus
-        )
-        source_data = top_source_by_movie.get(movie_id)
-        source_movie_id = source_data[1] if source_data else None
-        candidate_rows.append(
-            {
-                "movie_id": movie_id,
-                "title": row["title"],
-                "description": row["description"],
-                "runtime_minutes": row["runtime_minutes"],
-                "rating": row["rating"],
-                "release_date": row["release_date"],
-                "poster_url": row["poster_url"],
-                "next_showtime_starts_at": row["next_showtime_starts_at"],
-                "tickets_sold": tickets_sold,
-                "genres": genres,
-                "primary_genre": primary_genre,
-                "source_movie_id": source_movie_id,
-                "base_score": base_score,
-            }
-        )
-
-    candidate_rows.sort(key=lambda row: row["base_score"], reverse=True)
-    remaining_rows = candidate_rows.copy()
-    selected_rows = []
-    selected_genre_counts: Counter[str] = Counter()
-
-    while remaining_rows and len(selected_rows) < limit:
-        best_index = 0
-        best_adjusted_score = float("-inf")
-        for index, row in enumerate(remaining_rows):
-            genre_penalty = 0.0
-            if row["primary_genre"]:
-                genre_penalty = (
-                    selected_genre_counts[row["primary_genre"]]
-                    * settings.recommendation_diversity_penalty
-                )
-            adjusted_score = row["base_score"] - genre_penalty
-            if adjusted_score > best_adjusted_score:
-                best_adjusted_score = adjusted_score
-                best_index = index
-
-        selected = remaining_rows.pop(best_index)
-        if selected["primary_genre"]:
-            selected_genre_counts[selected["primary_genre"]] += 1
-        selected["score"] = round(max(best_adjusted_score, 0.0) * 100, 3)
-        selected_rows.append(selected)
-
-    items = [
-        MovieRecommendationItem(
-            movie_id=row["movie_id"],
-            title=row["title"],
-            description=row["description"],
-            runtime_minutes=row["runtime_minutes"],
-            rating=row["rating"],
-            release_date=row["release_date"],
-            poster_url=row["poster_url"],
-            next_showtime_starts_at=row["next_showtime_starts_at"],
-            reason=_recommendation_reason(
-                source_movie_id=row["source_movie_id"],
-                watched_titles=watched_titles,
-                genres=row["genres"],
-                genre_weights=genre_weights,
-                tickets_sold=row["tickets_sold"],
-                is_saved_for_later=row["movie_id"] in saved_for_later_movie_ids,
-            ),
-            score=row["score"],
+    items = []
+    for candidate, adjusted_score in selected:
+        row = movie_rows[candidate.movie_id]
+        items.append(
+            MovieRecommendationItem(
+                movie_id=candidate.movie_id,
+                title=row["title"],
+                description=row["description"],
+                runtime_minutes=row["runtime_minutes"],
+                rating=row["rating"],
+                release_date=row["release_date"],
+                poster_url=row["poster_url"],
+                next_showtime_starts_at=next_showtime_by_movie[candidate.movie_id],
+                reason=(
+                    "Saved for later"
+                    if candidate.movie_id in saved_for_later_movie_ids
+                    else candidate.reason
+                ),
+                score=round(max(adjusted_score, 0.0) * 100, 3),
+            )
         )
-        for row in selected_rows
-    ]
 
     response = MovieRecommendationResponse(items=items, total=len(items))
+    observe_metric(
+        "recommendation_ranking_duration_seconds",
+        perf_counter() - ranking_started_at,
+        labels=variant_labels,
+    )
     await set_cache_json(
         cache_key,
         response.model_dump(mode="json"),
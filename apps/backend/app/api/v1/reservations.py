@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user_id
+from app.core import idempotency
 from app.core.config import settings
 from app.core.metrics import increment_metric
 from app.core.rate_limit import create_rate_limiter
+from app.db.retry import run_transaction
 from app.db.session import get_db_session
 from app.models.reservation import Reservation, ReservationSeat
-from app.schemas.reservation import ReservationCreate, ReservationRead
+from app.schemas.reservation import ReservationCreate, ReservationRead, ReservationUpdate
+from app.services import availability_gate, hold_store, waiting_room
+from app.services.hold_store import RedisHold
 from app.services.reservation_service import ReservationService
 
 router = APIRouter()
@@ -55,30 +61,131 @@ async def _get_reservation_read(
     )
 
 
-@router.post("", response_model=ReservationRead, status_code=status.HTTP_201_CREATED)
-async def create_reservation(
+def _hold_read(hold: RedisHold) -> ReservationRead:
+    return ReservationRead(
+        id=hold.reservation_id,
+        user_id=hold.user_id,
+        showtime_id=hold.showtime_id,
+        status=hold.status,
+        expires_at=hold.expires_at,
+        seat_ids=hold.seat_ids,
+        created_at=hold.created_at,
+    )
+
+
+async def _get_user_hold(reservation_id: int, user_id: int) -> RedisHold | None:
+    if not hold_store.redis_holds_enabled():
+        return None
+    hold = await hold_store.get_hold(reservation_id)
+    return hold if hold is not None and hold.user_id == user_id else None
+
+
+async def _create_redis_hold(
+    session: AsyncSession,
     payload: ReservationCreate,
-    session: AsyncSession = Depends(get_db_session),
-    _: None = Depends(reservation_create_rate_limiter),
-    user_id: int = Depends(get_current_user_id),
+    user_id: int,
 ) -> ReservationRead:
-    increment_metric("reservation_attempt_total")
     async with session.begin():
-        try:
+        if payload.party_size is not None:
+            hold = await reservation_service.create_best_available_redis_hold(
+                session,
+                user_id=user_id,
+                showtime_id=payload.showtime_id,
+                party_size=payload.party_size,
+                seat_type=payload.seat_type,
+                hold_minutes=settings.reservation_hold_minutes,
+            )
+        else:
+            hold = await reservation_service.create_redis_hold(
+                session,
+                user_id=user_id,
+                showtime_id=payload.showtime_id,
+                seat_ids=payload.seat_ids or [],
+                hold_minutes=settings.reservation_hold_minutes,
+            )
+    return _hold_read(hold)
+
+
+async def _create_hold(
+    session: AsyncSession,
+    payload: ReservationCreate,
+    user_id: int,
+) -> ReservationRead:
+    # Requests the gate already knows are doomed never reach Postgres.
+    await availability_gate.reject_unavailable(
+        session,
+        showtime_id=payload.showtime_id,
+        seat_ids=payload.seat_ids,
+        party_size=payload.party_size,
+    )
+    if hold_store.redis_holds_enabled():
+        return await _create_redis_hold(session, payload, user_id)
+
+    async def hold_seats() -> ReservationRead:
+        if payload.party_size is not None:
+            reservation = await reservation_service.create_best_available_hold(
+                session,
+                user_id=user_id,
+                showtime_id=payload.showtime_id,
+                party_size=payload.party_size,
+                seat_type=payload.seat_type,
+                hold_minutes=settings.reservation_hold_minutes,
+            )
+        else:
             reservation = await reservation_service.create_hold(
                 session,
                 user_id=user_id,
                 showtime_id=payload.showtime_id,
-                seat_ids=payload.seat_ids,
+                seat_ids=payload.seat_ids or [],
                 hold_minutes=settings.reservation_hold_minutes,
             )
+        return await _get_reservation_read(session, reservation.id, user_id)
+
+    return await run_transaction(session, hold_seats, operation="reservation_create")
+
+
+@router.post("", response_model=ReservationRead, status_code=status.HTTP_201_CREATED)
+async def create_reservation(
+    payload: ReservationCreate,
+    response: Response,
+    session: AsyncSession = Depends(get_db_session),
+    _: None = Depends(reservation_create_rate_limiter),
+    user_id: int = Depends(get_current_user_id),
+    waiting_room_token: str | None = Header(default=None, alias="x-waiting-room-token"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+) -> ReservationRead:
+    async def create() -> ReservationRead:
+        await waiting_room.require_admission(
+            payload.showtime_id,
+            waiting_room_token,
+            user_id=user_id,
+        )
+        increment_metric("reservation_attempt_total")
+        try:
+            reservation_read = await _create_hold(session, payload, user_id)
         except HTTPException as exc:
             if exc.status_code == status.HTTP_409_CONFLICT:
                 increment_metric("reservation_conflict_total")
             raise
-        reservation_read = await _get_reservation_read(session, reservation.id, user_id)
-    increment_metric("reservation_success_total")
-    return reservation_read
+        await availability_gate.record_hold(
+            reservation_read.showtime_id,
+            reservation_read.id,
+            reservation_read.seat_ids,
+            reservation_read.expires_at,
+        )
+        increment_metric("reservation_success_total")
+        return reservation_read
+
+    # A retried request replays the first response instead of 409ing against its own hold.
+    return await idempotency.run_once(
+        idempotency_key,
+        scope="reservations:create",
+        user_id=user_id,
+        request_payload=payload.model_dump(mode="json"),
+        response=response,
+        model=ReservationRead,
+        handler=create,
+    )
 
 
 @router.get("/active", response_model=ReservationRead | None)
@@ -87,8 +194,11 @@ async def get_active_reservation(
     session: AsyncSession = Depends(get_db_session),
     user_id: int = Depends(get_current_user_id),
 ) -> ReservationRead | None:
+    if hold_store.redis_holds_enabled():
+        hold = await hold_store.get_active_hold(user_id, showtime_id)
+        if hold is not None:
+            return _hold_read(hold)
     async with session.begin():
-        await reservation_service.expire_overdue_holds(session)
         active_reservation = (
             await session.execute(
                 select(Reservation)
@@ -96,6 +206,7 @@ async def get_active_reservation(
                     Reservation.user_id == user_id,
                     Reservation.showtime_id == showtime_id,
                     Reservation.status == "ACTIVE",
+                    Reservation.expires_at > datetime.now(tz=UTC),
                 )
                 .order_by(Reservation.created_at.desc())
                 .with_for_update()
@@ -112,20 +223,92 @@ async def get_reservation(
     session: AsyncSession = Depends(get_db_session),
     user_id: int = Depends(get_current_user_id),
 ) -> ReservationRead:
+    hold = await _get_user_hold(reservation_id, user_id)
+    if hold is not None:
+        return _hold_read(hold)
     async with session.begin():
-        await reservation_service.expire_overdue_holds(session)
+        await reservation_service.expire_holds(session, [reservation_id])
         reservation_read = await _get_reservation_read(session, reservation_id, user_id)
     return reservation_read
 
 
+@router.patch("/{reservation_id}", response_model=ReservationRead)
+async def update_reservation(
+    reservation_id: int,
+    payload: ReservationUpdate,
+    session: AsyncSession = Depends(get_db_session),
+    user_id: int = Depends(get_current_user_id),
+) -> ReservationRead:
+    hold = await _get_user_hold(reservation_id, user_id)
+    if hold is not None:
+        async with session.begin():
+            hold = await reservation_service.modify_redis_hold(
+                session,
+                hold=hold,
+                add_seat_ids=payload.add_seat_ids,
+                remove_seat_ids=payload.remove_seat_ids,
+            )
+        reservation_read = _hold_read(hold)
+        await _record_seat_change(reservation_read, payload.remove_seat_ids)
+        return reservation_read
+
+    async def change_seats() -> ReservationRead:
+        reservation = (
+            await session.execute(
+                select(Reservation)
+                .where(Reservation.id == reservation_id, Reservation.user_id == user_id)
+                .with_for_update()
+            )
+        ).scalar_one_or_none()
+        if reservation is None:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        await reservation_service.modify_hold(
+            session,
+            reservation=reservation,
+            add_seat_ids=payload.add_seat_ids,
+            remove_seat_ids=payload.remove_seat_ids,
+        )
+        return await _get_reservation_read(session, reservation.id, user_id)
+
+    reservation_read = await run_transaction(
+        session,
+        change_seats,
+        operation="reservation_update",
+    )
+    await _record_seat_change(reservation_read, payload.remove_seat_ids)
+    return reservation_read
+
+
+async def _record_seat_change(
+    reservation_read: ReservationRead,
+    remove_seat_ids: list[int],
+) -> None:
+    await availability_gate.record_hold(
+        reservation_read.showtime_id,
+        reservation_read.id,
+        reservation_read.seat_ids,
+        reservation_read.expires_at,
+    )
+    await availability_gate.record_release(
+        reservation_read.showtime_id,
+        reservation_read.id,
+        sorted(set(remove_seat_ids).difference(reservation_read.seat_ids)),
+    )
+
+
 @router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_reservation(
     reservation_id: int,
     session: AsyncSession = Depends(get_db_session),
     user_id: int = Depends(get_current_user_id),
 ) -> Response:
-    async with session.begin():
-        await reservation_service.expire_overdue_holds(session)
+    hold = await _get_user_hold(reservation_id, user_id)
+    if hold is not None:
+        await hold_store.release_hold(hold)
+        await availability_gate.record_release(hold.showtime_id, reservation_id, hold.seat_ids)
+
+    async def release() -> tuple[int, list[int]] | None:
+        await reservation_service.expire_holds(session, [reservation_id])
         reservation = (
             await session.execute(
                 select(Reservation)
@@ -134,6 +317,17 @@ async def delete_reservation(
             )
         ).scalar_one_or_none()
         if reservation is None:
+            # Redis holds only reach Postgres at checkout.
+            if hold is not None:
+                return None
             raise HTTPException(status_code=404, detail="Reservation not found")
-        await reservation_service.release_hold(session, reservation=reservation)
+        released_seat_ids = await reservation_service.release_hold(
+            session,
+            reservation=reservation,
+        )
+        return reservation.showtime_id, released_seat_ids
+
+    released = await run_transaction(session, release, operation="reservation_release")
+    if released is not None:
+        await availability_gate.record_release(released[0], reservation_id, released[1])
     return Response(status_code=status.HTTP_204_NO_CONTENT)
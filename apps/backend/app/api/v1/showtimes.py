@@ -1,19 +1,26 @@
 from datetime import UTC, date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import get_current_user_id
 from app.core.cache import get_cache_json, set_cache_json
+from app.core.config import settings
 from app.db.session import get_db_session
 from app.models.reservation import ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
 from app.models.showtime import Auditorium, Seat, SeatMap, Showtime, Theater
 from app.schemas.catalog import (
     ShowtimeListResponse,
     ShowtimeRead,
     ShowtimeSeatMapResponse,
     ShowtimeSeatRead,
+    WaitingRoomRead,
 )
+from app.services import hold_store, waiting_room
+from app.services.sales_rollup_service import SHOWTIME_SEAT_COUNT_COLUMNS
+from app.services.waiting_room import WaitingRoomStatus
 
 router = APIRouter()
 
@@ -65,9 +72,11 @@ async def list_showtimes(
             Showtime.starts_at,
             Showtime.ends_at,
             Showtime.status,
+            *SHOWTIME_SEAT_COUNT_COLUMNS,
         )
         .join(Auditorium, Auditorium.id == Showtime.auditorium_id)
         .join(Theater, Theater.id == Auditorium.theater_id)
+        .outerjoin(ShowtimeSalesRollup, ShowtimeSalesRollup.showtime_id == Showtime.id)
     )
 
     if filters:
@@ -95,7 +104,9 @@ async def list_showtimes(
 async def get_showtime_seats(
     showtime_id: int,
     session: AsyncSession = Depends(get_db_session),
+    waiting_room_token: str | None = Header(default=None, alias="x-waiting-room-token"),
 ) -> ShowtimeSeatMapResponse:
+    await waiting_room.require_admission(showtime_id, waiting_room_token)
     showtime_stmt = (
         select(
             Showtime.id,
@@ -136,6 +147,12 @@ async def get_showtime_seats(
         .order_by(Seat.row_label.asc(), Seat.seat_number.asc())
     )
     seat_rows = (await session.execute(seat_stmt)).mappings().all()
+    seats = [ShowtimeSeatRead.model_validate(row) for row in seat_rows]
+    if hold_store.redis_holds_enabled():
+        held_seat_ids = await hold_store.held_seat_ids(showtime_id)
+        for seat in seats:
+            if seat.status == "AVAILABLE" and seat.seat_id in held_seat_ids:
+                seat.status = "HELD"
 
     return ShowtimeSeatMapResponse(
         showtime_id=showtime_row["id"],
@@ -146,5 +163,35 @@ async def get_showtime_seats(
         starts_at=showtime_row["starts_at"],
         seatmap_name=showtime_row["seatmap_name"],
         layout_json=showtime_row["layout_json"] or {},
-        seats=[ShowtimeSeatRead.model_validate(row) for row in seat_rows],
+        seats=seats,
     )
+
+
+def _waiting_room_read(room_status: WaitingRoomStatus) -> WaitingRoomRead:
+    return WaitingRoomRead(
+        token=room_status.token,
+        showtime_id=room_status.showtime_id,
+        status=room_status.status,
+        position=room_status.position,
+        admitted_until=room_status.admitted_until,
+        poll_after_seconds=settings.waiting_room_poll_seconds,
+    )
+
+
+@router.post("/{showtime_id}/waiting-room", response_model=WaitingRoomRead)
+async def join_waiting_room(
+    showtime_id: int,
+    user_id: int = Depends(get_current_user_id),
+) -> WaitingRoomRead:
+    return _waiting_room_read(await waiting_room.join_room(showtime_id, user_id))
+
+
+@router.get("/{showtime_id}/waiting-room/{token}", response_model=WaitingRoomRead)
+async def poll_waiting_room(showtime_id: int, token: str) -> WaitingRoomRead:
+    return _waiting_room_read(await waiting_room.poll_room(showtime_id, token))
+
+
+@router.delete("/{showtime_id}/waiting-room/{token}", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_waiting_room(showtime_id: int, token: str) -> Response:
+    await waiting_room.leave_room(showtime_id, token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
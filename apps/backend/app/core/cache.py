@@ -50,6 +50,49 @@ async def set_cache_json(key: str, payload: dict, ttl_seconds: int | None = None
         await client.aclose()
 
 
+async def get_cache_json_many(keys: list[str]) -> list[dict | None]:
+    if not settings.cache_enabled or not keys:
+        return [None] * len(keys)
+
+    client = _build_client()
+    try:
+        payloads = await client.mget(keys)
+    except Exception:
+        logger.warning("cache_mget_failed", extra={"cache_key_count": len(keys)})
+        return [None] * len(keys)
+    finally:
+        await client.aclose()
+
+    decoded: list[dict | None] = []
+    for key, payload in zip(keys, payloads, strict=True):
+        if payload is None:
+            decoded.append(None)
+            continue
+        try:
+            decoded.append(json.loads(payload))
+        except JSONDecodeError:
+            logger.warning("cache_payload_decode_failed", extra={"cache_key": key})
+            decoded.append(None)
+    return decoded
+
+
+async def set_cache_json_many(items: dict[str, dict], ttl_seconds: int | None = None) -> None:
+    if not settings.cache_enabled or not items:
+        return
+
+    ttl = ttl_seconds if ttl_seconds is not None else settings.cache_ttl_seconds
+    client = _build_client()
+    try:
+        async with client.pipeline(transaction=False) as pipeline:
+            for key, payload in items.items():
+                pipeline.set(key, json.dumps(payload), ex=ttl)
+            await pipeline.execute()
+    except Exception:
+        logger.warning("cache_set_many_failed", extra={"cache_key_count": len(items)})
+    finally:
+        await client.aclose()
+
+
 async def delete_cache_prefix(prefix: str) -> None:
     if not settings.cache_enabled:
         return
@@ -17,11 +17,26 @@ class Settings(BaseSettings):
     jwt_refresh_token_minutes: int = 60 * 24 * 14
     auth_max_active_sessions: int = 8
     reservation_hold_minutes: int = 8
+    reservation_hold_backend: str = "database"
+    redis_hold_reconcile_seconds: int = 60
     bootstrap_demo_data: bool = True
+    startup_profile: bool = False
+    waiting_room_default_active_shoppers: int = 200
+    waiting_room_admission_seconds: int = 600
+    waiting_room_abandon_seconds: int = 60
+    waiting_room_poll_seconds: int = 5
     cors_allow_origins: str = "http://localhost:5173,http://127.0.0.1:5173"
     cache_enabled: bool = True
     cache_ttl_seconds: int = 60
-    reservation_expiry_sweep_seconds: int = 30
+    reservation_expiry_sweep_seconds: int = 300
+    reservation_expiry_batch_size: int = 200
+    reservation_expiry_poll_seconds: float = 1.0
+    reservation_gate_enabled: bool = True
+    reservation_gate_ttl_seconds: int = 60
+    idempotency_key_ttl_seconds: int = 86400
+    db_retry_attempts: int = 4
+    db_retry_base_delay_ms: int = 20
+    db_retry_max_delay_ms: int = 500
     stripe_secret_key: str = ""
     stripe_publishable_key: str = ""
     stripe_webhook_signing_secret: str = ""
@@ -47,6 +62,20 @@ class Settings(BaseSettings):
     recommendation_save_for_later_boost: float = 0.2
     recommendation_rebuild_hour_utc: int = 3
     recommendation_rebuild_minute_utc: int = 30
+    recommendation_candidate_pool_size: int = 200
+    recommendation_candidate_max_age_seconds: int = 60 * 60 * 6
+    recommendation_candidate_refresh_seconds: int = 60 * 60
+    recommendation_active_user_days: int = 30
+    recommendation_pool_refresh_seconds: int = 60
+    recommendation_pool_ttl_seconds: int = 300
+    recommendation_event_flush_seconds: int = 5
+    recommendation_event_flush_batch_size: int = 500
+    recommendation_event_flush_max_batches: int = 20
+    recommendation_event_stream_maxlen: int = 100000
+    recommendation_variant_refresh_seconds: int = 30
+    recommendation_assignment_salt: str = "reco-assignment-v1"
+    sales_rollup_reconcile_seconds: int = 3600
+    report_closed_bucket_ttl_seconds: int = 60 * 60 * 24 * 30
 
 
 @lru_cache
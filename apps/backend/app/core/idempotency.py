@@ -0,0 +1,149 @@
+"""``Idempotency-Key`` support for POST endpoints that create something.
+
+The first request with a key claims it in Redis, runs, and stores its response for
+``IDEMPOTENCY_KEY_TTL_SECONDS``; duplicates with the same key and body replay that
+response without running the handler, so client retries never repeat database work.
+Keys are scoped per endpoint and user. Only successful responses are stored: a failed
+request frees its key so the client can retry it. If Redis is unavailable the handler
+simply runs, as the rate limiter fails open.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.metrics import increment_metric
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+MAX_KEY_LENGTH = 255
+# A claimed key expires on its own if the process dies before storing the response.
+PENDING_TTL_SECONDS = 60
+
+# Sets ARGV[1] if the key is free and returns nil; otherwise returns the stored value.
+_CLAIM_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current then
+  return current
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return nil
+"""
+
+# Deletes the key only if it still holds the caller's pending claim.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _build_client() -> Redis:
+    return Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+
+
+def _fingerprint(request_payload: dict) -> str:
+    encoded = json.dumps(request_payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+async def _claim(key: str, pending: str) -> str | None | bool:
+    """Returns the stored value, None once claimed, or False when Redis is unavailable."""
+    client = _build_client()
+    try:
+        return await client.register_script(_CLAIM_SCRIPT)(
+            keys=[key],
+            args=[pending, PENDING_TTL_SECONDS],
+        )
+    except Exception:
+        logger.warning("idempotency_claim_failed", extra={"idempotency_key": key})
+        return False
+    finally:
+        await client.aclose()
+
+
+async def _finish(key: str, pending: str, stored: str | None) -> None:
+    client = _build_client()
+    try:
+        if stored is None:
+            await client.register_script(_RELEASE_SCRIPT)(keys=[key], args=[pending])
+        else:
+            await client.set(key, stored, ex=settings.idempotency_key_ttl_seconds)
+    except Exception:
+        logger.warning("idempotency_store_failed", extra={"idempotency_key": key})
+    finally:
+        await client.aclose()
+
+
+async def run_once(
+    idempotency_key: str | None,
+    *,
+    scope: str,
+    user_id: int,
+    request_payload: dict,
+    response: Response,
+    model: type[ModelT],
+    handler: Callable[[], Awaitable[ModelT]],
+) -> ModelT:
+    """Run ``handler`` once per key, replaying its stored response for duplicates.
+
+    A key reused with a different body is rejected with ``422``, and a duplicate that
+    arrives while the first request is still running gets ``409``.
+    """
+    if idempotency_key is None:
+        return await handler()
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+        )
+
+    key = f"idempotency:{scope}:{user_id}:{idempotency_key}"
+    fingerprint = _fingerprint(request_payload)
+    pending = json.dumps({"fingerprint": fingerprint, "state": "pending"})
+    current = await _claim(key, pending)
+    if current is False:
+        return await handler()
+    if current is not None:
+        stored = json.loads(current)
+        if stored["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        if stored["state"] != "completed":
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        increment_metric("idempotency_replay_total", labels={"scope": scope})
+        response.headers["Idempotent-Replayed"] = "true"
+        return model.model_validate(stored["response"])
+
+    try:
+        result = await handler()
+    except Exception:
+        await _finish(key, pending, None)
+        raise
+    await _finish(
+        key,
+        pending,
+        json.dumps(
+            {
+                "fingerprint": fingerprint,
+                "state": "completed",
+                "response": result.model_dump(mode="json"),
+            }
+        ),
+    )
+    return result
@@ -6,6 +6,9 @@ METRIC_DEFINITIONS: dict[str, str] = {
     "reservation_attempt_total": "Reservation create attempts.",
     "reservation_success_total": "Successful reservation holds created.",
     "reservation_conflict_total": "Reservation attempts rejected due to seat conflicts.",
+    "reservation_gate_rejected_total": (
+        "Reservation attempts rejected by the Redis availability gate before Postgres."
+    ),
     "auth_login_success_total": "Successful auth login attempts.",
     "auth_login_failure_total": "Failed auth login attempts.",
     "auth_refresh_success_total": "Successful refresh token exchanges.",
@@ -27,28 +30,121 @@ METRIC_DEFINITIONS: dict[str, str] = {
 }
 
 
+LABELED_METRIC_DEFINITIONS: dict[str, str] = {
+    "recommendation_variant_assigned_total": "Recommendation responses served per ranker variant.",
+    "idempotency_replay_total": "Responses replayed for a repeated Idempotency-Key, per endpoint.",
+    "db_transaction_retry_total": (
+        "Transactions retried after a deadlock or serialization failure, per operation."
+    ),
+    "db_transaction_retry_exhausted_total": (
+        "Transactions that still failed after the last retry, per operation."
+    ),
+}
+
+HISTOGRAM_DEFINITIONS: dict[str, str] = {
+    "recommendation_ranking_duration_seconds": (
+        "Time spent ranking recommendations on a cache miss, per ranker variant."
+    ),
+}
+HISTOGRAM_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+def _label_set(labels: dict[str, str]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_set: LabelSet, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [*label_set, *extra]
+    if not pairs:
+        return ""
+    rendered = ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in pairs)
+    return "{" + rendered + "}"
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.bucket_counts = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        for index, upper_bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= upper_bound:
+                self.bucket_counts[index] += 1
+
+
 class _MetricsStore:
     def __init__(self) -> None:
         self._lock = Lock()
         self._counters: defaultdict[str, int] = defaultdict(int)
+        self._labeled_counters: defaultdict[str, defaultdict[LabelSet, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._histograms: defaultdict[str, dict[LabelSet, _Histogram]] = defaultdict(dict)
 
     def increment(self, metric_name: str, value: int = 1) -> None:
         with self._lock:
             self._counters[metric_name] += value
 
+    def increment_labeled(self, metric_name: str, label_set: LabelSet, value: int = 1) -> None:
+        with self._lock:
+            self._labeled_counters[metric_name][label_set] += value
+
+    def observe(self, metric_name: str, label_set: LabelSet, value: float) -> None:
+        with self._lock:
+            histogram = self._histograms[metric_name].get(label_set)
+            if histogram is None:
+                histogram = self._histograms[metric_name][label_set] = _Histogram()
+            histogram.observe(value)
+
     def snapshot(self) -> dict[str, int]:
         with self._lock:
             return dict(self._counters)
 
+    def labeled_snapshot(self) -> dict[str, dict[LabelSet, int]]:
+        with self._lock:
+            return {name: dict(series) for name, series in self._labeled_counters.items()}
+
+    def histogram_snapshot(self) -> dict[str, dict[LabelSet, tuple[list[int], int, float]]]:
+        with self._lock:
+            return {
+                name: {
+                    label_set: (list(histogram.bucket_counts), histogram.count, histogram.total)
+                    for label_set, histogram in series.items()
+                }
+                for name, series in self._histograms.items()
+            }
+
 
 _metrics_store = _MetricsStore()
 
 
-def increment_metric(metric_name: str, value: int = 1) -> None:
+def increment_metric(
+    metric_name: str,
+    value: int = 1,
+    labels: dict[str, str] | None = None,
+) -> None:
+    if labels:
+        _metrics_store.increment_labeled(metric_name, _label_set(labels), value)
+        return
     _metrics_store.increment(metric_name, value)
 
 
-def get_metric_value(metric_name: str) -> int:
+def observe_metric(metric_name: str, value: float, labels: dict[str, str] | None = None) -> None:
+    _metrics_store.observe(metric_name, _label_set(labels or {}), value)
+
+
+def get_metric_value(metric_name: str, labels: dict[str, str] | None = None) -> int:
+    if labels:
+        return _metrics_store.labeled_snapshot().get(metric_name, {}).get(_label_set(labels), 0)
     return _metrics_store.snapshot().get(metric_name, 0)
 
 
@@ -58,6 +154,8 @@ def get_metrics_snapshot() -> dict[str, int]:
 
 def render_prometheus_metrics() -> str:
     snapshot = _metrics_store.snapshot()
+    labeled_snapshot = _metrics_store.labeled_snapshot()
+    histogram_snapshot = _metrics_store.histogram_snapshot()
     lines: list[str] = []
     metric_names = sorted(set(METRIC_DEFINITIONS).union(snapshot))
     for metric_name in metric_names:
@@ -66,4 +164,26 @@ def render_prometheus_metrics() -> str:
         lines.append(f"# HELP {metric_name} {help_text}")
         lines.append(f"# TYPE {metric_name} counter")
         lines.append(f"{metric_name} {metric_value}")
+
+    for metric_name in sorted(set(LABELED_METRIC_DEFINITIONS).union(labeled_snapshot)):
+        help_text = LABELED_METRIC_DEFINITIONS.get(metric_name, "Application metric.")
+        lines.append(f"# HELP {metric_name} {help_text}")
+        lines.append(f"# TYPE {metric_name} counter")
+        for label_set, metric_value in sorted(labeled_snapshot.get(metric_name, {}).items()):
+            lines.append(f"{metric_name}{_format_labels(label_set)} {metric_value}")
+
+    for metric_name in sorted(set(HISTOGRAM_DEFINITIONS).union(histogram_snapshot)):
+        help_text = HISTOGRAM_DEFINITIONS.get(metric_name, "Application metric.")
+        lines.append(f"# HELP {metric_name} {help_text}")
+        lines.append(f"# TYPE {metric_name} histogram")
+        for label_set, (bucket_counts, count, total) in sorted(
+            histogram_snapshot.get(metric_name, {}).items()
+        ):
+            for upper_bound, bucket_count in zip(HISTOGRAM_BUCKETS, bucket_counts, strict=True):
+                bucket_labels = _format_labels(label_set, (("le", str(upper_bound)),))
+                lines.append(f"{metric_name}_bucket{bucket_labels} {bucket_count}")
+            inf_labels = _format_labels(label_set, (("le", "+Inf"),))
+            lines.append(f"{metric_name}_bucket{inf_labels} {count}")
+            lines.append(f"{metric_name}_sum{_format_labels(label_set)} {total}")
+            lines.append(f"{metric_name}_count{_format_labels(label_set)} {count}")
     return "\n".join(lines) + "\n"
@@ -0,0 +1,44 @@
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import perf_counter
+
+from app import IMPORT_STARTED_AT
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """Wall-clock timings of named startup phases, logged once when profiling is enabled."""
+
+    def __init__(self) -> None:
+        self.phases_ms: dict[str, float] = {}
+
+    def record(self, name: str, started_at: float) -> None:
+        self.phases_ms[name] = round((perf_counter() - started_at) * 1000, 2)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started_at = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started_at)
+
+    def record_imports(self) -> None:
+        self.record("imports", IMPORT_STARTED_AT)
+
+    def emit(self) -> None:
+        if not settings.startup_profile:
+            return
+        logger.info(
+            "startup_profile",
+            extra={
+                "phases_ms": dict(self.phases_ms),
+                "since_import_ms": round((perf_counter() - IMPORT_STARTED_AT) * 1000, 2),
+            },
+        )
+
+
+startup_profile = StartupProfile()
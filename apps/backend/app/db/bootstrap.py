@@ -1,55 +1,62 @@
+import hashlib
 from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import func, select
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import app.models  # noqa: F401  (the fingerprint needs every table)
 from app.core.config import settings
 from app.core.security import hash_password, verify_password
+from app.core.startup_profile import startup_profile
 from app.db.base import Base
-from app.db.session import AsyncSessionLocal, engine
+from app.db.session import AsyncSessionLocal
+from app.models.bootstrap_state import BootstrapState
 from app.models.movie import Movie
-from app.models.showtime import Auditorium, Showtime, Theater
+from app.models.recommendation import MovieSimilarity
+from app.models.reservation import ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
+from app.models.showtime import Auditorium, Seat, Showtime, Theater
 from app.models.user import User
 from app.services.movie_similarity_service import rebuild_movie_similarity
+from app.services.sales_rollup_service import recompute_sales_rollups
 from app.services.seat_inventory import (
     ensure_auditorium_seat_inventory,
-    sync_showtime_seat_statuses,
+    provision_showtime_seat_statuses,
 )
 
 DEMO_ADMIN_EMAIL = "demo@bigapplecinemas.local"
 DEMO_ADMIN_PASSWORD = "DemoAdmin123!"
+BOOTSTRAP_STATE_KEY = "local-demo"
+# Bump when the seeded demo data changes so warm databases are re-seeded once.
+BOOTSTRAP_DATA_VERSION = 1
 
 
-async def _ensure_upcoming_showtimes(
-    session: AsyncSession,
-    *,
-    auditorium_id: int,
-    movies: list[Movie],
-) -> None:
+async def _ensure_upcoming_showtimes(session: AsyncSession, *, auditorium_id: int) -> None:
     """Keep local demo data fresh by guaranteeing at least one upcoming showtime per movie."""
     now = datetime.now(tz=UTC).replace(minute=0, second=0, microsecond=0)
-    for index, movie in enumerate(movies):
-        has_upcoming = (
-            await session.execute(
-                select(Showtime.id).where(
-                    Showtime.movie_id == movie.id,
-                    Showtime.starts_at >= now,
-                ).limit(1)
-            )
-        ).scalar_one_or_none()
-        if has_upcoming is not None:
-            continue
+    has_upcoming = exists().where(Showtime.movie_id == Movie.id, Showtime.starts_at >= now)
+    movies = (
+        await session.execute(
+            select(Movie.id, Movie.runtime_minutes).where(~has_upcoming).order_by(Movie.id.asc())
+        )
+    ).all()
+    if not movies:
+        return
 
+    rows = []
+    for index, (movie_id, runtime_minutes) in enumerate(movies):
         starts_at = now + timedelta(hours=(index + 1) * 2)
-        session.add(
-            Showtime(
-                movie_id=movie.id,
-                auditorium_id=auditorium_id,
-                starts_at=starts_at,
-                ends_at=starts_at + timedelta(minutes=movie.runtime_minutes + 20),
-                status="SCHEDULED",
-            )
+        rows.append(
+            {
+                "movie_id": movie_id,
+                "auditorium_id": auditorium_id,
+                "starts_at": starts_at,
+                "ends_at": starts_at + timedelta(minutes=runtime_minutes + 20),
+                "status": "SCHEDULED",
+            }
         )
+    await session.execute(insert(Showtime), rows)
 
 
 async def _normalize_legacy_movies(session: AsyncSession) -> None:
@@ -70,11 +77,81 @@ async def _normalize_legacy_movies(session: AsyncSession) -> None:
         movie.metadata_json = {"genre": ["Thriller", "Mystery"]}
 
 
-async def bootstrap_local_data() -> None:
-    """Create tables and seed demo catalog + seat inventory for local development."""
-    async with engine.begin() as connection:
-        await connection.run_sync(Base.metadata.create_all)
+def bootstrap_fingerprint() -> str:
+    """Hash the mapped schema and seed data version that a bootstrapped database reflects."""
+    parts = [f"data:{BOOTSTRAP_DATA_VERSION}"]
+    for table in Base.metadata.sorted_tables:
+        parts.append(f"table:{table.name}")
+        parts.extend(
+            f"column:{column.name}:{column.type!r}:{column.nullable}" for column in table.columns
+        )
+        parts.extend(sorted(f"index:{index.name}" for index in table.indexes))
+        parts.extend(
+            sorted(
+                f"constraint:{constraint.name}"
+                for constraint in table.constraints
+                if constraint.name
+            )
+        )
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
 
+async def _bootstrap_is_current(fingerprint: str) -> bool:
+    async with AsyncSessionLocal() as session:
+        state_table = (
+            await session.execute(select(func.to_regclass(BootstrapState.__tablename__)))
+        ).scalar_one_or_none()
+        if state_table is None:
+            return False
+        stored_fingerprint = (
+            await session.execute(
+                select(BootstrapState.fingerprint).where(
+                    BootstrapState.key == BOOTSTRAP_STATE_KEY
+                )
+            )
+        ).scalar_one_or_none()
+        if stored_fingerprint != fingerprint:
+            return False
+
+        # Demo showtimes age out, so a matching fingerprint alone does not mean the data
+        # is still usable.
+        now = datetime.now(tz=UTC)
+        has_upcoming = exists().where(Showtime.movie_id == Movie.id, Showtime.starts_at >= now)
+        movie_without_upcoming = (
+            await session.execute(select(Movie.id).where(~has_upcoming).limit(1))
+        ).scalar_one_or_none()
+        demo_admin = (
+            await session.execute(
+                select(User.id).where(User.email == DEMO_ADMIN_EMAIL, User.role == "ADMIN")
+            )
+        ).scalar_one_or_none()
+        return movie_without_upcoming is None and demo_admin is not None
+
+
+async def bootstrap_local_data() -> bool:
+    """Migrate the schema and seed demo catalog + seat inventory for local development.
+
+    Returns ``False`` when the database was already bootstrapped with the current
+    fingerprint and its demo data is still current; that check costs a few indexed
+    lookups instead of migrations, seeding and password hashing.
+    """
+    fingerprint = bootstrap_fingerprint()
+    with startup_profile.phase("bootstrap.fingerprint_check"):
+        if await _bootstrap_is_current(fingerprint):
+            return False
+
+    with startup_profile.phase("bootstrap.migrate"):
+        # Imported here so the fast path above never loads Alembic.
+        from app.db.migrations import run_migrations
+
+        await run_migrations()
+
+    with startup_profile.phase("bootstrap.seed"):
+        await _seed_local_data(fingerprint)
+    return True
+
+
+async def _seed_local_data(fingerprint: str) -> None:
     async with AsyncSessionLocal() as session:
         theater = (
             await session.execute(select(Theater).order_by(Theater.id.asc()))
@@ -139,15 +216,8 @@ async def bootstrap_local_data() -> None:
             session.add_all(seed_movies)
             await session.flush()
 
-        movies = (
-            await session.execute(select(Movie).order_by(Movie.id.asc()))
-        ).scalars().all()
         await _normalize_legacy_movies(session)
-        await _ensure_upcoming_showtimes(
-            session,
-            auditorium_id=auditorium.id,
-            movies=movies,
-        )
+        await _ensure_upcoming_showtimes(session, auditorium_id=auditorium.id)
 
         demo_user = (
             await session.execute(select(User).where(User.email == DEMO_ADMIN_EMAIL))
@@ -169,17 +239,54 @@ async def bootstrap_local_data() -> None:
             if not password_matches:
                 demo_user.password_hash = hash_password(DEMO_ADMIN_PASSWORD)
 
-        all_auditoriums = (await session.execute(select(Auditorium))).scalars().all()
-        for item in all_auditoriums:
+        # Only rows that are missing anything are touched, so a warm database costs a few
+        # existence queries instead of work proportional to the catalog.
+        auditoriums_without_seats = (
+            await session.execute(
+                select(Auditorium).where(~exists().where(Seat.auditorium_id == Auditorium.id))
+            )
+        ).scalars().all()
+        for item in auditoriums_without_seats:
             await ensure_auditorium_seat_inventory(session, item)
 
-        all_showtimes = (await session.execute(select(Showtime))).scalars().all()
-        for showtime in all_showtimes:
-            await sync_showtime_seat_statuses(session, showtime)
-
-        await rebuild_movie_similarity(
-            session,
-            top_k=settings.recommendation_similarity_top_k,
+        showtime_ids_without_rollups = list(
+            (
+                await session.execute(
+                    select(Showtime.id).where(
+                        ~exists().where(ShowtimeSalesRollup.showtime_id == Showtime.id)
+                    )
+                )
+            ).scalars()
         )
+        showtime_ids_without_statuses = list(
+            (
+                await session.execute(
+                    select(Showtime.id).where(
+                        ~exists().where(ShowtimeSeatStatus.showtime_id == Showtime.id)
+                    )
+                )
+            ).scalars()
+        )
+        await provision_showtime_seat_statuses(session, showtime_ids_without_statuses)
+        await recompute_sales_rollups(session, showtime_ids_without_rollups)
+
+        similarity_exists = (
+            await session.execute(select(MovieSimilarity.id).limit(1))
+        ).scalar_one_or_none()
+        if similarity_exists is None:
+            await rebuild_movie_similarity(
+                session,
+                top_k=settings.recommendation_similarity_top_k,
+            )
 
+        state_insert = insert(BootstrapState).values(
+            key=BOOTSTRAP_STATE_KEY,
+            fingerprint=fingerprint,
+        )
+        await session.execute(
+            state_insert.on_conflict_do_update(
+                index_elements=[BootstrapState.key],
+                set_={"fingerprint": state_insert.excluded.fingerprint, "completed_at": func.now()},
+            )
+        )
         await session.commit()
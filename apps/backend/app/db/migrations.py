@@ -0,0 +1,39 @@
+"""Run the Alembic migration chain from inside the app (local bootstrap, tests)."""
+
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.engine import Connection
+
+from app.db.session import engine
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+
+def alembic_config(connection: Connection | None = None) -> Config:
+    config = Config(str(BACKEND_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_ROOT / "alembic"))
+    # Keep the app's logging setup; env.py would otherwise load alembic.ini's.
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_to_head(connection: Connection) -> None:
+    """Upgrade the connected database to the latest revision.
+
+    Databases created by ``create_all`` before the migration chain existed have no
+    ``alembic_version`` and may lack tables added since; the baseline only creates what is
+    missing, so they run the whole chain like an empty database.
+    """
+    command.upgrade(alembic_config(connection), "head")
+
+
+async def run_migrations() -> None:
+    # Alembic owns the transactions: revisions that build indexes concurrently commit the
+    # work before them and run outside any transaction block.
+    async with engine.connect() as connection:
+        await connection.run_sync(upgrade_to_head)
+        await connection.commit()
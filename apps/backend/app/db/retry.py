@@ -0,0 +1,81 @@
+"""Retry transactions that Postgres aborted because of a deadlock or serialization failure.
+
+Both errors mean the transaction was rolled back and can safely run again. Attempts back
+off exponentially with full jitter so transactions that collided do not collide again in
+lockstep. Work passed in must be safe to re-run from the start.
+"""
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import increment_metric
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_SQLSTATES = {
+    "40001": "serialization_failure",
+    "40P01": "deadlock_detected",
+}
+
+
+def retryable_reason(exc: BaseException) -> str | None:
+    if not isinstance(exc, DBAPIError):
+        return None
+    return RETRYABLE_SQLSTATES.get(getattr(exc.orig, "sqlstate", None) or "")
+
+
+def retry_delay_seconds(attempt: int) -> float:
+    """Full-jitter backoff: uniform in [0, min(max, base * 2^(attempt - 1))]."""
+    ceiling_ms = min(
+        settings.db_retry_max_delay_ms,
+        settings.db_retry_base_delay_ms * 2 ** (attempt - 1),
+    )
+    return random.uniform(0, ceiling_ms) / 1000
+
+
+async def run_transaction(
+    session: AsyncSession,
+    work: Callable[[], Awaitable[T]],
+    *,
+    operation: str,
+) -> T:
+    """Run ``work`` inside ``session.begin()``, retrying deadlocks and serialization failures.
+
+    When every attempt fails the caller gets a ``503`` with ``Retry-After`` instead of an
+    unhandled database error.
+    """
+    attempts = max(1, settings.db_retry_attempts)
+    attempt = 1
+    while True:
+        try:
+            async with session.begin():
+                return await work()
+        except DBAPIError as exc:
+            reason = retryable_reason(exc)
+            if reason is None:
+                raise
+            labels = {"operation": operation, "reason": reason}
+            if attempt >= attempts:
+                increment_metric("db_transaction_retry_exhausted_total", labels=labels)
+                logger.warning(
+                    "db_transaction_retry_exhausted",
+                    extra={"operation": operation, "reason": reason, "attempts": attempts},
+                )
+                raise HTTPException(
+                    status_code=503,
+                    detail="The booking system is busy; please retry",
+                    headers={"Retry-After": "1"},
+                ) from exc
+            increment_metric("db_transaction_retry_total", labels=labels)
+            await asyncio.sleep(retry_delay_seconds(attempt))
+            attempt += 1
@@ -11,6 +11,7 @@ from app.api.router import api_router
 from app.core.config import settings
 from app.core.logging import configure_logging
 from app.core.metrics import increment_metric, render_prometheus_metrics
+from app.core.startup_profile import startup_profile
 from app.db.bootstrap import bootstrap_local_data
 
 configure_logging(debug=settings.debug)
@@ -19,8 +20,10 @@ request_logger = logging.getLogger("app.request")
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    if settings.environment == "local" and settings.bootstrap_demo_data:
-        await bootstrap_local_data()
+    with startup_profile.phase("lifespan"):
+        if settings.environment == "local" and settings.bootstrap_demo_data:
+            await bootstrap_local_data()
+    startup_profile.emit()
     yield
 
 
@@ -73,6 +76,7 @@ async def add_request_context(request: Request, call_next):  # type: ignore[no-u
     return response
 
 app.include_router(api_router, prefix="/api")
+startup_profile.record_imports()
 
 
 @app.get("/health", tags=["health"])
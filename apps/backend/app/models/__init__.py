@@ -1,23 +1,36 @@
 from app.models.auth_session import RefreshTokenSession
+from app.models.bootstrap_state import BootstrapState
 from app.models.movie import Movie
 from app.models.order import Order, Ticket
-from app.models.recommendation import MovieSimilarity, UserMovieEvent
+from app.models.recommendation import (
+    MovieSimilarity,
+    RecommendationEvent,
+    RecommendationVariant,
+    UserMovieEvent,
+    UserRecommendationCandidate,
+)
 from app.models.reservation import Reservation, ReservationSeat, ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
 from app.models.showtime import Auditorium, Seat, SeatMap, Showtime, Theater
 from app.models.user import User
 
 __all__ = [
     "Auditorium",
+    "BootstrapState",
     "Movie",
     "RefreshTokenSession",
     "Order",
     "MovieSimilarity",
+    "RecommendationEvent",
+    "RecommendationVariant",
     "UserMovieEvent",
+    "UserRecommendationCandidate",
     "Reservation",
     "ReservationSeat",
     "Seat",
     "SeatMap",
     "Showtime",
+    "ShowtimeSalesRollup",
     "ShowtimeSeatStatus",
     "Theater",
     "Ticket",
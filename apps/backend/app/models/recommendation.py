@@ -1,6 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -37,3 +46,58 @@ class UserMovieEvent(Base):
     movie_id: Mapped[int] = mapped_column(ForeignKey("movies.id"), nullable=False, index=True)
     event_type: Mapped[str] = mapped_column(String(30), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class RecommendationEvent(Base):
+    __tablename__ = "recommendation_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    movie_id: Mapped[int] = mapped_column(ForeignKey("movies.id"), nullable=False, index=True)
+    event_type: Mapped[str] = mapped_column(String(30), nullable=False, index=True)
+    variant: Mapped[str] = mapped_column(String(20), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class RecommendationVariant(Base):
+    __tablename__ = "recommendation_variants"
+
+    name: Mapped[str] = mapped_column(String(20), primary_key=True)
+    traffic_weight: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    personalized_weight: Mapped[float] = mapped_column(Float, nullable=False)
+    popularity_weight: Mapped[float] = mapped_column(Float, nullable=False)
+    freshness_weight: Mapped[float] = mapped_column(Float, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+class UserRecommendationCandidate(Base):
+    __tablename__ = "user_recommendation_candidates"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "variant",
+            "movie_id",
+            name="uq_user_recommendation_candidate",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    variant: Mapped[str] = mapped_column(String(20), nullable=False)
+    movie_id: Mapped[int] = mapped_column(ForeignKey("movies.id"), nullable=False, index=True)
+    rank: Mapped[int] = mapped_column(Integer, nullable=False)
+    base_score: Mapped[float] = mapped_column(Float, nullable=False)
+    primary_genre: Mapped[str | None] = mapped_column(String(60), nullable=True)
+    source_movie_id: Mapped[int | None] = mapped_column(ForeignKey("movies.id"), nullable=True)
+    reason: Mapped[str] = mapped_column(String(255), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
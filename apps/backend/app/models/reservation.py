@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -8,16 +8,27 @@ from app.db.base import Base
 
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Expiry sweeps and lapsed-hold lookups only ever look at active holds.
+        Index(
+            "ix_reservations_active_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+        Index(
+            "ix_reservations_active_user_showtime",
+            "user_id",
+            "showtime_id",
+            "created_at",
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     showtime_id: Mapped[int] = mapped_column(ForeignKey("showtimes.id"), nullable=False, index=True)
-    status: Mapped[str] = mapped_column(String(30), default="ACTIVE", nullable=False, index=True)
-    expires_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True),
-        nullable=False,
-        index=True,
-    )
+    status: Mapped[str] = mapped_column(String(30), default="ACTIVE", nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -32,12 +43,25 @@ class ReservationSeat(Base):
 
 class ShowtimeSeatStatus(Base):
     __tablename__ = "showtime_seat_status"
-    __table_args__ = (UniqueConstraint("showtime_id", "seat_id", name="uq_showtime_seat"),)
+    __table_args__ = (
+        UniqueConstraint("showtime_id", "seat_id", name="uq_showtime_seat"),
+        Index(
+            "ix_showtime_seat_status_available",
+            "showtime_id",
+            "seat_id",
+            postgresql_where=text("status = 'AVAILABLE'"),
+        ),
+        Index(
+            "ix_showtime_seat_status_held_by",
+            "held_by_reservation_id",
+            postgresql_where=text("held_by_reservation_id IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    showtime_id: Mapped[int] = mapped_column(ForeignKey("showtimes.id"), nullable=False, index=True)
+    showtime_id: Mapped[int] = mapped_column(ForeignKey("showtimes.id"), nullable=False)
     seat_id: Mapped[int] = mapped_column(ForeignKey("seats.id"), nullable=False, index=True)
-    status: Mapped[str] = mapped_column(String(20), default="AVAILABLE", nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(20), default="AVAILABLE", nullable=False)
     held_by_reservation_id: Mapped[int | None] = mapped_column(
         ForeignKey("reservations.id"),
         nullable=True,
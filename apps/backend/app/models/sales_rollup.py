@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ShowtimeSalesRollup(Base):
+    __tablename__ = "showtime_sales_rollups"
+
+    showtime_id: Mapped[int] = mapped_column(ForeignKey("showtimes.id"), primary_key=True)
+    capacity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sold_seats: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    held_seats: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    active_holds: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    paid_orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue_cents: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
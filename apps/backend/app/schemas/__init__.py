@@ -15,14 +15,20 @@ from app.schemas.catalog import (
     MovieListItem,
     MovieListResponse,
     MovieUpdate,
+    ShowtimeBulkCreate,
+    ShowtimeBulkCreateResponse,
     ShowtimeCreate,
     ShowtimeListResponse,
     ShowtimeRead,
+    ShowtimeScheduleRule,
     ShowtimeUpdate,
     TheaterCreate,
     TheaterListResponse,
     TheaterRead,
     TheaterUpdate,
+    WaitingRoomConfig,
+    WaitingRoomConfigRead,
+    WaitingRoomRead,
 )
 from app.schemas.payment import (
     CheckoutDemoConfirmRequest,
@@ -36,6 +42,8 @@ from app.schemas.payment import (
 )
 from app.schemas.portal import (
     AdminSalesReportResponse,
+    AdminSalesTimeSeriesPoint,
+    AdminSalesTimeSeriesResponse,
     AdminShowtimeSalesItem,
     MovieRecommendationItem,
     MovieRecommendationResponse,
@@ -43,14 +51,19 @@ from app.schemas.portal import (
     MyOrderListResponse,
     MyTicketItem,
     MyTicketListResponse,
+    RecommendationEventBatchRead,
+    RecommendationEventBatchWrite,
     RecommendationEventRead,
     RecommendationEventWrite,
     RecommendationFeedbackRead,
     RecommendationFeedbackWrite,
+    RecommendationVariantListResponse,
+    RecommendationVariantRead,
+    RecommendationVariantWrite,
     TicketScanRequest,
     TicketScanResponse,
 )
-from app.schemas.reservation import ReservationCreate, ReservationRead
+from app.schemas.reservation import ReservationCreate, ReservationRead, ReservationUpdate
 
 __all__ = [
     "AuthLoginRequest",
@@ -73,6 +86,8 @@ __all__ = [
     "CheckoutSessionCreate",
     "CheckoutSessionRead",
     "AdminSalesReportResponse",
+    "AdminSalesTimeSeriesPoint",
+    "AdminSalesTimeSeriesResponse",
     "AdminShowtimeSalesItem",
     "MovieRecommendationItem",
     "MovieRecommendationResponse",
@@ -80,15 +95,24 @@ __all__ = [
     "MyOrderListResponse",
     "MyTicketItem",
     "MyTicketListResponse",
+    "RecommendationEventBatchRead",
+    "RecommendationEventBatchWrite",
     "RecommendationEventRead",
     "RecommendationEventWrite",
     "RecommendationFeedbackRead",
     "RecommendationFeedbackWrite",
+    "RecommendationVariantListResponse",
+    "RecommendationVariantRead",
+    "RecommendationVariantWrite",
     "ReservationCreate",
     "ReservationRead",
+    "ReservationUpdate",
+    "ShowtimeBulkCreate",
+    "ShowtimeBulkCreateResponse",
     "ShowtimeCreate",
     "ShowtimeListResponse",
     "ShowtimeRead",
+    "ShowtimeScheduleRule",
     "ShowtimeUpdate",
     "StripeWebhookAck",
     "StripeWebhookEvent",
@@ -99,4 +123,7 @@ __all__ = [
     "TicketScanRequest",
     "TicketScanResponse",
     "TicketRead",
+    "WaitingRoomConfig",
+    "WaitingRoomConfigRead",
+    "WaitingRoomRead",
 ]
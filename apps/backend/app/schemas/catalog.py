@@ -1,6 +1,6 @@
-from datetime import date, datetime
+from datetime import date, datetime, time
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class MovieListItem(BaseModel):
@@ -75,6 +75,9 @@ class ShowtimeRead(BaseModel):
     starts_at: datetime
     ends_at: datetime
     status: str
+    available_seats: int = 0
+    held_seats: int = 0
+    sold_seats: int = 0
 
 
 class ShowtimeListResponse(BaseModel):
@@ -105,6 +108,26 @@ class ShowtimeSeatMapResponse(BaseModel):
     seats: list[ShowtimeSeatRead]
 
 
+class WaitingRoomRead(BaseModel):
+    token: str
+    showtime_id: int
+    status: str
+    position: int | None
+    admitted_until: datetime | None
+    poll_after_seconds: int
+
+
+class WaitingRoomConfig(BaseModel):
+    enabled: bool
+    active_shoppers: int | None = Field(default=None, ge=1, le=100000)
+
+
+class WaitingRoomConfigRead(BaseModel):
+    showtime_id: int
+    enabled: bool
+    active_shoppers: int | None
+
+
 class MovieCreate(BaseModel):
     title: str = Field(min_length=1, max_length=255)
     description: str = ""
@@ -143,6 +166,7 @@ class AuditoriumCreate(BaseModel):
     theater_id: int = Field(ge=1)
     name: str = Field(min_length=1, max_length=100)
     seatmap_id: int | None = Field(default=None, ge=1)
+    layout_json: dict | None = None
 
 
 class ShowtimeCreate(BaseModel):
@@ -153,6 +177,34 @@ class ShowtimeCreate(BaseModel):
     status: str = Field(default="SCHEDULED", min_length=1, max_length=30)
 
 
+class ShowtimeScheduleRule(BaseModel):
+    movie_id: int = Field(ge=1)
+    auditorium_ids: list[int] = Field(min_length=1, max_length=50)
+    start_date: date
+    end_date: date
+    start_times: list[time] = Field(min_length=1, max_length=24)
+    weekdays: list[int] | None = Field(default=None, min_length=1, max_length=7)
+    duration_minutes: int | None = Field(default=None, ge=1, le=600)
+
+    @field_validator("weekdays")
+    @classmethod
+    def validate_weekdays(cls, value: list[int] | None) -> list[int] | None:
+        if value is not None and any(day < 0 or day > 6 for day in value):
+            raise ValueError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+        return value
+
+
+class ShowtimeBulkCreate(BaseModel):
+    showtimes: list[ShowtimeCreate] = Field(default_factory=list, max_length=5000)
+    rules: list[ShowtimeScheduleRule] = Field(default_factory=list, max_length=200)
+    turnover_minutes: int = Field(default=0, ge=0, le=240)
+
+
+class ShowtimeBulkCreateResponse(BaseModel):
+    created: int
+    showtime_ids: list[int]
+
+
 class ShowtimeUpdate(BaseModel):
     movie_id: int | None = Field(default=None, ge=1)
     auditorium_id: int | None = Field(default=None, ge=1)
@@ -1,6 +1,6 @@
 from datetime import date, datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TicketScanRequest(BaseModel):
@@ -100,6 +100,34 @@ class RecommendationEventRead(BaseModel):
     recorded: bool
 
 
+class RecommendationEventBatchWrite(BaseModel):
+    events: list[RecommendationEventWrite] = Field(min_length=1, max_length=100)
+
+
+class RecommendationEventBatchRead(BaseModel):
+    accepted: int
+
+
+class RecommendationVariantWrite(BaseModel):
+    traffic_weight: int = Field(ge=0, le=10000)
+    personalized_weight: float = Field(ge=0)
+    popularity_weight: float = Field(ge=0)
+    freshness_weight: float = Field(ge=0)
+    is_active: bool = True
+
+
+class RecommendationVariantRead(RecommendationVariantWrite):
+    model_config = ConfigDict(from_attributes=True)
+
+    name: str
+    updated_at: datetime | None = None
+
+
+class RecommendationVariantListResponse(BaseModel):
+    items: list[RecommendationVariantRead]
+    total: int
+
+
 class AdminShowtimeSalesItem(BaseModel):
     showtime_id: int
     movie_title: str
@@ -110,6 +138,26 @@ class AdminShowtimeSalesItem(BaseModel):
     occupancy_percent: float
 
 
+class AdminSalesTimeSeriesPoint(BaseModel):
+    bucket_start: datetime
+    closed: bool
+    group_id: int | None = None
+    group_name: str | None = None
+    showtimes: int
+    tickets_sold: int
+    revenue_cents: int
+    capacity: int
+    occupancy_percent: float
+
+
+class AdminSalesTimeSeriesResponse(BaseModel):
+    bucket: str
+    group_by: str
+    date_from: datetime
+    date_to: datetime
+    points: list[AdminSalesTimeSeriesPoint]
+
+
 class AdminSalesReportResponse(BaseModel):
     paid_orders: int
     gross_revenue_cents: int
@@ -1,11 +1,37 @@
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+MAX_PARTY_SIZE = 10
 
 
 class ReservationCreate(BaseModel):
     showtime_id: int = Field(ge=1)
-    seat_ids: list[int] = Field(min_length=1)
+    seat_ids: list[int] | None = Field(default=None, min_length=1)
+    # Best-available mode: the server picks the best adjacent block for the party.
+    party_size: int | None = Field(default=None, ge=1, le=MAX_PARTY_SIZE)
+    seat_type: str | None = Field(default=None, min_length=1, max_length=30)
+
+    @model_validator(mode="after")
+    def validate_selection_mode(self) -> "ReservationCreate":
+        if (self.seat_ids is None) == (self.party_size is None):
+            raise ValueError("Provide either seat_ids or party_size")
+        if self.seat_type is not None and self.party_size is None:
+            raise ValueError("seat_type applies only with party_size")
+        return self
+
+
+class ReservationUpdate(BaseModel):
+    add_seat_ids: list[int] = Field(default_factory=list)
+    remove_seat_ids: list[int] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def validate_delta(self) -> "ReservationUpdate":
+        if not self.add_seat_ids and not self.remove_seat_ids:
+            raise ValueError("Provide add_seat_ids or remove_seat_ids")
+        if set(self.add_seat_ids).intersection(self.remove_seat_ids):
+            raise ValueError("A seat cannot be both added and removed")
+        return self
 
 
 class ReservationRead(BaseModel):
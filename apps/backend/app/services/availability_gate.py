@@ -0,0 +1,251 @@
+"""Redis availability gate that rejects doomed hold requests before they reach Postgres.
+
+Each showtime has one hash with a ``capacity`` field and, per taken seat,
+``"<reservation_id>:<until_ms>"`` for a hold or ``"sold"``. As in the Redis hold store, a
+hold field whose time has passed counts as free, so expiry needs no write. The hash is
+built from Postgres on first use and expires after ``RESERVATION_GATE_TTL_SECONDS``, which
+also bounds how long it can drift. Holds are recorded after their transaction commits.
+
+The gate may only err towards letting a request through: Redis failures, a cold hash and
+missed updates all fall back to the row locks in ``create_hold``, which stay the source of
+truth. While a hash is being built, releases leave ``"<reservation_id>:0"`` behind and the
+snapshot only fills fields that are still missing, so a seat freed mid-build is not
+resurrected by the older snapshot.
+"""
+
+import logging
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import increment_metric
+from app.models.reservation import Reservation, ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
+
+logger = logging.getLogger(__name__)
+
+# Returns -1 while the hash is missing or still being built. Otherwise returns the
+# number of free seats followed by the requested seats (ARGV[3..]) that are taken; the
+# free count is only computed when ARGV[2] is '1' (best-available requests).
+_CHECK_SCRIPT = """
+local capacity = redis.call('HGET', KEYS[1], 'capacity')
+if not capacity then
+  return -1
+end
+local now = tonumber(ARGV[1])
+local function taken(value)
+  if not value then
+    return false
+  end
+  if value == 'sold' then
+    return true
+  end
+  local sep = string.find(value, ':', 1, true)
+  return tonumber(string.sub(value, sep + 1)) > now
+end
+local result = {tonumber(capacity)}
+if ARGV[2] == '1' then
+  local fields = redis.call('HGETALL', KEYS[1])
+  for i = 1, #fields, 2 do
+    if fields[i] ~= 'capacity' and taken(fields[i + 1]) then
+      result[1] = result[1] - 1
+    end
+  end
+end
+for i = 3, #ARGV do
+  if taken(redis.call('HGET', KEYS[1], ARGV[i])) then
+    table.insert(result, ARGV[i])
+  end
+end
+return result
+"""
+
+# Claims the build of a missing hash; the 'building' field keeps checks passing through.
+_START_BUILD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'building', '1')
+redis.call('PEXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+_FINISH_BUILD_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'building') ~= '1' then
+  return 0
+end
+for i = 2, #ARGV, 2 do
+  redis.call('HSETNX', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('HSET', KEYS[1], 'capacity', ARGV[1])
+redis.call('HDEL', KEYS[1], 'building')
+return 1
+"""
+
+# ARGV[1] is the new value; seats still owned by another reservation are left alone when
+# releasing (ARGV[2] is the reservation id prefix, empty when recording a hold).
+_RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return 0
+end
+local prefix = ARGV[2]
+for i = 3, #ARGV do
+  local current = redis.call('HGET', KEYS[1], ARGV[i])
+  if prefix == '' or not current or string.sub(current, 1, #prefix) == prefix then
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[1])
+  end
+end
+return 1
+"""
+
+
+def _build_client() -> Redis:
+    return Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+
+
+def _gate_key(showtime_id: int) -> str:
+    return f"availability:showtime:{showtime_id}"
+
+
+def _now_ms() -> int:
+    return int(datetime.now(tz=UTC).timestamp() * 1000)
+
+
+async def reject_unavailable(
+    session: AsyncSession,
+    *,
+    showtime_id: int,
+    seat_ids: list[int] | None = None,
+    party_size: int | None = None,
+) -> None:
+    """Raise the ``409`` that ``create_hold`` would, if the gate already knows it is doomed.
+
+    Only a cold gate touches Postgres, to build the showtime's hash once; the caller's
+    session must not have a transaction open.
+    """
+    if not settings.reservation_gate_enabled:
+        return
+    requested = sorted(set(seat_ids or []))
+    client = _build_client()
+    try:
+        result = await client.register_script(_CHECK_SCRIPT)(
+            keys=[_gate_key(showtime_id)],
+            args=[_now_ms(), "1" if party_size is not None else "0", *requested],
+        )
+        if result == -1:
+            await _build(client, session, showtime_id)
+            return
+    except Exception:
+        logger.warning("availability_gate_check_failed", extra={"showtime_id": showtime_id})
+        return
+    finally:
+        await client.aclose()
+
+    free_seats, *taken_seat_ids = result
+    if taken_seat_ids:
+        increment_metric("reservation_gate_rejected_total")
+        raise HTTPException(
+            status_code=409,
+            detail=f"One or more seats are no longer available: {','.join(taken_seat_ids)}",
+        )
+    if party_size is not None and free_seats < party_size:
+        increment_metric("reservation_gate_rejected_total")
+        raise HTTPException(
+            status_code=409,
+            detail=f"No block of {party_size} adjacent seats is available",
+        )
+
+
+async def _build(client: Redis, session: AsyncSession, showtime_id: int) -> None:
+    key = _gate_key(showtime_id)
+    started = await client.register_script(_START_BUILD_SCRIPT)(
+        keys=[key],
+        args=[settings.reservation_gate_ttl_seconds * 1000],
+    )
+    if not started:
+        return
+    try:
+        capacity, taken = await _load_taken_seats(session, showtime_id)
+    except Exception:
+        await client.delete(key)
+        raise
+    if capacity is None:
+        # Unknown showtime or no seats yet; let create_hold answer.
+        await client.delete(key)
+        return
+    fields: list[str | int] = []
+    for seat_id, seat_status, reservation_id, expires_at in taken:
+        if seat_status == "SOLD":
+            fields.extend([seat_id, "sold"])
+        elif reservation_id is not None:
+            fields.extend([seat_id, f"{reservation_id}:{int(expires_at.timestamp() * 1000)}"])
+    await client.register_script(_FINISH_BUILD_SCRIPT)(keys=[key], args=[capacity, *fields])
+
+
+async def _load_taken_seats(
+    session: AsyncSession,
+    showtime_id: int,
+) -> tuple[int | None, Sequence[Row]]:
+    async with session.begin():
+        capacity = (
+            await session.execute(
+                select(ShowtimeSalesRollup.capacity).where(
+                    ShowtimeSalesRollup.showtime_id == showtime_id
+                )
+            )
+        ).scalar_one_or_none()
+        taken = (
+            await session.execute(
+                select(
+                    ShowtimeSeatStatus.seat_id,
+                    ShowtimeSeatStatus.status,
+                    Reservation.id,
+                    Reservation.expires_at,
+                )
+                .outerjoin(
+                    Reservation,
+                    Reservation.id == ShowtimeSeatStatus.held_by_reservation_id,
+                )
+                .where(
+                    ShowtimeSeatStatus.showtime_id == showtime_id,
+                    ShowtimeSeatStatus.status != "AVAILABLE",
+                )
+            )
+        ).all()
+    return capacity, taken
+
+
+async def _record(showtime_id: int, value: str, owner_prefix: str, seat_ids: list[int]) -> None:
+    if not settings.reservation_gate_enabled or not seat_ids:
+        return
+    client = _build_client()
+    try:
+        await client.register_script(_RECORD_SCRIPT)(
+            keys=[_gate_key(showtime_id)],
+            args=[value, owner_prefix, *seat_ids],
+        )
+    except Exception:
+        logger.warning("availability_gate_record_failed", extra={"showtime_id": showtime_id})
+    finally:
+        await client.aclose()
+
+
+async def record_hold(
+    showtime_id: int,
+    reservation_id: int,
+    seat_ids: list[int],
+    expires_at: datetime,
+) -> None:
+    """Mark seats taken until ``expires_at``; call once the hold is committed."""
+    until_ms = int(expires_at.timestamp() * 1000)
+    await _record(showtime_id, f"{reservation_id}:{until_ms}", "", seat_ids)
+
+
+async def record_release(showtime_id: int, reservation_id: int, seat_ids: list[int]) -> None:
+    """Mark seats the reservation gave up as free, unless another hold has taken them."""
+    await _record(showtime_id, f"{reservation_id}:0", f"{reservation_id}:", seat_ids)
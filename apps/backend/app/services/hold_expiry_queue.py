@@ -0,0 +1,85 @@
+"""Redis sorted-set delay queue of reservation hold expiries.
+
+Each active database hold is added to ``QUEUE_KEY`` scored by its ``expires_at`` in epoch
+milliseconds. The expiry consumer pops members whose score has passed and expires exactly
+those reservations, so holds are released as they lapse without scanning the
+reservations table. The queue is best effort: scheduling fails open, and the
+``reservation.expire_overdue`` beat sweep remains as a backstop for anything it misses.
+"""
+
+import logging
+from datetime import UTC, datetime
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "reservations:expiry_queue"
+
+# Pops up to ARGV[2] members scored at or before ARGV[1] in one step, so concurrent
+# consumers never receive the same reservation.
+_POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+  redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+def _build_client() -> Redis:
+    return Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+
+
+def _to_ms(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+async def schedule_expiry(reservation_id: int, expires_at: datetime) -> None:
+    client = _build_client()
+    try:
+        await client.zadd(QUEUE_KEY, {str(reservation_id): _to_ms(expires_at)})
+    except Exception:
+        logger.warning("hold_expiry_schedule_failed", extra={"reservation_id": reservation_id})
+    finally:
+        await client.aclose()
+
+
+async def pop_due(limit: int) -> list[int]:
+    """Remove and return up to ``limit`` reservation ids whose expiry has passed."""
+    client = _build_client()
+    try:
+        due = await client.register_script(_POP_DUE_SCRIPT)(
+            keys=[QUEUE_KEY],
+            args=[_to_ms(datetime.now(tz=UTC)), limit],
+        )
+    finally:
+        await client.aclose()
+    return [int(reservation_id) for reservation_id in due]
+
+
+async def requeue(reservation_ids: list[int]) -> None:
+    """Put popped ids back as due now, e.g. when expiring them failed."""
+    now_ms = _to_ms(datetime.now(tz=UTC))
+    client = _build_client()
+    try:
+        await client.zadd(
+            QUEUE_KEY,
+            {str(reservation_id): now_ms for reservation_id in reservation_ids},
+        )
+    finally:
+        await client.aclose()
+
+
+async def seconds_until_next_due() -> float | None:
+    """Time until the earliest queued expiry (0 if already due), or None when empty."""
+    client = _build_client()
+    try:
+        head = await client.zrange(QUEUE_KEY, 0, 0, withscores=True)
+    finally:
+        await client.aclose()
+    if not head:
+        return None
+    return max(0.0, (head[0][1] - _to_ms(datetime.now(tz=UTC))) / 1000)
@@ -0,0 +1,315 @@
+"""Redis-resident seat holds, used when ``RESERVATION_HOLD_BACKEND=redis``.
+
+Each showtime has one hash mapping ``seat_id`` to ``"<reservation_id>:<expires_ms>"``;
+a field whose expiry has passed counts as free, so holds lapse without any write. Each
+hold also has a record hash (owner, seats, status) and a per-user pointer for the
+"active hold" lookup. Claims, releases and completions run as Lua scripts, so a
+multi-seat claim either takes every seat or none.
+"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+# Hold records outlive the hold so clients can still read an EXPIRED or CANCELED hold.
+HOLD_RECORD_GRACE_MS = 60 * 60 * 1000
+# Seats of a completed hold stay claimed while the SOLD rows commit in Postgres.
+COMPLETED_HANDOFF_MS = 5 * 60 * 1000
+
+_CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local expires = tonumber(ARGV[2])
+local grace = tonumber(ARGV[7])
+local conflicts = {}
+for i = 8, #ARGV do
+  local current = redis.call('HGET', KEYS[1], ARGV[i])
+  if current then
+    local sep = string.find(current, ':', 1, true)
+    if tonumber(string.sub(current, sep + 1)) > now
+        and string.sub(current, 1, sep - 1) ~= ARGV[3] then
+      table.insert(conflicts, ARGV[i])
+    end
+  end
+end
+if #conflicts > 0 then
+  return conflicts
+end
+local value = ARGV[3] .. ':' .. ARGV[2]
+local seats = {}
+for i = 8, #ARGV do
+  redis.call('HSET', KEYS[1], ARGV[i], value)
+  table.insert(seats, ARGV[i])
+end
+redis.call('HSET', KEYS[2], 'user_id', ARGV[4], 'showtime_id', ARGV[5],
+  'seat_ids', table.concat(seats, ','), 'expires_ms', ARGV[2], 'created_ms', ARGV[6],
+  'status', 'ACTIVE')
+redis.call('PEXPIRE', KEYS[2], expires - now + grace)
+redis.call('SET', KEYS[3], ARGV[3], 'PX', expires - now)
+if redis.call('PTTL', KEYS[1]) < expires - now + grace then
+  redis.call('PEXPIRE', KEYS[1], expires - now + grace)
+end
+return {}
+"""
+
+# Drops the hold's seats from the showtime hash and stamps a final status. With
+# ARGV[3] = '1' the hold must still own every seat and be unexpired, and the seats are
+# kept claimed for the handoff window instead of released (purchase completion).
+_FINISH_SCRIPT = """
+local now = tonumber(ARGV[1])
+if redis.call('HGET', KEYS[2], 'status') ~= 'ACTIVE' then
+  return -1
+end
+local seat_ids = redis.call('HGET', KEYS[2], 'seat_ids')
+local seats = {}
+for seat in string.gmatch(seat_ids, '[^,]+') do
+  table.insert(seats, seat)
+end
+local prefix = ARGV[4] .. ':'
+if ARGV[3] == '1' then
+  if tonumber(redis.call('HGET', KEYS[2], 'expires_ms')) <= now then
+    return -1
+  end
+  for _, seat in ipairs(seats) do
+    local current = redis.call('HGET', KEYS[1], seat)
+    if not current or string.sub(current, 1, #prefix) ~= prefix then
+      return -1
+    end
+  end
+  local value = ARGV[4] .. ':' .. tostring(now + tonumber(ARGV[5]))
+  for _, seat in ipairs(seats) do
+    redis.call('HSET', KEYS[1], seat, value)
+  end
+else
+  for _, seat in ipairs(seats) do
+    local current = redis.call('HGET', KEYS[1], seat)
+    if current and string.sub(current, 1, #prefix) == prefix then
+      redis.call('HDEL', KEYS[1], seat)
+    end
+  end
+end
+redis.call('HSET', KEYS[2], 'status', ARGV[2])
+if redis.call('GET', KEYS[3]) == ARGV[4] then
+  redis.call('DEL', KEYS[3])
+end
+return #seats
+"""
+
+# Deletes a field only if it still has the value the caller inspected.
+_PRUNE_SCRIPT = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+  if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+    redis.call('HDEL', KEYS[1], ARGV[i])
+    removed = removed + 1
+  end
+end
+return removed
+"""
+
+
+@dataclass(frozen=True)
+class RedisHold:
+    reservation_id: int
+    user_id: int
+    showtime_id: int
+    seat_ids: list[int]
+    status: str
+    expires_at: datetime
+    created_at: datetime
+
+
+def redis_holds_enabled() -> bool:
+    return settings.reservation_hold_backend.strip().lower() == "redis"
+
+
+def _build_client() -> Redis:
+    return Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+
+
+def _showtime_key(showtime_id: int) -> str:
+    return f"holds:showtime:{showtime_id}"
+
+
+def _hold_key(reservation_id: int) -> str:
+    return f"holds:reservation:{reservation_id}"
+
+
+def _user_key(user_id: int, showtime_id: int) -> str:
+    return f"holds:user:{user_id}:{showtime_id}"
+
+
+def _now_ms() -> int:
+    return int(datetime.now(tz=UTC).timestamp() * 1000)
+
+
+def _from_ms(value: str) -> datetime:
+    return datetime.fromtimestamp(int(value) / 1000, tz=UTC)
+
+
+def _parse_field(value: str) -> tuple[int, int]:
+    holder, _, expires_ms = value.partition(":")
+    return int(holder), int(expires_ms)
+
+
+async def claim_seats(
+    *,
+    reservation_id: int,
+    user_id: int,
+    showtime_id: int,
+    seat_ids: list[int],
+    expires_at: datetime,
+    created_at: datetime | None = None,
+) -> list[int]:
+    """Claim every seat for the reservation or none; returns the conflicting seat ids."""
+    now_ms = _now_ms()
+    client = _build_client()
+    try:
+        conflicts = await client.register_script(_CLAIM_SCRIPT)(
+            keys=[
+                _showtime_key(showtime_id),
+                _hold_key(reservation_id),
+                _user_key(user_id, showtime_id),
+            ],
+            args=[
+                now_ms,
+                int(expires_at.timestamp() * 1000),
+                reservation_id,
+                user_id,
+                showtime_id,
+                int((created_at or datetime.now(tz=UTC)).timestamp() * 1000),
+                HOLD_RECORD_GRACE_MS,
+                *sorted(set(seat_ids)),
+            ],
+        )
+    finally:
+        await client.aclose()
+    return sorted(int(seat_id) for seat_id in conflicts)
+
+
+async def get_hold(reservation_id: int) -> RedisHold | None:
+    client = _build_client()
+    try:
+        fields = await client.hgetall(_hold_key(reservation_id))
+    finally:
+        await client.aclose()
+    if not fields:
+        return None
+    expires_at = _from_ms(fields["expires_ms"])
+    status = fields["status"]
+    if status == "ACTIVE" and expires_at <= datetime.now(tz=UTC):
+        status = "EXPIRED"
+    return RedisHold(
+        reservation_id=reservation_id,
+        user_id=int(fields["user_id"]),
+        showtime_id=int(fields["showtime_id"]),
+        seat_ids=sorted(int(seat_id) for seat_id in fields["seat_ids"].split(",")),
+        status=status,
+        expires_at=expires_at,
+        created_at=_from_ms(fields["created_ms"]),
+    )
+
+
+async def get_active_hold(user_id: int, showtime_id: int) -> RedisHold | None:
+    client = _build_client()
+    try:
+        reservation_id = await client.get(_user_key(user_id, showtime_id))
+    finally:
+        await client.aclose()
+    if reservation_id is None:
+        return None
+    hold = await get_hold(int(reservation_id))
+    return hold if hold is not None and hold.status == "ACTIVE" else None
+
+
+async def held_seat_ids(showtime_id: int) -> set[int]:
+    """Seats of the showtime currently claimed by an unexpired hold."""
+    client = _build_client()
+    try:
+        fields = await client.hgetall(_showtime_key(showtime_id))
+    finally:
+        await client.aclose()
+    now_ms = _now_ms()
+    return {
+        int(seat_id)
+        for seat_id, value in fields.items()
+        if _parse_field(value)[1] > now_ms
+    }
+
+
+async def _finish_hold(hold: RedisHold, *, status: str, complete: bool) -> int:
+    client = _build_client()
+    try:
+        return int(
+            await client.register_script(_FINISH_SCRIPT)(
+                keys=[
+                    _showtime_key(hold.showtime_id),
+                    _hold_key(hold.reservation_id),
+                    _user_key(hold.user_id, hold.showtime_id),
+                ],
+                args=[
+                    _now_ms(),
+                    status,
+                    "1" if complete else "0",
+                    hold.reservation_id,
+                    COMPLETED_HANDOFF_MS,
+                ],
+            )
+        )
+    finally:
+        await client.aclose()
+
+
+async def release_hold(hold: RedisHold) -> bool:
+    """Free the hold's seats and mark it CANCELED; False if it was no longer active."""
+    return await _finish_hold(hold, status="CANCELED", complete=False) >= 0
+
+
+async def complete_hold(hold: RedisHold) -> bool:
+    """Mark the hold COMPLETED if it still owns every seat and has not expired.
+
+    The seats stay claimed for ``COMPLETED_HANDOFF_MS`` so nobody can grab them before
+    the caller's SOLD rows commit; after that the database status takes over.
+    """
+    return await _finish_hold(hold, status="COMPLETED", complete=True) >= 0
+
+
+async def release_seats(hold: RedisHold, seat_ids: list[int]) -> int:
+    """Free some of an active hold's seats; fields another hold has taken are left alone."""
+    value = f"{hold.reservation_id}:{int(hold.expires_at.timestamp() * 1000)}"
+    client = _build_client()
+    try:
+        return int(
+            await client.register_script(_PRUNE_SCRIPT)(
+                keys=[_showtime_key(hold.showtime_id)],
+                args=[item for seat_id in seat_ids for item in (seat_id, value)],
+            )
+        )
+    finally:
+        await client.aclose()
+
+
+async def prune_expired_seats() -> int:
+    """Drop expired seat fields from every showtime hash; returns the number removed."""
+    now_ms = _now_ms()
+    removed = 0
+    client = _build_client()
+    try:
+        prune = client.register_script(_PRUNE_SCRIPT)
+        async for key in client.scan_iter(match=_showtime_key("*"), count=200):
+            stale: list[str] = []
+            for seat_id, value in (await client.hgetall(key)).items():
+                if _parse_field(value)[1] <= now_ms:
+                    stale.extend((seat_id, value))
+            if stale:
+                removed += int(await prune(keys=[key], args=stale))
+    finally:
+        await client.aclose()
+    return removed
+
+
+def hold_expiry(hold_minutes: int) -> tuple[datetime, datetime]:
+    created_at = datetime.now(tz=UTC)
+    return created_at, created_at + timedelta(minutes=hold_minutes)
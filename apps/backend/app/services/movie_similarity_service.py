@@ -14,13 +14,23 @@ from app.models.showtime import Showtime
 
 
 @dataclass
-class _MovieFeatures:
+class MovieFeatures:
     movie_id: int
     rating: str
     runtime_minutes: int
     genres: set[str]
 
 
+@dataclass(frozen=True)
+class MovieSimilarityScore:
+    movie_id: int
+    similar_movie_id: int
+    score: float
+    co_watch_count: int
+    shared_genre_count: int
+    runtime_distance: int
+
+
 def _extract_genres(metadata_json: dict | None) -> set[str]:
     if not isinstance(metadata_json, dict):
         return set()
@@ -57,63 +67,23 @@ def _genre_similarity(left_genres: set[str], right_genres: set[str]) -> tuple[fl
     return len(intersection) / len(union), len(intersection)
 
 
-async def rebuild_movie_similarity(
-    session: AsyncSession,
+def compute_movie_similarity(
+    features_by_movie: dict[int, MovieFeatures],
+    watched_movie_sets: list[set[int]],
     *,
-    top_k: int | None = None,
-) -> int:
-    effective_top_k = (
-        max(1, int(top_k))
-        if top_k is not None
-        else max(1, int(settings.recommendation_similarity_top_k))
-    )
-    movie_rows = (
-        await session.execute(
-            select(
-                Movie.id,
-                Movie.rating,
-                Movie.runtime_minutes,
-                Movie.metadata_json,
-            )
-        )
-    ).all()
-    features_by_movie: dict[int, _MovieFeatures] = {
-        row.id: _MovieFeatures(
-            movie_id=row.id,
-            rating=row.rating or "",
-            runtime_minutes=max(1, int(row.runtime_minutes or 1)),
-            genres=_extract_genres(row.metadata_json),
-        )
-        for row in movie_rows
-    }
+    top_k: int,
+) -> list[MovieSimilarityScore]:
+    """Score every movie pair and keep each movie's ``top_k`` most similar movies."""
     movie_ids = sorted(features_by_movie.keys())
-    if len(movie_ids) < 2:
-        await session.execute(delete(MovieSimilarity))
-        await delete_cache_prefix("recommendations:")
-        return 0
-
-    watch_rows = (
-        await session.execute(
-            select(Order.user_id, Showtime.movie_id)
-            .join(Showtime, Showtime.id == Order.showtime_id)
-            .join(Ticket, Ticket.order_id == Order.id)
-            .where(Order.status == "PAID")
-            .distinct()
-        )
-    ).all()
-    user_movies: defaultdict[int, set[int]] = defaultdict(set)
-    for row in watch_rows:
-        user_movies[int(row.user_id)].add(int(row.movie_id))
-
     co_watch_count: defaultdict[tuple[int, int], int] = defaultdict(int)
-    for watched_movie_ids in user_movies.values():
+    for watched_movie_ids in watched_movie_sets:
         watched_list = sorted(watched_movie_ids)
         for index, left_movie_id in enumerate(watched_list):
             for right_movie_id in watched_list[index + 1 :]:
                 co_watch_count[(left_movie_id, right_movie_id)] += 1
                 co_watch_count[(right_movie_id, left_movie_id)] += 1
 
-    similarity_rows: list[MovieSimilarity] = []
+    scores: list[MovieSimilarityScore] = []
     max_co_watch = max(co_watch_count.values(), default=1)
     for movie_id in movie_ids:
         base = features_by_movie[movie_id]
@@ -146,11 +116,9 @@ async def rebuild_movie_similarity(
             )
 
         candidates.sort(key=lambda item: item[0], reverse=True)
-        for score, similar_movie_id, pair_co_watch, shared_genre_count in candidates[
-            :effective_top_k
-        ]:
-            similarity_rows.append(
-                MovieSimilarity(
+        for score, similar_movie_id, pair_co_watch, shared_genre_count in candidates[:top_k]:
+            scores.append(
+                MovieSimilarityScore(
                     movie_id=movie_id,
                     similar_movie_id=similar_movie_id,
                     score=score,
@@ -161,12 +129,78 @@ async def rebuild_movie_similarity(
                     ),
                 )
             )
+    return scores
+
+
+async def rebuild_movie_similarity(
+    session: AsyncSession,
+    *,
+    top_k: int | None = None,
+) -> int:
+    effective_top_k = (
+        max(1, int(top_k))
+        if top_k is not None
+        else max(1, int(settings.recommendation_similarity_top_k))
+    )
+    movie_rows = (
+        await session.execute(
+            select(
+                Movie.id,
+                Movie.rating,
+                Movie.runtime_minutes,
+                Movie.metadata_json,
+            )
+        )
+    ).all()
+    features_by_movie: dict[int, MovieFeatures] = {
+        row.id: MovieFeatures(
+            movie_id=row.id,
+            rating=row.rating or "",
+            runtime_minutes=max(1, int(row.runtime_minutes or 1)),
+            genres=_extract_genres(row.metadata_json),
+        )
+        for row in movie_rows
+    }
+    if len(features_by_movie) < 2:
+        await session.execute(delete(MovieSimilarity))
+        await delete_cache_prefix("recommendations:")
+        return 0
 
+    watch_rows = (
+        await session.execute(
+            select(Order.user_id, Showtime.movie_id)
+            .join(Showtime, Showtime.id == Order.showtime_id)
+            .join(Ticket, Ticket.order_id == Order.id)
+            .where(Order.status == "PAID")
+            .distinct()
+        )
+    ).all()
+    user_movies: defaultdict[int, set[int]] = defaultdict(set)
+    for row in watch_rows:
+        user_movies[int(row.user_id)].add(int(row.movie_id))
+
+    scores = compute_movie_similarity(
+        features_by_movie,
+        list(user_movies.values()),
+        top_k=effective_top_k,
+    )
     await session.execute(delete(MovieSimilarity))
-    session.add_all(similarity_rows)
+    session.add_all(
+        [
+            MovieSimilarity(
+                movie_id=item.movie_id,
+                similar_movie_id=item.similar_movie_id,
+                score=item.score,
+                co_watch_count=item.co_watch_count,
+                shared_genre_count=item.shared_genre_count,
+                runtime_distance=item.runtime_distance,
+            )
+            for item in scores
+        ]
+    )
     await session.flush()
     await delete_cache_prefix("recommendations:")
-    return len(similarity_rows)
+    return len(scores)
 
 
 async def rebuild_movie_similarity_job() -> int:
@@ -1,4 +1,5 @@
 from datetime import UTC, datetime
+from types import ModuleType
 from uuid import uuid4
 
 from fastapi import HTTPException
@@ -7,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.cache import delete_cache_prefix
 from app.core.config import settings
+from app.db.retry import run_transaction
 from app.models.order import Order, Ticket
 from app.models.reservation import Reservation, ReservationSeat, ShowtimeSeatStatus
 from app.models.showtime import Seat
@@ -16,12 +18,11 @@ from app.schemas.payment import (
     CheckoutSessionRead,
     TicketRead,
 )
+from app.services import hold_store
+from app.services.hold_store import RedisHold
+from app.services.recommendation_service import invalidate_user_candidates
 from app.services.reservation_service import ReservationService
-
-try:
-    import stripe
-except ModuleNotFoundError:  # pragma: no cover - resolved once dependency is installed
-    stripe = None
+from app.services.sales_rollup_service import apply_sales_rollup_delta
 
 SEAT_TYPE_PRICE_CENTS = {
     "STANDARD": 1500,
@@ -30,6 +31,15 @@ SEAT_TYPE_PRICE_CENTS = {
 }
 
 
+def load_stripe_sdk() -> ModuleType:
+    """Import the Stripe SDK on first use; most processes never talk to Stripe."""
+    try:
+        import stripe
+    except ModuleNotFoundError as exc:  # pragma: no cover - resolved once dependency is installed
+        raise HTTPException(status_code=503, detail="Stripe SDK not installed") from exc
+    return stripe
+
+
 def _seat_price_cents(seat_type: str) -> int:
     return SEAT_TYPE_PRICE_CENTS.get(seat_type.upper(), 1500)
 
@@ -46,7 +56,15 @@ class PaymentService:
         reservation_id: int,
         provider: str,
     ) -> CheckoutSessionRead:
-        await self._reservation_service.expire_overdue_holds(session)
+        await self._reservation_service.expire_holds(session, [reservation_id])
+
+        hold = None
+        if hold_store.redis_holds_enabled():
+            hold = await hold_store.get_hold(reservation_id)
+        if hold is not None and hold.user_id != user_id:
+            hold = None
+        if hold is not None and hold.status == "ACTIVE":
+            await self._reservation_service.persist_redis_hold(session, hold)
 
         reservation = (
             await session.execute(
@@ -56,16 +74,18 @@ class PaymentService:
             )
         ).scalar_one_or_none()
         if reservation is None:
+            if hold is not None:
+                raise HTTPException(status_code=409, detail="Reservation is not active")
             raise HTTPException(status_code=404, detail="Reservation not found")
         if reservation.status != "ACTIVE":
             raise HTTPException(status_code=409, detail="Reservation is not active")
         if reservation.expires_at <= datetime.now(tz=UTC):
             raise HTTPException(status_code=409, detail="Reservation has expired")
 
+        # The reservation lock already serializes checkout for this hold; locking the order
+        # here too would take order after reservation, the reverse of finalization.
         existing_order = (
-            await session.execute(
-                select(Order).where(Order.reservation_id == reservation.id).with_for_update()
-            )
+            await session.execute(select(Order).where(Order.reservation_id == reservation.id))
         ).scalar_one_or_none()
         if existing_order is not None:
             return CheckoutSessionRead(
@@ -83,14 +103,7 @@ class PaymentService:
                 created_at=existing_order.created_at,
             )
 
-        seat_rows = (
-            await session.execute(
-                select(Seat.id, Seat.seat_type)
-                .join(ReservationSeat, ReservationSeat.seat_id == Seat.id)
-                .where(ReservationSeat.reservation_id == reservation.id)
-                .order_by(Seat.id.asc())
-            )
-        ).all()
+        seat_rows = await self._reservation_seat_rows(session, reservation.id)
         if not seat_rows:
             raise HTTPException(status_code=400, detail="Reservation has no seats")
 
@@ -109,13 +122,8 @@ class PaymentService:
         session.add(order)
         await session.flush()
         if provider_name == "STRIPE_CHECKOUT":
-            provider_session_id, checkout_url = await self._create_stripe_checkout_session(
-                order_id=order.id,
-                user_id=user_id,
-                reservation_id=reservation.id,
-                seat_rows=seat_rows,
-                currency=order.currency,
-            )
+            # Stripe is called by open_stripe_checkout once this order has committed.
+            provider_session_id, checkout_url = None, ""
         else:
             provider_session_id = f"cs_mock_{uuid4().hex}"
             checkout_url = (
@@ -127,7 +135,7 @@ class PaymentService:
             order_id=order.id,
             reservation_id=order.reservation_id,
             provider=order.provider,
-            provider_session_id=provider_session_id,
+            provider_session_id=provider_session_id or "",
             status=order.status,
             total_cents=order.total_cents,
             currency=order.currency,
@@ -135,13 +143,63 @@ class PaymentService:
             created_at=order.created_at,
         )
 
+    async def open_stripe_checkout(
+        self,
+        session: AsyncSession,
+        *,
+        checkout: CheckoutSessionRead,
+        user_id: int,
+    ) -> CheckoutSessionRead:
+        """Create the Stripe Checkout session for a committed order and record its id.
+
+        Must run outside a transaction: a retried transaction would otherwise call Stripe
+        again. The order-scoped idempotency key makes a repeat after a failed write, or
+        from a concurrent request, return the session Stripe already created.
+        """
+        async with session.begin():
+            seat_rows = await self._reservation_seat_rows(session, checkout.reservation_id)
+        provider_session_id, checkout_url = await self._create_stripe_checkout_session(
+            order_id=checkout.order_id,
+            user_id=user_id,
+            reservation_id=checkout.reservation_id,
+            seat_rows=seat_rows,
+            currency=checkout.currency,
+        )
+
+        async def record_session() -> None:
+            await session.execute(
+                update(Order)
+                .where(Order.id == checkout.order_id, Order.provider_session_id.is_(None))
+                .values(provider_session_id=provider_session_id)
+            )
+
+        await run_transaction(session, record_session, operation="checkout_session")
+        return checkout.model_copy(
+            update={"provider_session_id": provider_session_id, "checkout_url": checkout_url}
+        )
+
+    async def _reservation_seat_rows(
+        self,
+        session: AsyncSession,
+        reservation_id: int,
+    ) -> list[tuple[int, str]]:
+        return [
+            (seat_id, seat_type)
+            for seat_id, seat_type in await session.execute(
+                select(Seat.id, Seat.seat_type)
+                .join(ReservationSeat, ReservationSeat.seat_id == Seat.id)
+                .where(ReservationSeat.reservation_id == reservation_id)
+                .order_by(Seat.id.asc())
+            )
+        ]
+
     async def finalize_paid_order(
         self,
         session: AsyncSession,
         *,
         order: Order,
     ) -> CheckoutFinalizeRead:
-        await self._reservation_service.expire_overdue_holds(session)
+        await self._reservation_service.expire_holds(session, [order.reservation_id])
 
         reservation = (
             await session.execute(
@@ -158,6 +216,17 @@ class PaymentService:
             order.status = "FAILED"
             return await self._finalize_payload(session, order.id, order.status)
 
+        hold = None
+        if hold_store.redis_holds_enabled():
+            hold = await hold_store.get_hold(reservation.id)
+        if hold is not None:
+            return await self._finalize_redis_hold(
+                session,
+                order=order,
+                reservation=reservation,
+                hold=hold,
+            )
+
         reservation_seat_ids = list(
             (
                 await session.execute(
@@ -179,6 +248,7 @@ class PaymentService:
                         ShowtimeSeatStatus.showtime_id == reservation.showtime_id,
                         ShowtimeSeatStatus.seat_id.in_(reservation_seat_ids),
                     )
+                    .order_by(ShowtimeSeatStatus.seat_id)
                     .with_for_update()
                 )
             ).scalars()
@@ -206,6 +276,75 @@ class PaymentService:
         )
         reservation.status = "COMPLETED"
         order.status = "PAID"
+        await apply_sales_rollup_delta(
+            session,
+            showtime_id=reservation.showtime_id,
+            sold_seats=len(held_rows),
+            held_seats=-len(held_rows),
+            active_holds=-1,
+            paid_orders=1,
+            revenue_cents=order.total_cents,
+        )
+        return await self._issue_tickets(session, order=order, seat_ids=reservation_seat_ids)
+
+    async def _finalize_redis_hold(
+        self,
+        session: AsyncSession,
+        *,
+        order: Order,
+        reservation: Reservation,
+        hold: RedisHold,
+    ) -> CheckoutFinalizeRead:
+        """Convert a Redis hold to SOLD seats: the first seat status write for the hold.
+
+        A hold already marked completed belongs to an earlier attempt of this transaction
+        that was rolled back for a retry, since the order lock admits one finalizer.
+        """
+        if hold.status != "COMPLETED" and not await hold_store.complete_hold(hold):
+            order.status = "FAILED"
+            return await self._finalize_payload(session, order.id, order.status)
+
+        seat_statuses = list(
+            (
+                await session.execute(
+                    select(ShowtimeSeatStatus)
+                    .where(
+                        ShowtimeSeatStatus.showtime_id == reservation.showtime_id,
+                        ShowtimeSeatStatus.seat_id.in_(hold.seat_ids),
+                    )
+                    .order_by(ShowtimeSeatStatus.seat_id)
+                    .with_for_update()
+                )
+            ).scalars()
+        )
+        if len(seat_statuses) != len(hold.seat_ids) or any(
+            seat_status.status != "AVAILABLE" for seat_status in seat_statuses
+        ):
+            order.status = "FAILED"
+            return await self._finalize_payload(session, order.id, order.status)
+
+        for seat_status in seat_statuses:
+            seat_status.status = "SOLD"
+        reservation.status = "COMPLETED"
+        order.status = "PAID"
+        await apply_sales_rollup_delta(
+            session,
+            showtime_id=reservation.showtime_id,
+            sold_seats=len(seat_statuses),
+            active_holds=-1,
+            paid_orders=1,
+            revenue_cents=order.total_cents,
+        )
+        return await self._issue_tickets(session, order=order, seat_ids=hold.seat_ids)
+
+    async def _issue_tickets(
+        self,
+        session: AsyncSession,
+        *,
+        order: Order,
+        seat_ids: list[int],
+    ) -> CheckoutFinalizeRead:
+        await invalidate_user_candidates(session, user_id=order.user_id)
         await delete_cache_prefix(f"recommendations:{order.user_id}:")
 
         existing_ticket_seat_ids = set(
@@ -214,9 +353,7 @@ class PaymentService:
             ).scalars()
         )
         missing_seat_ids = [
-            seat_id
-            for seat_id in reservation_seat_ids
-            if seat_id not in existing_ticket_seat_ids
+            seat_id for seat_id in seat_ids if seat_id not in existing_ticket_seat_ids
         ]
         if missing_seat_ids:
             session.add_all(
@@ -343,9 +480,7 @@ class PaymentService:
                 status_code=400,
                 detail="Stripe is not configured for this environment",
             )
-        if stripe is None:
-            raise HTTPException(status_code=503, detail="Stripe SDK not installed")
-
+        stripe = load_stripe_sdk()
         stripe.api_key = settings.stripe_secret_key
         line_items = []
         for _, seat_type in seat_rows:
@@ -362,6 +497,7 @@ class PaymentService:
             )
 
         checkout_session = stripe.checkout.Session.create(
+            idempotency_key=f"checkout-order-{order_id}",
             mode="payment",
             line_items=line_items,
             client_reference_id=str(order_id),
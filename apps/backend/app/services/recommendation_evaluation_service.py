@@ -0,0 +1,415 @@
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from math import log2
+from statistics import fmean
+from time import perf_counter
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.movie import Movie
+from app.models.order import Order, Ticket
+from app.models.recommendation import MovieSimilarity, UserMovieEvent
+from app.models.showtime import Showtime
+from app.services.recommendation_pool_service import PoolMovie, extract_genres, freshness_score
+from app.services.recommendation_service import (
+    NOT_INTERESTED,
+    SAVE_FOR_LATER,
+    WatchedMovie,
+    score_user_candidates,
+    select_diverse_candidates,
+)
+
+
+@dataclass
+class CatalogMovie:
+    title: str
+    rating: str | None
+    release_date: date | None
+    genres: list[str]
+
+
+@dataclass
+class ReplayCatalog:
+    """Everything needed to rebuild the shared candidate pool as of any past instant."""
+
+    movies: dict[int, CatalogMovie]
+    # Sorted upcoming-showtime starts per movie (scheduled showtimes only).
+    showtime_starts: dict[int, list[datetime]]
+    # (order created_at, showtime starts_at, ticket count) per movie for PAID orders.
+    sales: dict[int, list[tuple[datetime, datetime, int]]]
+    similarity_rows: list[tuple[int, int, float]]
+
+
+@dataclass
+class ReplayCase:
+    user_id: int
+    cutoff: datetime
+    held_out_movie_id: int
+    watch_history: list[WatchedMovie]
+    hidden_movie_ids: set[int] = field(default_factory=set)
+    saved_movie_ids: set[int] = field(default_factory=set)
+
+
+@dataclass
+class ReplayOutcome:
+    rank: int | None
+    in_pool: bool
+    latency_seconds: float
+
+
+@dataclass
+class VariantReport:
+    variant: str
+    weights: tuple[float, float, float]
+    k: int
+    cases: int
+    hits: int
+    hit_rate: float
+    ndcg: float
+    pool_coverage: float
+    latency_ms: dict[str, float]
+
+
+def candidate_pool_at(catalog: ReplayCatalog, cutoff: datetime) -> list[PoolMovie]:
+    """Rebuild the shared pool as it looked at ``cutoff`` from replayed showtimes and sales."""
+    pool: list[PoolMovie] = []
+    for movie_id, starts in catalog.showtime_starts.items():
+        index = bisect_left(starts, cutoff)
+        if index == len(starts):
+            continue
+        movie = catalog.movies[movie_id]
+        next_showtime_starts_at = starts[index]
+        tickets_sold = sum(
+            ticket_count
+            for created_at, starts_at, ticket_count in catalog.sales.get(movie_id, ())
+            if created_at < cutoff <= starts_at
+        )
+        pool.append(
+            PoolMovie(
+                movie_id=movie_id,
+                rating=movie.rating,
+                release_date=movie.release_date,
+                next_showtime_starts_at=next_showtime_starts_at,
+                tickets_sold=tickets_sold,
+                genres=movie.genres,
+                freshness=freshness_score(
+                    now=cutoff,
+                    next_showtime_starts_at=next_showtime_starts_at,
+                    release_date=movie.release_date,
+                ),
+            )
+        )
+    return pool
+
+
+def ndcg_at_k(rank: int | None, k: int) -> float:
+    """NDCG for a single relevant item: the ideal DCG is 1, so this is just its DCG."""
+    if rank is None or rank > k:
+        return 0.0
+    return 1.0 / log2(rank + 1)
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def replay_case(
+    catalog: ReplayCatalog,
+    case: ReplayCase,
+    *,
+    weights: tuple[float, float, float],
+    k: int,
+    diversity_penalty: float,
+    save_for_later_boost: float,
+) -> ReplayOutcome:
+    pool = candidate_pool_at(catalog, case.cutoff)
+    in_pool = any(movie.movie_id == case.held_out_movie_id for movie in pool)
+
+    started_at = perf_counter()
+    candidates = [
+        candidate
+        for candidate in score_user_candidates(
+            watch_history=case.watch_history,
+            similarity_rows=catalog.similarity_rows,
+            pool=pool,
+            weights=weights,
+        )
+        if candidate.movie_id not in case.hidden_movie_ids
+    ]
+    selected = select_diverse_candidates(
+        candidates,
+        limit=k,
+        diversity_penalty=diversity_penalty,
+        score_boosts={movie_id: save_for_later_boost for movie_id in case.saved_movie_ids},
+    )
+    latency_seconds = perf_counter() - started_at
+
+    rank = next(
+        (
+            position
+            for position, (candidate, _) in enumerate(selected, start=1)
+            if candidate.movie_id == case.held_out_movie_id
+        ),
+        None,
+    )
+    return ReplayOutcome(rank=rank, in_pool=in_pool, latency_seconds=latency_seconds)
+
+
+_worker_catalog: ReplayCatalog | None = None
+
+
+def _init_worker(catalog: ReplayCatalog) -> None:
+    global _worker_catalog
+    _worker_catalog = catalog
+
+
+def _replay_chunk(
+    cases: list[ReplayCase],
+    weights: tuple[float, float, float],
+    k: int,
+    diversity_penalty: float,
+    save_for_later_boost: float,
+) -> list[ReplayOutcome]:
+    assert _worker_catalog is not None
+    return [
+        replay_case(
+            _worker_catalog,
+            case,
+            weights=weights,
+            k=k,
+            diversity_penalty=diversity_penalty,
+            save_for_later_boost=save_for_later_boost,
+        )
+        for case in cases
+    ]
+
+
+def summarize_outcomes(
+    variant: str,
+    weights: tuple[float, float, float],
+    k: int,
+    outcomes: list[ReplayOutcome],
+) -> VariantReport:
+    latencies_ms = sorted(outcome.latency_seconds * 1000 for outcome in outcomes)
+    total = len(outcomes)
+    hits = sum(1 for outcome in outcomes if outcome.rank is not None)
+    in_pool = sum(1 for outcome in outcomes if outcome.in_pool)
+    ndcg_total = sum(ndcg_at_k(outcome.rank, k) for outcome in outcomes)
+    return VariantReport(
+        variant=variant,
+        weights=weights,
+        k=k,
+        cases=total,
+        hits=hits,
+        hit_rate=round(hits / total, 4) if total else 0.0,
+        ndcg=round(ndcg_total / total, 4) if total else 0.0,
+        pool_coverage=round(in_pool / total, 4) if total else 0.0,
+        latency_ms={
+            "mean": round(fmean(latencies_ms), 3) if latencies_ms else 0.0,
+            "p50": round(_percentile(latencies_ms, 50), 3),
+            "p95": round(_percentile(latencies_ms, 95), 3),
+            "p99": round(_percentile(latencies_ms, 99), 3),
+            "max": round(latencies_ms[-1], 3) if latencies_ms else 0.0,
+        },
+    )
+
+
+def evaluate_variants(
+    catalog: ReplayCatalog,
+    cases: list[ReplayCase],
+    *,
+    variants: dict[str, tuple[float, float, float]],
+    k: int,
+    diversity_penalty: float,
+    save_for_later_boost: float,
+    workers: int | None = None,
+    chunk_size: int = 64,
+) -> list[VariantReport]:
+    """Replay every case against every variant, fanning chunks out over a process pool.
+
+    ``workers=1`` replays inline, which keeps tests and profiling free of subprocesses.
+    """
+    chunks = [cases[index : index + chunk_size] for index in range(0, len(cases), chunk_size)]
+    options = (k, diversity_penalty, save_for_later_boost)
+    reports: list[VariantReport] = []
+    if workers == 1:
+        _init_worker(catalog)
+        for variant, weights in variants.items():
+            outcomes = [
+                outcome for chunk in chunks for outcome in _replay_chunk(chunk, weights, *options)
+            ]
+            reports.append(summarize_outcomes(variant, weights, k, outcomes))
+        return reports
+
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(catalog,),
+    ) as executor:
+        futures_by_variant = {
+            variant: [
+                executor.submit(_replay_chunk, chunk, weights, *options) for chunk in chunks
+            ]
+            for variant, weights in variants.items()
+        }
+        for variant, futures in futures_by_variant.items():
+            outcomes = [outcome for future in futures for outcome in future.result()]
+            reports.append(summarize_outcomes(variant, variants[variant], k, outcomes))
+    return reports
+
+
+async def load_replay_catalog(session: AsyncSession) -> ReplayCatalog:
+    movies = {
+        int(row.id): CatalogMovie(
+            title=str(row.title or ""),
+            rating=row.rating,
+            release_date=row.release_date,
+            genres=extract_genres(row.metadata_json),
+        )
+        for row in await session.execute(
+            select(
+                Movie.id,
+                Movie.title,
+                Movie.rating,
+                Movie.release_date,
+                Movie.metadata_json,
+            )
+        )
+    }
+
+    showtime_starts: defaultdict[int, list[datetime]] = defaultdict(list)
+    for movie_id, starts_at in await session.execute(
+        select(Showtime.movie_id, Showtime.starts_at)
+        .where(Showtime.status == "SCHEDULED")
+        .order_by(Showtime.starts_at.asc())
+    ):
+        showtime_starts[int(movie_id)].append(starts_at)
+
+    sales: defaultdict[int, list[tuple[datetime, datetime, int]]] = defaultdict(list)
+    for movie_id, created_at, starts_at, ticket_count in await session.execute(
+        select(
+            Showtime.movie_id,
+            Order.created_at,
+            Showtime.starts_at,
+            func.count(Ticket.id),
+        )
+        .join(Showtime, Showtime.id == Order.showtime_id)
+        .join(Ticket, Ticket.order_id == Order.id)
+        .where(Order.status == "PAID")
+        .group_by(Order.id, Showtime.movie_id, Showtime.starts_at)
+    ):
+        sales[int(movie_id)].append((created_at, starts_at, int(ticket_count)))
+
+    similarity_rows = [
+        (int(source_movie_id), int(candidate_movie_id), float(score or 0.0))
+        for source_movie_id, candidate_movie_id, score in await session.execute(
+            select(
+                MovieSimilarity.movie_id,
+                MovieSimilarity.similar_movie_id,
+                MovieSimilarity.score,
+            )
+        )
+    ]
+    return ReplayCatalog(
+        movies=movies,
+        showtime_starts=dict(showtime_starts),
+        sales=dict(sales),
+        similarity_rows=similarity_rows,
+    )
+
+
+async def load_replay_cases(
+    session: AsyncSession,
+    catalog: ReplayCatalog,
+    *,
+    since: datetime | None = None,
+    max_cases: int | None = None,
+) -> list[ReplayCase]:
+    """Turn every PAID order into a leave-future-out case for its buyer.
+
+    The order's movie is held out; the user's earlier PAID orders form the watch history
+    and feedback recorded before the order is applied. Re-watches are skipped because
+    watched movies are never recommended.
+    """
+    order_stmt = (
+        select(
+            Order.id,
+            Order.user_id,
+            Order.created_at,
+            Showtime.movie_id,
+            func.count(Ticket.id),
+        )
+        .join(Showtime, Showtime.id == Order.showtime_id)
+        .join(Ticket, Ticket.order_id == Order.id)
+        .where(Order.status == "PAID")
+        .group_by(Order.id, Showtime.movie_id)
+        .order_by(Order.user_id.asc(), Order.created_at.asc(), Order.id.asc())
+    )
+    orders_by_user: defaultdict[int, list[tuple[datetime, int, int]]] = defaultdict(list)
+    for _, user_id, created_at, movie_id, ticket_count in await session.execute(order_stmt):
+        orders_by_user[int(user_id)].append((created_at, int(movie_id), int(ticket_count)))
+
+    feedback_by_user: defaultdict[int, list[tuple[datetime, int, str]]] = defaultdict(list)
+    for user_id, movie_id, event_type, created_at in await session.execute(
+        select(
+            UserMovieEvent.user_id,
+            UserMovieEvent.movie_id,
+            UserMovieEvent.event_type,
+            UserMovieEvent.created_at,
+        ).where(UserMovieEvent.event_type.in_([NOT_INTERESTED, SAVE_FOR_LATER]))
+    ):
+        feedback_by_user[int(user_id)].append((created_at, int(movie_id), event_type))
+
+    cases: list[ReplayCase] = []
+    for user_id, orders in orders_by_user.items():
+        watch_counts: defaultdict[int, float] = defaultdict(float)
+        for cutoff, movie_id, ticket_count in orders:
+            eligible = (since is None or cutoff >= since) and movie_id not in watch_counts
+            if eligible and movie_id in catalog.movies:
+                feedback = [
+                    (event_movie_id, event_type)
+                    for created_at, event_movie_id, event_type in feedback_by_user.get(user_id, ())
+                    if created_at < cutoff
+                ]
+                cases.append(
+                    ReplayCase(
+                        user_id=user_id,
+                        cutoff=cutoff,
+                        held_out_movie_id=movie_id,
+                        watch_history=[
+                            WatchedMovie(
+                                movie_id=watched_movie_id,
+                                title=catalog.movies[watched_movie_id].title,
+                                rating=catalog.movies[watched_movie_id].rating,
+                                genres=catalog.movies[watched_movie_id].genres,
+                                watch_count=count,
+                            )
+                            for watched_movie_id, count in watch_counts.items()
+                            if watched_movie_id in catalog.movies
+                        ],
+                        hidden_movie_ids={
+                            event_movie_id
+                            for event_movie_id, event_type in feedback
+                            if event_type == NOT_INTERESTED
+                        },
+                        saved_movie_ids={
+                            event_movie_id
+                            for event_movie_id, event_type in feedback
+                            if event_type == SAVE_FOR_LATER
+                        },
+                    )
+                )
+            watch_counts[movie_id] += ticket_count
+
+    cases.sort(key=lambda case: case.cutoff)
+    if max_cases is not None:
+        cases = cases[-max_cases:]
+    return cases
@@ -0,0 +1,197 @@
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.movie import Movie
+from app.models.recommendation import RecommendationEvent
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_KEY = "recommendations:events"
+EVENT_CONSUMER_GROUP = "recommendation-event-flusher"
+# Entries left unacknowledged this long belong to a flusher that died mid-batch.
+EVENT_RECLAIM_IDLE_MS = 60_000
+
+
+@dataclass
+class RecommendationEventRecord:
+    user_id: int
+    movie_id: int
+    event_type: str
+    variant: str
+    occurred_at: datetime
+
+
+def _build_client() -> Redis:
+    return Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+
+
+def _consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _encode_event(event: RecommendationEventRecord) -> dict[str, str]:
+    return {
+        "user_id": str(event.user_id),
+        "movie_id": str(event.movie_id),
+        "event_type": event.event_type,
+        "variant": event.variant,
+        "occurred_at": event.occurred_at.isoformat(),
+    }
+
+
+def _decode_event(fields: dict[str, str]) -> RecommendationEventRecord | None:
+    try:
+        return RecommendationEventRecord(
+            user_id=int(fields["user_id"]),
+            movie_id=int(fields["movie_id"]),
+            event_type=fields["event_type"],
+            variant=fields["variant"],
+            occurred_at=datetime.fromisoformat(fields["occurred_at"]),
+        )
+    except (KeyError, ValueError):
+        logger.warning("recommendation_event_decode_failed", extra={"fields": fields})
+        return None
+
+
+def build_event_records(
+    *,
+    user_id: int,
+    events: list[tuple[int, str]],
+    variant: str,
+) -> list[RecommendationEventRecord]:
+    occurred_at = datetime.now(tz=UTC)
+    return [
+        RecommendationEventRecord(
+            user_id=user_id,
+            movie_id=movie_id,
+            event_type=event_type,
+            variant=variant,
+            occurred_at=occurred_at,
+        )
+        for movie_id, event_type in events
+    ]
+
+
+async def insert_recommendation_events(
+    session: AsyncSession,
+    events: list[RecommendationEventRecord],
+) -> int:
+    """Bulk-insert events, dropping ones whose movie or user no longer exists."""
+    if not events:
+        return 0
+    movie_ids = {event.movie_id for event in events}
+    user_ids = {event.user_id for event in events}
+    existing_movie_ids = set(
+        (await session.execute(select(Movie.id).where(Movie.id.in_(movie_ids)))).scalars()
+    )
+    existing_user_ids = set(
+        (await session.execute(select(User.id).where(User.id.in_(user_ids)))).scalars()
+    )
+    rows = [
+        {
+            "user_id": event.user_id,
+            "movie_id": event.movie_id,
+            "event_type": event.event_type,
+            "variant": event.variant,
+            "occurred_at": event.occurred_at,
+        }
+        for event in events
+        if event.movie_id in existing_movie_ids and event.user_id in existing_user_ids
+    ]
+    if rows:
+        await session.execute(insert(RecommendationEvent), rows)
+    return len(rows)
+
+
+async def enqueue_recommendation_events(events: list[RecommendationEventRecord]) -> bool:
+    """Append events to the Redis stream; returns ``False`` when Redis is unavailable."""
+    if not events:
+        return True
+    client = _build_client()
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(
+                    EVENT_STREAM_KEY,
+                    _encode_event(event),
+                    maxlen=settings.recommendation_event_stream_maxlen,
+                    approximate=True,
+                )
+            await pipe.execute()
+    except Exception:
+        logger.warning("recommendation_event_enqueue_failed", extra={"events": len(events)})
+        return False
+    finally:
+        await client.aclose()
+    return True
+
+
+async def _ensure_consumer_group(client: Redis) -> None:
+    try:
+        await client.xgroup_create(EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+async def _persist_stream_entries(client: Redis, entries: list[tuple[str, dict]]) -> int:
+    # Reclaimed entries that were trimmed from the stream come back without fields.
+    decoded = (_decode_event(fields) for _, fields in entries if fields)
+    events = [event for event in decoded if event is not None]
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            inserted = await insert_recommendation_events(session, events)
+    entry_ids = [entry_id for entry_id, _ in entries]
+    await client.xack(EVENT_STREAM_KEY, EVENT_CONSUMER_GROUP, *entry_ids)
+    await client.xdel(EVENT_STREAM_KEY, *entry_ids)
+    return inserted
+
+
+async def flush_recommendation_events_job() -> int:
+    """Drain the event stream into ``recommendation_events`` in batches.
+
+    Entries are acknowledged only after their batch commits, so a crashed flush leaves
+    them pending and the next run reclaims them.
+    """
+    batch_size = max(1, settings.recommendation_event_flush_batch_size)
+    consumer = _consumer_name()
+    client = _build_client()
+    inserted = 0
+    try:
+        await _ensure_consumer_group(client)
+        reclaimed = await client.xautoclaim(
+            EVENT_STREAM_KEY,
+            EVENT_CONSUMER_GROUP,
+            consumer,
+            min_idle_time=EVENT_RECLAIM_IDLE_MS,
+            start_id="0-0",
+            count=batch_size,
+        )
+        if reclaimed[1]:
+            inserted += await _persist_stream_entries(client, reclaimed[1])
+
+        for _ in range(max(1, settings.recommendation_event_flush_max_batches)):
+            response = await client.xreadgroup(
+                EVENT_CONSUMER_GROUP,
+                consumer,
+                {EVENT_STREAM_KEY: ">"},
+                count=batch_size,
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                break
+            inserted += await _persist_stream_entries(client, entries)
+    finally:
+        await client.aclose()
+    return inserted
@@ -0,0 +1,226 @@
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import delete_cache_prefix, get_cache_json, set_cache_json
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.movie import Movie
+from app.models.order import Order, Ticket
+from app.models.showtime import Showtime
+
+CANDIDATE_POOL_CACHE_KEY = "catalog:recommendation_pool"
+
+
+@dataclass
+class PoolMovie:
+    movie_id: int
+    rating: str | None
+    release_date: date | None
+    next_showtime_starts_at: datetime
+    tickets_sold: int
+    genres: list[str]
+    freshness: float
+    # Later starts up to the first one past the pool TTL, so reads can move on to the
+    # next showtime once ``next_showtime_starts_at`` has started.
+    later_showtime_starts: list[datetime] = field(default_factory=list)
+
+
+def extract_genres(metadata_json: dict | None) -> list[str]:
+    if not isinstance(metadata_json, dict):
+        return []
+    genres = metadata_json.get("genre")
+    if not isinstance(genres, list):
+        return []
+    normalized = []
+    for genre in genres:
+        if isinstance(genre, str) and genre.strip():
+            normalized.append(genre.strip())
+    return normalized
+
+
+def freshness_score(
+    *,
+    now: datetime,
+    next_showtime_starts_at: datetime,
+    release_date: date | None,
+) -> float:
+    hours_until_showtime = max(
+        (next_showtime_starts_at - now).total_seconds() / 3600,
+        0.0,
+    )
+    showtime_freshness = max(0.0, 1.0 - min(hours_until_showtime / 96.0, 1.0))
+
+    release_freshness = 0.0
+    if release_date is not None:
+        age_days = (now.date() - release_date).days
+        if age_days <= 0:
+            release_freshness = 1.0
+        else:
+            release_freshness = max(0.0, 1.0 - min(age_days / 140.0, 1.0))
+
+    return (showtime_freshness * 0.65) + (release_freshness * 0.35)
+
+
+async def build_candidate_pool(session: AsyncSession, *, now: datetime) -> list[PoolMovie]:
+    """Collect every movie with an upcoming scheduled showtime plus its upcoming sales."""
+    horizon = now + timedelta(seconds=settings.recommendation_pool_ttl_seconds)
+    upcoming_showtimes_subquery = (
+        select(
+            Showtime.movie_id.label("movie_id"),
+            func.array_agg(aggregate_order_by(Showtime.starts_at, Showtime.starts_at.asc()))
+            .filter(Showtime.starts_at < horizon)
+            .label("starts_within_ttl"),
+            func.min(Showtime.starts_at)
+            .filter(Showtime.starts_at >= horizon)
+            .label("first_start_after_ttl"),
+        )
+        .where(
+            Showtime.starts_at >= now,
+            Showtime.status == "SCHEDULED",
+        )
+        .group_by(Showtime.movie_id)
+        .subquery()
+    )
+    trending_sales_subquery = (
+        select(
+            Showtime.movie_id.label("movie_id"),
+            func.count(Ticket.id).label("tickets_sold"),
+        )
+        .join(Order, Order.showtime_id == Showtime.id)
+        .join(Ticket, Ticket.order_id == Order.id)
+        .where(
+            Order.status == "PAID",
+            Showtime.starts_at >= now,
+        )
+        .group_by(Showtime.movie_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Movie.id.label("movie_id"),
+            Movie.rating,
+            Movie.release_date,
+            upcoming_showtimes_subquery.c.starts_within_ttl,
+            upcoming_showtimes_subquery.c.first_start_after_ttl,
+            func.coalesce(trending_sales_subquery.c.tickets_sold, 0).label("tickets_sold"),
+            Movie.metadata_json.label("metadata_json"),
+        )
+        .join(upcoming_showtimes_subquery, upcoming_showtimes_subquery.c.movie_id == Movie.id)
+        .outerjoin(trending_sales_subquery, trending_sales_subquery.c.movie_id == Movie.id)
+        .order_by(Movie.id.asc())
+    )
+    pool = []
+    for row in (await session.execute(stmt)).mappings():
+        starts = list(row["starts_within_ttl"] or [])
+        if row["first_start_after_ttl"] is not None:
+            starts.append(row["first_start_after_ttl"])
+        pool.append(
+            PoolMovie(
+                movie_id=int(row["movie_id"]),
+                rating=row["rating"],
+                release_date=row["release_date"],
+                next_showtime_starts_at=starts[0],
+                tickets_sold=int(row["tickets_sold"] or 0),
+                genres=extract_genres(row["metadata_json"]),
+                freshness=freshness_score(
+                    now=now,
+                    next_showtime_starts_at=starts[0],
+                    release_date=row["release_date"],
+                ),
+                later_showtime_starts=starts[1:],
+            )
+        )
+    return pool
+
+
+def _encode_pool(pool: list[PoolMovie], computed_at: datetime) -> dict:
+    return {
+        "computed_at": computed_at.isoformat(),
+        "movies": [
+            {
+                "movie_id": movie.movie_id,
+                "rating": movie.rating,
+                "release_date": movie.release_date.isoformat() if movie.release_date else None,
+                "next_showtime_starts_at": movie.next_showtime_starts_at.isoformat(),
+                "tickets_sold": movie.tickets_sold,
+                "genres": movie.genres,
+                "freshness": movie.freshness,
+                "later_showtime_starts": [
+                    starts_at.isoformat() for starts_at in movie.later_showtime_starts
+                ],
+            }
+            for movie in pool
+        ],
+    }
+
+
+def _decode_pool(payload: dict, *, now: datetime) -> list[PoolMovie]:
+    pool = []
+    for item in payload["movies"]:
+        release_date = date.fromisoformat(item["release_date"]) if item["release_date"] else None
+        starts = [
+            datetime.fromisoformat(starts_at)
+            for starts_at in (
+                item["next_showtime_starts_at"],
+                # Absent from pools cached before later starts were stored.
+                *item.get("later_showtime_starts", []),
+            )
+        ]
+        # Move past showtimes that started since the pool was built. The list runs past
+        # the cache TTL, so it only runs out when the movie has no showtime left.
+        upcoming = [starts_at for starts_at in starts if starts_at >= now]
+        if not upcoming:
+            continue
+        pool.append(
+            PoolMovie(
+                movie_id=int(item["movie_id"]),
+                rating=item["rating"],
+                release_date=release_date,
+                next_showtime_starts_at=upcoming[0],
+                tickets_sold=int(item["tickets_sold"]),
+                genres=list(item["genres"]),
+                freshness=(
+                    float(item["freshness"])
+                    if upcoming[0] == starts[0]
+                    else freshness_score(
+                        now=now,
+                        next_showtime_starts_at=upcoming[0],
+                        release_date=release_date,
+                    )
+                ),
+                later_showtime_starts=upcoming[1:],
+            )
+        )
+    return pool
+
+
+async def refresh_candidate_pool(session: AsyncSession) -> list[PoolMovie]:
+    now = datetime.now(tz=UTC)
+    pool = await build_candidate_pool(session, now=now)
+    await set_cache_json(
+        CANDIDATE_POOL_CACHE_KEY,
+        _encode_pool(pool, now),
+        ttl_seconds=settings.recommendation_pool_ttl_seconds,
+    )
+    return pool
+
+
+async def get_candidate_pool(session: AsyncSession, *, now: datetime) -> list[PoolMovie]:
+    """Return the shared pool from Redis, rebuilding it from Postgres on a miss."""
+    cached_payload = await get_cache_json(CANDIDATE_POOL_CACHE_KEY)
+    if cached_payload is not None:
+        return _decode_pool(cached_payload, now=now)
+    return await refresh_candidate_pool(session)
+
+
+async def invalidate_candidate_pool() -> None:
+    await delete_cache_prefix(CANDIDATE_POOL_CACHE_KEY)
+
+
+async def refresh_candidate_pool_job() -> int:
+    async with AsyncSessionLocal() as session:
+        return len(await refresh_candidate_pool(session))
@@ -0,0 +1,445 @@
+import heapq
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from math import log1p
+
+from sqlalchemy import delete, func, select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.movie import Movie
+from app.models.order import Order, Ticket
+from app.models.recommendation import (
+    MovieSimilarity,
+    UserMovieEvent,
+    UserRecommendationCandidate,
+)
+from app.models.showtime import Showtime
+from app.services.recommendation_pool_service import (
+    PoolMovie,
+    extract_genres,
+    get_candidate_pool,
+)
+from app.services.recommendation_variant_service import RankerVariant, resolve_user_variant
+
+NOT_INTERESTED = "NOT_INTERESTED"
+SAVE_FOR_LATER = "SAVE_FOR_LATER"
+
+
+@dataclass
+class RankedCandidate:
+    movie_id: int
+    base_score: float
+    primary_genre: str | None
+    source_movie_id: int | None
+    reason: str
+
+
+@dataclass
+class WatchedMovie:
+    movie_id: int
+    title: str
+    rating: str | None
+    genres: list[str]
+    watch_count: float
+
+
+def recommendation_reason(
+    *,
+    source_movie_id: int | None,
+    watched_titles: dict[int, str],
+    genres: list[str],
+    genre_weights: dict[str, float],
+    tickets_sold: int,
+) -> str:
+    if source_movie_id is not None and source_movie_id in watched_titles:
+        return f"Because you watched {watched_titles[source_movie_id]}"
+
+    if genres:
+        matching_genres = [genre for genre in genres if genre_weights.get(genre.lower(), 0.0) > 0]
+        if matching_genres:
+            return f"Because you watch {matching_genres[0]} movies"
+
+    if tickets_sold > 0:
+        return "Trending with other moviegoers"
+
+    return "Fresh pick for tonight"
+
+
+def select_diverse_candidates(
+    candidates: list[RankedCandidate],
+    *,
+    limit: int,
+    diversity_penalty: float,
+    score_boosts: dict[int, float] | None = None,
+) -> list[tuple[RankedCandidate, float]]:
+    """Greedily pick up to ``limit`` candidates, penalizing repeated primary genres.
+
+    Every candidate in a genre carries the same penalty, so only the best remaining
+    candidate per genre can win a round. Those genre heads sit in one max-heap keyed by
+    adjusted score (ties go to the earlier candidate in boosted-score order); a pick only
+    changes its own genre's penalty, so that genre's next head is the only entry pushed.
+    This runs in O(N log N) and matches rescanning every remaining candidate per pick.
+
+    Returns ``(candidate, adjusted_score)`` pairs in pick order.
+    """
+    boosts = score_boosts or {}
+    ordered = sorted(
+        candidates,
+        key=lambda candidate: candidate.base_score + boosts.get(candidate.movie_id, 0.0),
+        reverse=True,
+    )
+    # Candidates without a primary genre are never penalized, so each one is its own
+    # group; genre groups stay in boosted-score order and are consumed from the front.
+    groups: list[deque[int]] = []
+    group_genres: list[str | None] = []
+    group_by_genre: dict[str, int] = {}
+    for position, candidate in enumerate(ordered):
+        genre = candidate.primary_genre
+        if genre and genre in group_by_genre:
+            groups[group_by_genre[genre]].append(position)
+            continue
+        if genre:
+            group_by_genre[genre] = len(groups)
+        groups.append(deque([position]))
+        group_genres.append(genre)
+
+    selected_genre_counts: Counter[str] = Counter()
+
+    def adjusted_score(position: int, genre: str | None) -> float:
+        candidate = ordered[position]
+        genre_penalty = 0.0
+        if genre:
+            genre_penalty = selected_genre_counts[genre] * diversity_penalty
+        return candidate.base_score + boosts.get(candidate.movie_id, 0.0) - genre_penalty
+
+    heap = [
+        (-adjusted_score(group[0], group_genres[group_index]), group[0], group_index)
+        for group_index, group in enumerate(groups)
+    ]
+    heapq.heapify(heap)
+    selected: list[tuple[RankedCandidate, float]] = []
+    while heap and len(selected) < limit:
+        negative_score, position, group_index = heapq.heappop(heap)
+        group = groups[group_index]
+        group.popleft()
+        genre = group_genres[group_index]
+        if genre:
+            selected_genre_counts[genre] += 1
+        selected.append((ordered[position], -negative_score))
+        if group:
+            heapq.heappush(heap, (-adjusted_score(group[0], genre), group[0], group_index))
+    return selected
+
+
+def score_user_candidates(
+    *,
+    watch_history: list[WatchedMovie],
+    similarity_rows: list[tuple[int, int, float]],
+    pool: list[PoolMovie],
+    weights: tuple[float, float, float],
+) -> list[RankedCandidate]:
+    """Score every unwatched pool movie for one user, best first.
+
+    Pure function of its inputs so the offline evaluator can replay it in worker
+    processes without a database connection.
+    """
+    watched_movie_ids = {movie.movie_id for movie in watch_history}
+    watched_titles = {movie.movie_id: movie.title for movie in watch_history if movie.title}
+    watch_count_by_movie = {movie.movie_id: movie.watch_count for movie in watch_history}
+    genre_weights: defaultdict[str, float] = defaultdict(float)
+    rating_weights: defaultdict[str, float] = defaultdict(float)
+    for movie in watch_history:
+        rating = str(movie.rating or "").strip()
+        if rating:
+            rating_weights[rating] += movie.watch_count
+        for genre in movie.genres:
+            genre_weights[genre.lower()] += movie.watch_count
+
+    similarity_score_by_movie: defaultdict[int, float] = defaultdict(float)
+    top_source_by_movie: dict[int, tuple[float, int]] = {}
+    for source_movie_id, candidate_movie_id, score in similarity_rows:
+        if source_movie_id not in watched_movie_ids:
+            continue
+        watch_weight = watch_count_by_movie.get(source_movie_id, 1.0)
+        contribution = float(score or 0.0) * (1.0 + log1p(watch_weight))
+        if contribution <= 0:
+            continue
+        similarity_score_by_movie[candidate_movie_id] += contribution
+        top_source = top_source_by_movie.get(candidate_movie_id)
+        if top_source is None or contribution > top_source[0]:
+            top_source_by_movie[candidate_movie_id] = (contribution, source_movie_id)
+
+    unwatched_pool = [movie for movie in pool if movie.movie_id not in watched_movie_ids]
+    max_similarity = max(similarity_score_by_movie.values(), default=0.0)
+    max_popularity = max((log1p(movie.tickets_sold) for movie in unwatched_pool), default=0.0)
+    personalized_weight, popularity_weight, freshness_weight = weights
+    candidates: list[RankedCandidate] = []
+    for movie in unwatched_pool:
+        movie_id = movie.movie_id
+        similarity_raw = similarity_score_by_movie.get(movie_id, 0.0)
+        similarity_score = similarity_raw / max_similarity if max_similarity > 0 else 0.0
+        popularity_raw = log1p(movie.tickets_sold)
+        popularity_score = popularity_raw / max_popularity if max_popularity > 0 else 0.0
+        rating_score = rating_weights.get(str(movie.rating or "").strip(), 0.0)
+        rating_bonus = min(rating_score / 4.0, 0.10) if rating_score > 0 else 0.0
+        base_score = (
+            (similarity_score * personalized_weight)
+            + (popularity_score * popularity_weight)
+            + (movie.freshness * freshness_weight)
+            + rating_bonus
+        )
+        source_data = top_source_by_movie.get(movie_id)
+        source_movie_id = source_data[1] if source_data else None
+        candidates.append(
+            RankedCandidate(
+                movie_id=movie_id,
+                base_score=base_score,
+                primary_genre=movie.genres[0].lower() if movie.genres else None,
+                source_movie_id=source_movie_id,
+                reason=recommendation_reason(
+                    source_movie_id=source_movie_id,
+                    watched_titles=watched_titles,
+                    genres=movie.genres,
+                    genre_weights=genre_weights,
+                    tickets_sold=movie.tickets_sold,
+                ),
+            )
+        )
+
+    candidates.sort(key=lambda candidate: candidate.base_score, reverse=True)
+    return candidates
+
+
+async def build_user_candidates(
+    session: AsyncSession,
+    *,
+    user_id: int,
+    variant: RankerVariant,
+    now: datetime,
+) -> list[RankedCandidate]:
+    """Score every unwatched movie in the shared candidate pool for a user, best first.
+
+    Feedback is deliberately left out: hidden movies and save-for-later boosts are
+    applied live at request time so feedback never requires a recompute.
+    """
+    watch_history_stmt = (
+        select(
+            Movie.id.label("movie_id"),
+            Movie.title.label("movie_title"),
+            Movie.rating.label("rating"),
+            Movie.metadata_json.label("metadata_json"),
+            func.count(Ticket.id).label("watch_count"),
+        )
+        .join(Showtime, Showtime.movie_id == Movie.id)
+        .join(Order, Order.showtime_id == Showtime.id)
+        .join(Ticket, Ticket.order_id == Order.id)
+        .where(
+            Order.user_id == user_id,
+            Order.status == "PAID",
+        )
+        .group_by(Movie.id, Movie.rating, Movie.metadata_json)
+    )
+    watch_history = [
+        WatchedMovie(
+            movie_id=int(row["movie_id"]),
+            title=str(row["movie_title"] or ""),
+            rating=row["rating"],
+            genres=extract_genres(row["metadata_json"]),
+            watch_count=float(row["watch_count"] or 1),
+        )
+        for row in (await session.execute(watch_history_stmt)).mappings()
+    ]
+
+    similarity_rows: list[tuple[int, int, float]] = []
+    if watch_history:
+        similarity_stmt = select(
+            MovieSimilarity.movie_id,
+            MovieSimilarity.similar_movie_id,
+            MovieSimilarity.score,
+        ).where(MovieSimilarity.movie_id.in_([movie.movie_id for movie in watch_history]))
+        similarity_rows = [
+            (int(source_movie_id), int(candidate_movie_id), float(score or 0.0))
+            for source_movie_id, candidate_movie_id, score in await session.execute(
+                similarity_stmt
+            )
+        ]
+
+    candidates = score_user_candidates(
+        watch_history=watch_history,
+        similarity_rows=similarity_rows,
+        pool=await get_candidate_pool(session, now=now),
+        weights=variant.weights,
+    )
+    return candidates[: max(1, settings.recommendation_candidate_pool_size)]
+
+
+async def store_user_candidates(
+    session: AsyncSession,
+    *,
+    user_id: int,
+    variant: str,
+    candidates: list[RankedCandidate],
+    computed_at: datetime,
+) -> None:
+    await session.execute(
+        delete(UserRecommendationCandidate).where(
+            UserRecommendationCandidate.user_id == user_id,
+            UserRecommendationCandidate.variant == variant,
+        )
+    )
+    if not candidates:
+        return
+    # Concurrent cache misses for the same user may race here; upserting keeps the last
+    # writer's ranking instead of failing on the unique constraint.
+    stmt = insert(UserRecommendationCandidate).values(
+        [
+            {
+                "user_id": user_id,
+                "variant": variant,
+                "movie_id": candidate.movie_id,
+                "rank": rank,
+                "base_score": candidate.base_score,
+                "primary_genre": candidate.primary_genre,
+                "source_movie_id": candidate.source_movie_id,
+                "reason": candidate.reason,
+                "computed_at": computed_at,
+            }
+            for rank, candidate in enumerate(candidates, start=1)
+        ]
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_user_recommendation_candidate",
+            set_={
+                "rank": stmt.excluded.rank,
+                "base_score": stmt.excluded.base_score,
+                "primary_genre": stmt.excluded.primary_genre,
+                "source_movie_id": stmt.excluded.source_movie_id,
+                "reason": stmt.excluded.reason,
+                "computed_at": stmt.excluded.computed_at,
+            },
+        )
+    )
+
+
+async def load_user_candidates(
+    session: AsyncSession,
+    *,
+    user_id: int,
+    variant: str,
+    now: datetime,
+) -> list[RankedCandidate] | None:
+    """Return the precomputed candidates, or ``None`` when missing or stale."""
+    rows = (
+        await session.execute(
+            select(UserRecommendationCandidate)
+            .where(
+                UserRecommendationCandidate.user_id == user_id,
+                UserRecommendationCandidate.variant == variant,
+            )
+            .order_by(UserRecommendationCandidate.rank.asc())
+        )
+    ).scalars().all()
+    if not rows:
+        return None
+    max_age = timedelta(seconds=settings.recommendation_candidate_max_age_seconds)
+    if rows[0].computed_at < now - max_age:
+        return None
+    return [
+        RankedCandidate(
+            movie_id=row.movie_id,
+            base_score=row.base_score,
+            primary_genre=row.primary_genre,
+            source_movie_id=row.source_movie_id,
+            reason=row.reason,
+        )
+        for row in rows
+    ]
+
+
+async def get_user_candidates(
+    session: AsyncSession,
+    *,
+    user_id: int,
+    variant: RankerVariant,
+    now: datetime,
+) -> list[RankedCandidate]:
+    """Read precomputed candidates, building and storing them inline on a miss."""
+    candidates = await load_user_candidates(
+        session,
+        user_id=user_id,
+        variant=variant.name,
+        now=now,
+    )
+    if candidates is not None:
+        return candidates
+    candidates = await build_user_candidates(session, user_id=user_id, variant=variant, now=now)
+    await store_user_candidates(
+        session,
+        user_id=user_id,
+        variant=variant.name,
+        candidates=candidates,
+        computed_at=now,
+    )
+    return candidates
+
+
+async def invalidate_user_candidates(session: AsyncSession, *, user_id: int) -> None:
+    await session.execute(
+        delete(UserRecommendationCandidate).where(UserRecommendationCandidate.user_id == user_id)
+    )
+
+
+async def precompute_user_candidates(
+    session: AsyncSession,
+    *,
+    user_id: int,
+    variant: RankerVariant,
+) -> int:
+    now = datetime.now(tz=UTC)
+    candidates = await build_user_candidates(session, user_id=user_id, variant=variant, now=now)
+    await store_user_candidates(
+        session,
+        user_id=user_id,
+        variant=variant.name,
+        candidates=candidates,
+        computed_at=now,
+    )
+    return len(candidates)
+
+
+async def list_active_recommendation_user_ids(session: AsyncSession) -> list[int]:
+    cutoff = datetime.now(tz=UTC) - timedelta(days=settings.recommendation_active_user_days)
+    active_users = union(
+        select(Order.user_id.label("user_id")).where(Order.created_at >= cutoff),
+        select(UserMovieEvent.user_id.label("user_id")).where(UserMovieEvent.created_at >= cutoff),
+    ).subquery()
+    return list(
+        (
+            await session.execute(
+                select(active_users.c.user_id).order_by(active_users.c.user_id.asc())
+            )
+        ).scalars()
+    )
+
+
+async def precompute_user_candidates_job(user_id: int) -> int:
+    variant = await resolve_user_variant(user_id)
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            return await precompute_user_candidates(session, user_id=user_id, variant=variant)
+
+
+async def precompute_active_user_candidates_job() -> int:
+    async with AsyncSessionLocal() as session:
+        user_ids = await list_active_recommendation_user_ids(session)
+    for user_id in user_ids:
+        variant = await resolve_user_variant(user_id)
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await precompute_user_candidates(session, user_id=user_id, variant=variant)
+    return len(user_ids)
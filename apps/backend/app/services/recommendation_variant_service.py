@@ -0,0 +1,97 @@
+import hashlib
+from dataclasses import dataclass
+from time import monotonic
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.recommendation import RecommendationVariant
+
+# Built-in (personalized, popularity, freshness) blends, used when the variants table
+# has no active rows.
+RANKER_VARIANT_WEIGHTS: dict[str, tuple[float, float, float]] = {
+    "A": (0.60, 0.22, 0.18),
+    "B": (0.48, 0.32, 0.20),
+}
+
+
+@dataclass(frozen=True)
+class RankerVariant:
+    name: str
+    weights: tuple[float, float, float]
+    traffic_weight: int = 1
+
+
+@dataclass
+class _VariantTableCache:
+    variants: tuple[RankerVariant, ...] = ()
+    loaded_at: float | None = None
+
+
+_variant_table_cache = _VariantTableCache()
+
+
+def weights_for_variant(variant: str) -> tuple[float, float, float]:
+    return RANKER_VARIANT_WEIGHTS.get(variant.upper(), RANKER_VARIANT_WEIGHTS["A"])
+
+
+def default_variant() -> RankerVariant:
+    name = settings.recommendation_ranker_variant.upper()
+    return RankerVariant(name=name, weights=weights_for_variant(name))
+
+
+async def load_variant_table() -> tuple[RankerVariant, ...]:
+    async with AsyncSessionLocal() as session:
+        rows = (
+            await session.execute(
+                select(RecommendationVariant)
+                .where(
+                    RecommendationVariant.is_active.is_(True),
+                    RecommendationVariant.traffic_weight > 0,
+                )
+                .order_by(RecommendationVariant.name.asc())
+            )
+        ).scalars()
+        return tuple(
+            RankerVariant(
+                name=row.name,
+                weights=(row.personalized_weight, row.popularity_weight, row.freshness_weight),
+                traffic_weight=row.traffic_weight,
+            )
+            for row in rows
+        )
+
+
+async def get_variant_table() -> tuple[RankerVariant, ...]:
+    """Return the active variants, reloading this process's copy once it is too old."""
+    loaded_at = _variant_table_cache.loaded_at
+    max_age = settings.recommendation_variant_refresh_seconds
+    if loaded_at is None or monotonic() - loaded_at >= max_age:
+        _variant_table_cache.variants = await load_variant_table()
+        _variant_table_cache.loaded_at = monotonic()
+    return _variant_table_cache.variants
+
+
+def invalidate_variant_table() -> None:
+    _variant_table_cache.loaded_at = None
+
+
+def assign_variant(user_id: int, variants: tuple[RankerVariant, ...]) -> RankerVariant:
+    """Deterministically bucket a user by hashing their id against the traffic weights."""
+    if not variants:
+        return default_variant()
+    total_weight = sum(variant.traffic_weight for variant in variants)
+    digest = hashlib.sha256(
+        f"{settings.recommendation_assignment_salt}:{user_id}".encode()
+    ).digest()
+    point = int.from_bytes(digest[:8], "big") % total_weight
+    for variant in variants:
+        if point < variant.traffic_weight:
+            return variant
+        point -= variant.traffic_weight
+    return variants[-1]
+
+
+async def resolve_user_variant(user_id: int) -> RankerVariant:
+    return assign_variant(user_id, await get_variant_table())
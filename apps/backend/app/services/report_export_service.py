@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Numeric, Select, case, cast, func, select
+
+from app.db.session import AsyncSessionLocal
+from app.models.movie import Movie
+from app.models.order import Order, Ticket
+from app.models.sales_rollup import ShowtimeSalesRollup
+from app.models.showtime import Auditorium, Seat, Showtime, Theater
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _orders_statement(date_from: datetime | None, date_to: datetime | None) -> Select:
+    stmt = select(
+        Order.id.label("order_id"),
+        Order.user_id,
+        Order.showtime_id,
+        Order.reservation_id,
+        Order.status,
+        Order.total_cents,
+        Order.currency,
+        Order.provider,
+        Order.created_at,
+    )
+    if date_from is not None:
+        stmt = stmt.where(Order.created_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Order.created_at < date_to)
+    return stmt.order_by(Order.id.asc())
+
+
+def _tickets_statement(date_from: datetime | None, date_to: datetime | None) -> Select:
+    stmt = (
+        select(
+            Ticket.id.label("ticket_id"),
+            Ticket.order_id,
+            Order.showtime_id,
+            Seat.seat_code,
+            Seat.seat_type,
+            Ticket.status,
+            Ticket.used_at,
+            Ticket.created_at,
+        )
+        .join(Order, Order.id == Ticket.order_id)
+        .join(Seat, Seat.id == Ticket.seat_id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(Ticket.created_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Ticket.created_at < date_to)
+    return stmt.order_by(Ticket.id.asc())
+
+
+def _occupancy_statement(date_from: datetime | None, date_to: datetime | None) -> Select:
+    capacity = func.coalesce(ShowtimeSalesRollup.capacity, 0)
+    sold_seats = func.coalesce(ShowtimeSalesRollup.sold_seats, 0)
+    stmt = (
+        select(
+            Showtime.id.label("showtime_id"),
+            Movie.title.label("movie_title"),
+            Theater.name.label("theater_name"),
+            Showtime.starts_at,
+            capacity.label("capacity"),
+            sold_seats.label("sold_seats"),
+            func.coalesce(ShowtimeSalesRollup.held_seats, 0).label("held_seats"),
+            func.round(
+                cast(case((capacity == 0, 0), else_=sold_seats * 100.0 / capacity), Numeric),
+                2,
+            ).label("occupancy_percent"),
+            func.coalesce(ShowtimeSalesRollup.revenue_cents, 0).label("revenue_cents"),
+        )
+        .join(Movie, Movie.id == Showtime.movie_id)
+        .join(Auditorium, Auditorium.id == Showtime.auditorium_id)
+        .join(Theater, Theater.id == Auditorium.theater_id)
+        .outerjoin(ShowtimeSalesRollup, ShowtimeSalesRollup.showtime_id == Showtime.id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(Showtime.starts_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Showtime.starts_at < date_to)
+    return stmt.order_by(Showtime.starts_at.asc(), Showtime.id.asc())
+
+
+_STATEMENT_BUILDERS = {
+    "orders": _orders_statement,
+    "tickets": _tickets_statement,
+    "occupancy": _occupancy_statement,
+}
+EXPORT_DATASETS = tuple(_STATEMENT_BUILDERS)
+
+
+def _export_value(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _encode_csv(rows: Sequence[dict], columns: list[str], *, include_header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_export_value(row[column]) for column in columns])
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows: Sequence[dict]) -> str:
+    return "".join(
+        json.dumps({key: _export_value(value) for key, value in row.items()}) + "\n"
+        for row in rows
+    )
+
+
+async def stream_report_export(
+    *,
+    dataset: str,
+    export_format: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> AsyncIterator[str]:
+    """Yield encoded export chunks from a server-side cursor, one batch at a time.
+
+    The generator owns its session so the cursor outlives the request dependency scope
+    while the response body is being streamed.
+    """
+    stmt = _STATEMENT_BUILDERS[dataset](date_from, date_to)
+    columns = [column.name for column in stmt.selected_columns]
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == "csv":
+            yield _encode_csv([], columns, include_header=True)
+        async for partition in result.mappings().partitions():
+            if export_format == "csv":
+                yield _encode_csv(partition, columns, include_header=False)
+            else:
+                yield _encode_ndjson(partition)
@@ -1,41 +1,164 @@
+import logging
+from collections import Counter, defaultdict
+from collections.abc import Iterable
 from datetime import UTC, datetime, timedelta
 
 from fastapi import HTTPException
-from sqlalchemy import select, update
+from sqlalchemy import delete, exists, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.db.retry import run_transaction
 from app.db.session import AsyncSessionLocal
+from app.models.order import Order
 from app.models.reservation import Reservation, ReservationSeat, ShowtimeSeatStatus
-from app.models.showtime import Showtime
+from app.models.showtime import Auditorium, Seat, SeatMap, Showtime
+from app.services import hold_expiry_queue, hold_store
+from app.services.hold_store import RedisHold
+from app.services.sales_rollup_service import apply_sales_rollup_delta
+from app.services.seat_selection import GridSeat, SeatGrid, build_seat_grid, find_best_seat_blocks
+
+logger = logging.getLogger(__name__)
+
+MAX_BLOCK_CLAIM_ATTEMPTS = 25
 
 
 class ReservationService:
     async def expire_overdue_holds(self, session: AsyncSession) -> int:
-        now = datetime.now(tz=UTC)
-        expired_ids = list(
+        """Expire every lapsed hold; the beat backstop behind the expiry queue."""
+        expired_ids = (
+            await session.execute(
+                select(Reservation.id).where(
+                    Reservation.status == "ACTIVE",
+                    Reservation.expires_at <= datetime.now(tz=UTC),
+                )
+            )
+        ).scalars()
+        return await self.expire_holds(session, expired_ids)
+
+    async def expire_holds(self, session: AsyncSession, reservation_ids: Iterable[int]) -> int:
+        """Expire the given reservations that are still active and past ``expires_at``.
+
+        Only those reservations and the seat statuses they hold are touched, so callers
+        that know which holds may have lapsed never scan the reservations table.
+        """
+        expired_holds, released_seats = await self._expire_reservations(session, reservation_ids)
+        for showtime_id in sorted(set(expired_holds).union(released_seats)):
+            await apply_sales_rollup_delta(
+                session,
+                showtime_id=showtime_id,
+                held_seats=-released_seats[showtime_id],
+                active_holds=-expired_holds[showtime_id],
+            )
+        return expired_holds.total()
+
+    async def expire_lapsed_holders(
+        self,
+        session: AsyncSession,
+        *,
+        showtime_id: int,
+    ) -> tuple[int, int]:
+        """Expire lapsed holds on a showtime's seats that the expiry queue has not reached.
+
+        Keeps seats from looking taken in the moment between a hold lapsing and the
+        consumer releasing it. Returns the expired hold and released seat counts; the
+        caller folds them into its own rollup update.
+        """
+        expired_holds, released_seats = await self._expire_reservations(
+            session,
+            await self._lapsed_holder_ids(session, showtime_id=showtime_id),
+        )
+        return expired_holds[showtime_id], released_seats[showtime_id]
+
+    async def _lapsed_holder_ids(
+        self,
+        session: AsyncSession,
+        *,
+        showtime_id: int,
+        seat_ids: list[int] | None = None,
+    ) -> list[int]:
+        # Goes through the seat status rows rather than scanning reservations.
+        query = (
+            select(ShowtimeSeatStatus.held_by_reservation_id)
+            .join(Reservation, Reservation.id == ShowtimeSeatStatus.held_by_reservation_id)
+            .where(
+                ShowtimeSeatStatus.showtime_id == showtime_id,
+                ShowtimeSeatStatus.status == "HELD",
+                Reservation.expires_at <= datetime.now(tz=UTC),
+            )
+            .distinct()
+        )
+        if seat_ids is not None:
+            query = query.where(ShowtimeSeatStatus.seat_id.in_(seat_ids))
+        return list((await session.execute(query)).scalars())
+
+    async def _lock_lapsed_reservations(
+        self,
+        session: AsyncSession,
+        reservation_ids: Iterable[int],
+    ) -> list[int]:
+        """Lock the given reservations that are active but past expiry, in id order."""
+        candidate_ids = sorted(set(reservation_ids))
+        if not candidate_ids:
+            return []
+        return list(
             (
                 await session.execute(
-                    select(Reservation.id).where(
+                    select(Reservation.id)
+                    .where(
+                        Reservation.id.in_(candidate_ids),
                         Reservation.status == "ACTIVE",
-                        Reservation.expires_at <= now,
+                        Reservation.expires_at <= datetime.now(tz=UTC),
                     )
+                    .order_by(Reservation.id)
+                    .with_for_update()
                 )
             ).scalars()
         )
+
+    async def _expire_reservations(
+        self,
+        session: AsyncSession,
+        reservation_ids: Iterable[int],
+    ) -> tuple[Counter[int], Counter[int]]:
+        """Expire lapsed reservations and free their seats, leaving the rollup to the caller.
+
+        Reservations are locked in id order, then their seat statuses in (showtime, seat)
+        order, so the rollup row stays the last lock the transaction takes. Returns the
+        expired holds and released seats per showtime.
+        """
+        expired_ids = await self._lock_lapsed_reservations(session, reservation_ids)
         if not expired_ids:
-            return 0
+            return Counter(), Counter()
 
-        await session.execute(
-            update(Reservation)
-            .where(Reservation.id.in_(expired_ids))
-            .values(status="EXPIRED")
+        expired_holds = Counter(
+            (
+                await session.execute(
+                    update(Reservation)
+                    .where(Reservation.id.in_(expired_ids))
+                    .values(status="EXPIRED")
+                    .returning(Reservation.showtime_id)
+                )
+            ).scalars()
         )
-        await session.execute(
-            update(ShowtimeSeatStatus)
+        held_seats = (
+            select(ShowtimeSeatStatus.id)
             .where(ShowtimeSeatStatus.held_by_reservation_id.in_(expired_ids))
-            .values(status="AVAILABLE", held_by_reservation_id=None)
+            .order_by(ShowtimeSeatStatus.showtime_id, ShowtimeSeatStatus.seat_id)
+            .with_for_update()
         )
-        return len(expired_ids)
+        released_seats = Counter(
+            (
+                await session.execute(
+                    update(ShowtimeSeatStatus)
+                    .where(ShowtimeSeatStatus.id.in_(held_seats))
+                    .values(status="AVAILABLE", held_by_reservation_id=None)
+                    .returning(ShowtimeSeatStatus.showtime_id)
+                )
+            ).scalars()
+        )
+        return expired_holds, released_seats
 
     async def create_hold(
         self,
@@ -56,7 +179,32 @@ class ReservationService:
         if showtime_exists is None:
             raise HTTPException(status_code=404, detail="Showtime not found")
 
-        await self.expire_overdue_holds(session)
+        lapsed_ids = await self._lock_lapsed_reservations(
+            session,
+            await self._lapsed_holder_ids(
+                session,
+                showtime_id=showtime_id,
+                seat_ids=unique_seat_ids,
+            ),
+        )
+        expired_holds = released_seats = 0
+        if lapsed_ids:
+            # Lapsed holds may own seats outside the request; all of them are locked by one
+            # ordered statement so two buyers can never take the same seats in a cycle.
+            await session.execute(
+                select(ShowtimeSeatStatus.id)
+                .where(
+                    ShowtimeSeatStatus.showtime_id == showtime_id,
+                    or_(
+                        ShowtimeSeatStatus.seat_id.in_(unique_seat_ids),
+                        ShowtimeSeatStatus.held_by_reservation_id.in_(lapsed_ids),
+                    ),
+                )
+                .order_by(ShowtimeSeatStatus.seat_id)
+                .with_for_update()
+            )
+            expired, released = await self._expire_reservations(session, lapsed_ids)
+            expired_holds, released_seats = expired[showtime_id], released[showtime_id]
 
         seat_statuses = list(
             (
@@ -66,6 +214,7 @@ class ReservationService:
                         ShowtimeSeatStatus.showtime_id == showtime_id,
                         ShowtimeSeatStatus.seat_id.in_(unique_seat_ids),
                     )
+                    .order_by(ShowtimeSeatStatus.seat_id)
                     .with_for_update()
                 )
             ).scalars()
@@ -85,6 +234,143 @@ class ReservationService:
                 detail=f"One or more seats are no longer available: {unavailable_text}",
             )
 
+        return await self._hold_locked_seats(
+            session,
+            user_id=user_id,
+            showtime_id=showtime_id,
+            seat_statuses=seat_statuses,
+            hold_minutes=hold_minutes,
+            expired_holds=expired_holds,
+            released_seats=released_seats,
+        )
+
+    async def create_best_available_hold(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: int,
+        showtime_id: int,
+        party_size: int,
+        seat_type: str | None,
+        hold_minutes: int,
+    ) -> Reservation:
+        """Hold the best contiguous block of ``party_size`` seats.
+
+        Blocks are ranked from an in-memory grid of the showtime's seats, then claimed in
+        order with ``FOR UPDATE SKIP LOCKED`` inside a savepoint. A block that another
+        buyer took or is holding a lock on is rolled back and the next block is tried, so
+        on-sale races resolve here instead of as a 409 for the client to retry.
+        """
+        auditorium_id = (
+            await session.execute(select(Showtime.auditorium_id).where(Showtime.id == showtime_id))
+        ).scalar_one_or_none()
+        if auditorium_id is None:
+            raise HTTPException(status_code=404, detail="Showtime not found")
+
+        expired_holds, released_seats = await self.expire_lapsed_holders(
+            session,
+            showtime_id=showtime_id,
+        )
+
+        grid = await self._load_seat_grid(session, showtime_id, auditorium_id)
+        taken_seat_ids: set[int] = set()
+        attempts = 0
+        for block in find_best_seat_blocks(grid, party_size=party_size, seat_type=seat_type):
+            if taken_seat_ids.intersection(block.seat_ids):
+                continue
+            if attempts >= MAX_BLOCK_CLAIM_ATTEMPTS:
+                break
+            attempts += 1
+            savepoint = await session.begin_nested()
+            seat_statuses = list(
+                (
+                    await session.execute(
+                        select(ShowtimeSeatStatus)
+                        .where(
+                            ShowtimeSeatStatus.showtime_id == showtime_id,
+                            ShowtimeSeatStatus.seat_id.in_(block.seat_ids),
+                            ShowtimeSeatStatus.status == "AVAILABLE",
+                        )
+                        .order_by(ShowtimeSeatStatus.seat_id)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).scalars()
+            )
+            if len(seat_statuses) == party_size:
+                await savepoint.commit()
+                return await self._hold_locked_seats(
+                    session,
+                    user_id=user_id,
+                    showtime_id=showtime_id,
+                    seat_statuses=seat_statuses,
+                    hold_minutes=hold_minutes,
+                    expired_holds=expired_holds,
+                    released_seats=released_seats,
+                )
+            claimed = {seat_status.seat_id for seat_status in seat_statuses}
+            taken_seat_ids.update(set(block.seat_ids).difference(claimed))
+            # Rolling back to the savepoint releases the row locks this attempt took.
+            await savepoint.rollback()
+
+        raise HTTPException(
+            status_code=409,
+            detail=f"No block of {party_size} adjacent seats is available",
+        )
+
+    async def _load_seat_grid(
+        self,
+        session: AsyncSession,
+        showtime_id: int,
+        auditorium_id: int,
+        held_seat_ids: set[int] | None = None,
+    ) -> SeatGrid:
+        layout_json = (
+            await session.execute(
+                select(SeatMap.layout_json)
+                .join(Auditorium, Auditorium.seatmap_id == SeatMap.id)
+                .where(Auditorium.id == auditorium_id)
+            )
+        ).scalar_one_or_none()
+        rows = await session.execute(
+            select(
+                Seat.id,
+                Seat.row_label,
+                Seat.seat_number,
+                Seat.seat_type,
+                ShowtimeSeatStatus.status,
+            )
+            .join(ShowtimeSeatStatus, ShowtimeSeatStatus.seat_id == Seat.id)
+            .where(ShowtimeSeatStatus.showtime_id == showtime_id)
+        )
+        seats = [
+            GridSeat(
+                seat_id=row.id,
+                row_label=row.row_label,
+                seat_number=row.seat_number,
+                seat_type=row.seat_type,
+                available=row.status == "AVAILABLE"
+                and (held_seat_ids is None or row.id not in held_seat_ids),
+            )
+            for row in rows
+        ]
+        return build_seat_grid(seats, layout_json)
+
+    async def _hold_locked_seats(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: int,
+        showtime_id: int,
+        seat_statuses: list[ShowtimeSeatStatus],
+        hold_minutes: int,
+        expired_holds: int = 0,
+        released_seats: int = 0,
+    ) -> Reservation:
+        """Hold seats the caller has locked and write one rollup delta for the showtime.
+
+        ``expired_holds`` and ``released_seats`` count lapsed holds the caller expired in
+        this transaction; folding them in keeps the rollup row the last lock taken.
+        """
         now = datetime.now(tz=UTC)
         reservation = Reservation(
             user_id=user_id,
@@ -97,8 +383,8 @@ class ReservationService:
 
         session.add_all(
             [
-                ReservationSeat(reservation_id=reservation.id, seat_id=seat_id)
-                for seat_id in unique_seat_ids
+                ReservationSeat(reservation_id=reservation.id, seat_id=seat_status.seat_id)
+                for seat_status in seat_statuses
             ]
         )
 
@@ -107,31 +393,505 @@ class ReservationService:
             seat_status.held_by_reservation_id = reservation.id
 
         await session.flush()
+        await apply_sales_rollup_delta(
+            session,
+            showtime_id=showtime_id,
+            held_seats=len(seat_statuses) - released_seats,
+            active_holds=1 - expired_holds,
+        )
+        await hold_expiry_queue.schedule_expiry(reservation.id, reservation.expires_at)
         return reservation
 
-    async def release_hold(
+    async def create_redis_hold(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: int,
+        showtime_id: int,
+        seat_ids: list[int],
+        hold_minutes: int,
+    ) -> RedisHold:
+        """Hold seats in Redis with the same validation and conflicts as ``create_hold``.
+
+        Postgres is only read: seats must exist and not be SOLD there, and the claim itself
+        is one atomic script. The reservation id comes from the reservations sequence so
+        the row written at checkout keeps it.
+        """
+        unique_seat_ids = sorted(set(seat_ids))
+        if not unique_seat_ids:
+            raise HTTPException(status_code=400, detail="seat_ids cannot be empty")
+
+        showtime_exists = (
+            await session.execute(select(Showtime.id).where(Showtime.id == showtime_id))
+        ).scalar_one_or_none()
+        if showtime_exists is None:
+            raise HTTPException(status_code=404, detail="Showtime not found")
+
+        seat_statuses = (
+            await session.execute(
+                select(ShowtimeSeatStatus.seat_id, ShowtimeSeatStatus.status).where(
+                    ShowtimeSeatStatus.showtime_id == showtime_id,
+                    ShowtimeSeatStatus.seat_id.in_(unique_seat_ids),
+                )
+            )
+        ).all()
+        if len(seat_statuses) != len(unique_seat_ids):
+            raise HTTPException(status_code=404, detail="One or more seats were not found")
+        unavailable_seat_ids = sorted(
+            seat_id for seat_id, seat_status in seat_statuses if seat_status != "AVAILABLE"
+        )
+        if not unavailable_seat_ids:
+            hold = await self._claim_redis_hold(
+                session,
+                user_id=user_id,
+                showtime_id=showtime_id,
+                seat_ids=unique_seat_ids,
+                hold_minutes=hold_minutes,
+            )
+            if isinstance(hold, RedisHold):
+                return hold
+            unavailable_seat_ids = hold
+        unavailable_text = ",".join(str(seat_id) for seat_id in unavailable_seat_ids)
+        raise HTTPException(
+            status_code=409,
+            detail=f"One or more seats are no longer available: {unavailable_text}",
+        )
+
+    async def create_best_available_redis_hold(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: int,
+        showtime_id: int,
+        party_size: int,
+        seat_type: str | None,
+        hold_minutes: int,
+    ) -> RedisHold:
+        """Redis counterpart of ``create_best_available_hold``; lost blocks retry here too."""
+        auditorium_id = (
+            await session.execute(select(Showtime.auditorium_id).where(Showtime.id == showtime_id))
+        ).scalar_one_or_none()
+        if auditorium_id is None:
+            raise HTTPException(status_code=404, detail="Showtime not found")
+
+        grid = await self._load_seat_grid(
+            session,
+            showtime_id,
+            auditorium_id,
+            held_seat_ids=await hold_store.held_seat_ids(showtime_id),
+        )
+        reservation_id = await self._next_reservation_id(session)
+        taken_seat_ids: set[int] = set()
+        attempts = 0
+        for block in find_best_seat_blocks(grid, party_size=party_size, seat_type=seat_type):
+            if taken_seat_ids.intersection(block.seat_ids):
+                continue
+            if attempts >= MAX_BLOCK_CLAIM_ATTEMPTS:
+                break
+            attempts += 1
+            hold = await self._claim_redis_hold(
+                session,
+                user_id=user_id,
+                showtime_id=showtime_id,
+                seat_ids=list(block.seat_ids),
+                hold_minutes=hold_minutes,
+                reservation_id=reservation_id,
+            )
+            if isinstance(hold, RedisHold):
+                return hold
+            taken_seat_ids.update(hold)
+
+        raise HTTPException(
+            status_code=409,
+            detail=f"No block of {party_size} adjacent seats is available",
+        )
+
+    async def _claim_redis_hold(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: int,
+        showtime_id: int,
+        seat_ids: list[int],
+        hold_minutes: int,
+        reservation_id: int | None = None,
+    ) -> RedisHold | list[int]:
+        """Claim the seats in Redis; returns the hold, or the conflicting seat ids."""
+        if reservation_id is None:
+            reservation_id = await self._next_reservation_id(session)
+        created_at, expires_at = hold_store.hold_expiry(hold_minutes)
+        conflicts = await hold_store.claim_seats(
+            reservation_id=reservation_id,
+            user_id=user_id,
+            showtime_id=showtime_id,
+            seat_ids=seat_ids,
+            expires_at=expires_at,
+            created_at=created_at,
+        )
+        if conflicts:
+            return conflicts
+        return RedisHold(
+            reservation_id=reservation_id,
+            user_id=user_id,
+            showtime_id=showtime_id,
+            seat_ids=sorted(seat_ids),
+            status="ACTIVE",
+            expires_at=expires_at,
+            created_at=created_at,
+        )
+
+    async def _next_reservation_id(self, session: AsyncSession) -> int:
+        return (
+            await session.execute(
+                text("SELECT nextval(pg_get_serial_sequence('reservations', 'id'))")
+            )
+        ).scalar_one()
+
+    async def persist_redis_hold(self, session: AsyncSession, hold: RedisHold) -> None:
+        """Write a Redis hold's reservation and seats to Postgres when checkout starts.
+
+        Orders reference reservations, so this is the first Postgres write for a Redis
+        hold. Seat statuses stay untouched until the order is paid; the rollup counts the
+        hold as active so expiry and finalization balance it as for database holds.
+        """
+        inserted_id = (
+            await session.execute(
+                insert(Reservation)
+                .values(
+                    id=hold.reservation_id,
+                    user_id=hold.user_id,
+                    showtime_id=hold.showtime_id,
+                    status="ACTIVE",
+                    expires_at=hold.expires_at,
+                    created_at=hold.created_at,
+                )
+                .on_conflict_do_nothing(index_elements=[Reservation.id])
+                .returning(Reservation.id)
+            )
+        ).scalar_one_or_none()
+        if inserted_id is None:
+            return
+        await session.execute(
+            insert(ReservationSeat).values(
+                [
+                    {"reservation_id": hold.reservation_id, "seat_id": seat_id}
+                    for seat_id in hold.seat_ids
+                ]
+            )
+        )
+        await apply_sales_rollup_delta(session, showtime_id=hold.showtime_id, active_holds=1)
+        await hold_expiry_queue.schedule_expiry(hold.reservation_id, hold.expires_at)
+
+    async def modify_hold(
         self,
         session: AsyncSession,
         *,
         reservation: Reservation,
+        add_seat_ids: list[int],
+        remove_seat_ids: list[int],
     ) -> None:
+        """Add and drop seats on an active hold in the caller's transaction.
+
+        Only the delta ``ShowtimeSeatStatus`` rows are locked and written, in seat id order
+        like ``create_hold``, and ``expires_at`` is kept so changing seats never extends a
+        hold. The caller must hold the reservation row lock.
+        """
+        if reservation.status != "ACTIVE" or reservation.expires_at <= datetime.now(tz=UTC):
+            raise HTTPException(status_code=409, detail="Reservation is not active")
+        in_checkout = (
+            await session.execute(select(Order.id).where(Order.reservation_id == reservation.id))
+        ).scalar_one_or_none()
+        if in_checkout is not None:
+            raise HTTPException(
+                status_code=409,
+                detail="Seats cannot change once checkout has started",
+            )
+
+        current_seat_ids = set(
+            (
+                await session.execute(
+                    select(ReservationSeat.seat_id).where(
+                        ReservationSeat.reservation_id == reservation.id
+                    )
+                )
+            ).scalars()
+        )
+        added, removed = _seat_delta(current_seat_ids, add_seat_ids, remove_seat_ids)
+
+        # Added and removed seats are locked together in seat id order, before either set is
+        # validated or written, so a swap never waits on a seat it passed over.
+        seat_statuses = list(
+            (
+                await session.execute(
+                    select(ShowtimeSeatStatus)
+                    .where(
+                        ShowtimeSeatStatus.showtime_id == reservation.showtime_id,
+                        ShowtimeSeatStatus.seat_id.in_([*added, *removed]),
+                    )
+                    .order_by(ShowtimeSeatStatus.seat_id)
+                    .with_for_update()
+                )
+            ).scalars()
+        )
+        added_statuses = [
+            seat_status for seat_status in seat_statuses if seat_status.seat_id in added
+        ]
+        if len(added_statuses) != len(added):
+            raise HTTPException(status_code=404, detail="One or more seats were not found")
+        unavailable_seat_ids = [
+            seat_status.seat_id
+            for seat_status in added_statuses
+            if seat_status.status != "AVAILABLE"
+        ]
+        if unavailable_seat_ids:
+            unavailable_text = ",".join(str(seat_id) for seat_id in unavailable_seat_ids)
+            raise HTTPException(
+                status_code=409,
+                detail=f"One or more seats are no longer available: {unavailable_text}",
+            )
+
+        released_count = 0
+        for seat_status in seat_statuses:
+            if seat_status.seat_id in added:
+                seat_status.status = "HELD"
+                seat_status.held_by_reservation_id = reservation.id
+            elif (
+                seat_status.status == "HELD"
+                and seat_status.held_by_reservation_id == reservation.id
+            ):
+                seat_status.status = "AVAILABLE"
+                seat_status.held_by_reservation_id = None
+                released_count += 1
+        session.add_all(
+            [ReservationSeat(reservation_id=reservation.id, seat_id=seat_id) for seat_id in added]
+        )
+        if removed:
+            await session.execute(
+                delete(ReservationSeat).where(
+                    ReservationSeat.reservation_id == reservation.id,
+                    ReservationSeat.seat_id.in_(removed),
+                )
+            )
+
+        await session.flush()
+        if added or released_count:
+            await apply_sales_rollup_delta(
+                session,
+                showtime_id=reservation.showtime_id,
+                held_seats=len(added) - released_count,
+            )
+
+    async def modify_redis_hold(
+        self,
+        session: AsyncSession,
+        *,
+        hold: RedisHold,
+        add_seat_ids: list[int],
+        remove_seat_ids: list[int],
+    ) -> RedisHold:
+        """Redis counterpart of ``modify_hold``: re-claim the new seat set, then drop the rest.
+
+        The claim script treats seats the hold already owns as free, so the new set is
+        claimed atomically with the original expiry before removed seats are released.
+        """
+        if hold.status != "ACTIVE":
+            raise HTTPException(status_code=409, detail="Reservation is not active")
+        in_checkout = (
+            await session.execute(
+                select(Reservation.id).where(Reservation.id == hold.reservation_id)
+            )
+        ).scalar_one_or_none()
+        if in_checkout is not None:
+            raise HTTPException(
+                status_code=409,
+                detail="Seats cannot change once checkout has started",
+            )
+
+        added, removed = _seat_delta(set(hold.seat_ids), add_seat_ids, remove_seat_ids)
+        if added:
+            seat_statuses = (
+                await session.execute(
+                    select(ShowtimeSeatStatus.seat_id, ShowtimeSeatStatus.status).where(
+                        ShowtimeSeatStatus.showtime_id == hold.showtime_id,
+                        ShowtimeSeatStatus.seat_id.in_(added),
+                    )
+                )
+            ).all()
+            if len(seat_statuses) != len(added):
+                raise HTTPException(status_code=404, detail="One or more seats were not found")
+            unavailable_seat_ids = sorted(
+                seat_id for seat_id, seat_status in seat_statuses if seat_status != "AVAILABLE"
+            )
+        else:
+            unavailable_seat_ids = []
+
+        seat_ids = sorted(set(hold.seat_ids).union(added).difference(removed))
+        if not unavailable_seat_ids:
+            unavailable_seat_ids = await hold_store.claim_seats(
+                reservation_id=hold.reservation_id,
+                user_id=hold.user_id,
+                showtime_id=hold.showtime_id,
+                seat_ids=seat_ids,
+                expires_at=hold.expires_at,
+                created_at=hold.created_at,
+            )
+        if unavailable_seat_ids:
+            unavailable_text = ",".join(str(seat_id) for seat_id in unavailable_seat_ids)
+            raise HTTPException(
+                status_code=409,
+                detail=f"One or more seats are no longer available: {unavailable_text}",
+            )
+        if removed:
+            await hold_store.release_seats(hold, removed)
+        return RedisHold(
+            reservation_id=hold.reservation_id,
+            user_id=hold.user_id,
+            showtime_id=hold.showtime_id,
+            seat_ids=seat_ids,
+            status=hold.status,
+            expires_at=hold.expires_at,
+            created_at=hold.created_at,
+        )
+
+    async def release_hold(
+        self,
+        session: AsyncSession,
+        *,
+        reservation: Reservation,
+    ) -> list[int]:
+        """Cancel an active hold; returns the seat ids it released."""
         if reservation.status != "ACTIVE":
-            return
+            return []
 
         reservation.status = "CANCELED"
-        await session.execute(
-            update(ShowtimeSeatStatus)
+        held_seats = (
+            select(ShowtimeSeatStatus.id)
             .where(
                 ShowtimeSeatStatus.showtime_id == reservation.showtime_id,
                 ShowtimeSeatStatus.held_by_reservation_id == reservation.id,
                 ShowtimeSeatStatus.status == "HELD",
             )
-            .values(status="AVAILABLE", held_by_reservation_id=None)
+            .order_by(ShowtimeSeatStatus.seat_id)
+            .with_for_update()
+        )
+        released_seat_ids = list(
+            (
+                await session.execute(
+                    update(ShowtimeSeatStatus)
+                    .where(ShowtimeSeatStatus.id.in_(held_seats))
+                    .values(status="AVAILABLE", held_by_reservation_id=None)
+                    .returning(ShowtimeSeatStatus.seat_id)
+                )
+            ).scalars()
+        )
+        await apply_sales_rollup_delta(
+            session,
+            showtime_id=reservation.showtime_id,
+            held_seats=-len(released_seat_ids),
+            active_holds=-1,
         )
+        return released_seat_ids
+
+
+def _seat_delta(
+    current_seat_ids: set[int],
+    add_seat_ids: list[int],
+    remove_seat_ids: list[int],
+) -> tuple[list[int], list[int]]:
+    """Validate a hold change; returns the seats to add and remove, each sorted."""
+    not_held = sorted(set(remove_seat_ids).difference(current_seat_ids))
+    if not_held:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Seats are not part of this reservation: {','.join(map(str, not_held))}",
+        )
+    added = sorted(set(add_seat_ids).difference(current_seat_ids))
+    removed = sorted(set(remove_seat_ids))
+    if len(current_seat_ids) + len(added) - len(removed) < 1:
+        raise HTTPException(status_code=400, detail="A reservation must keep at least one seat")
+    return added, removed
 
 
 async def expire_overdue_holds_job() -> int:
     service = ReservationService()
     async with AsyncSessionLocal() as session:
-        async with session.begin():
-            return await service.expire_overdue_holds(session)
+        return await run_transaction(
+            session,
+            lambda: service.expire_overdue_holds(session),
+            operation="hold_expiry_sweep",
+        )
+
+
+async def expire_due_holds_job(limit: int | None = None) -> int:
+    """Expire one batch of holds popped from the expiry queue; returns how many expired."""
+    reservation_ids = await hold_expiry_queue.pop_due(
+        limit or settings.reservation_expiry_batch_size
+    )
+    if not reservation_ids:
+        return 0
+    service = ReservationService()
+    try:
+        async with AsyncSessionLocal() as session:
+            return await run_transaction(
+                session,
+                lambda: service.expire_holds(session, reservation_ids),
+                operation="hold_expiry",
+            )
+    except Exception:
+        await hold_expiry_queue.requeue(reservation_ids)
+        raise
+
+
+async def reconcile_redis_holds_job() -> dict[str, int]:
+    """Keep Redis holds and Postgres consistent when the Redis hold backend is on.
+
+    Expired seat fields are pruned, and reservations that reached checkout (so exist in
+    Postgres) but whose hold vanished from Redis, e.g. after a Redis restart, are claimed
+    again for their remaining time. A restore that conflicts is counted as lost; its
+    payment will fail finalization rather than oversell.
+    """
+    counts = {"pruned_seats": 0, "restored_holds": 0, "lost_holds": 0}
+    if not hold_store.redis_holds_enabled():
+        return counts
+    counts["pruned_seats"] = await hold_store.prune_expired_seats()
+
+    async with AsyncSessionLocal() as session:
+        reservations = (
+            await session.execute(
+                select(Reservation).where(
+                    Reservation.status == "ACTIVE",
+                    Reservation.expires_at > datetime.now(tz=UTC),
+                    ~exists().where(ShowtimeSeatStatus.held_by_reservation_id == Reservation.id),
+                )
+            )
+        ).scalars().all()
+        seats_by_reservation: dict[int, list[int]] = defaultdict(list)
+        if reservations:
+            seat_rows = await session.execute(
+                select(ReservationSeat.reservation_id, ReservationSeat.seat_id).where(
+                    ReservationSeat.reservation_id.in_([item.id for item in reservations])
+                )
+            )
+            for reservation_id, seat_id in seat_rows:
+                seats_by_reservation[reservation_id].append(seat_id)
+
+    for reservation in reservations:
+        if await hold_store.get_hold(reservation.id) is not None:
+            continue
+        conflicts = await hold_store.claim_seats(
+            reservation_id=reservation.id,
+            user_id=reservation.user_id,
+            showtime_id=reservation.showtime_id,
+            seat_ids=seats_by_reservation[reservation.id],
+            expires_at=reservation.expires_at,
+            created_at=reservation.created_at,
+        )
+        if conflicts:
+            counts["lost_holds"] += 1
+            logger.warning(
+                "redis_hold_restore_conflict",
+                extra={"reservation_id": reservation.id, "seat_ids": conflicts},
+            )
+        else:
+            counts["restored_holds"] += 1
+    return counts
@@ -0,0 +1,196 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.order import Order
+from app.models.reservation import Reservation, ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
+from app.models.showtime import Showtime
+
+# Showtimes reconciled per transaction; only their rollup rows are locked meanwhile.
+RECONCILE_BATCH_SIZE = 50
+
+ROLLUP_COUNTER_FIELDS = (
+    "sold_seats",
+    "held_seats",
+    "active_holds",
+    "paid_orders",
+    "revenue_cents",
+)
+
+# Seat counts for showtime reads, taken from the rollup row the hold, release, expiry and
+# finalize paths already maintain. Outer join ShowtimeSalesRollup on showtime_id to use them.
+SHOWTIME_SEAT_COUNT_COLUMNS = (
+    func.greatest(
+        func.coalesce(
+            ShowtimeSalesRollup.capacity
+            - ShowtimeSalesRollup.held_seats
+            - ShowtimeSalesRollup.sold_seats,
+            0,
+        ),
+        0,
+    ).label("available_seats"),
+    func.coalesce(ShowtimeSalesRollup.held_seats, 0).label("held_seats"),
+    func.coalesce(ShowtimeSalesRollup.sold_seats, 0).label("sold_seats"),
+)
+
+
+async def apply_sales_rollup_delta(
+    session: AsyncSession,
+    *,
+    showtime_id: int,
+    capacity: int | None = None,
+    **deltas: int,
+) -> None:
+    """Add counter deltas to a showtime rollup row, creating the row on first write.
+
+    Runs inside the caller's transaction so the rollup commits or rolls back together
+    with the seat status change it describes.
+    """
+    unknown_fields = set(deltas).difference(ROLLUP_COUNTER_FIELDS)
+    if unknown_fields:
+        raise ValueError(f"Unknown rollup fields: {','.join(sorted(unknown_fields))}")
+    changed = {field: value for field, value in deltas.items() if value}
+    if not changed and capacity is None:
+        return
+
+    insert_values: dict[str, int] = {"showtime_id": showtime_id, "capacity": capacity or 0}
+    insert_values.update({field: max(0, changed.get(field, 0)) for field in ROLLUP_COUNTER_FIELDS})
+    stmt = insert(ShowtimeSalesRollup).values(**insert_values)
+    update_values: dict[str, object] = {
+        field: func.greatest(getattr(ShowtimeSalesRollup, field) + value, 0)
+        for field, value in changed.items()
+    }
+    if capacity is not None:
+        update_values["capacity"] = capacity
+    update_values["updated_at"] = func.now()
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ShowtimeSalesRollup.showtime_id],
+            set_=update_values,
+        )
+    )
+
+
+async def sync_sales_rollup_capacities(session: AsyncSession, showtime_ids: list[int]) -> None:
+    """Set rollup capacity to each showtime's seat status count in one statement."""
+    if not showtime_ids:
+        return
+    source = (
+        select(Showtime.id, func.count(ShowtimeSeatStatus.id))
+        .outerjoin(ShowtimeSeatStatus, ShowtimeSeatStatus.showtime_id == Showtime.id)
+        .where(Showtime.id.in_(showtime_ids))
+        .group_by(Showtime.id)
+    )
+    stmt = insert(ShowtimeSalesRollup).from_select(["showtime_id", "capacity"], source)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ShowtimeSalesRollup.showtime_id],
+            set_={"capacity": stmt.excluded.capacity, "updated_at": func.now()},
+        )
+    )
+
+
+async def recompute_sales_rollups(session: AsyncSession, showtime_ids: list[int]) -> int:
+    """Rebuild the given showtimes' rollups from source tables to reconcile counter drift.
+
+    Their rollup rows are locked until the caller commits, before the snapshot is taken: a
+    delta already written is committed and counted first, a later one waits and applies
+    on top, so none is overwritten by an older snapshot. Other showtimes and readers are
+    not blocked.
+    """
+    if not showtime_ids:
+        return 0
+    # Seed missing rows first so a showtime's first delta also waits on the lock below.
+    await session.execute(
+        insert(ShowtimeSalesRollup)
+        .from_select(["showtime_id"], select(Showtime.id).where(Showtime.id.in_(showtime_ids)))
+        .on_conflict_do_nothing(index_elements=[ShowtimeSalesRollup.showtime_id])
+    )
+    await session.execute(
+        select(ShowtimeSalesRollup.showtime_id)
+        .where(ShowtimeSalesRollup.showtime_id.in_(showtime_ids))
+        .order_by(ShowtimeSalesRollup.showtime_id)
+        .with_for_update()
+    )
+    seat_counts = (
+        select(
+            ShowtimeSeatStatus.showtime_id.label("showtime_id"),
+            func.count(ShowtimeSeatStatus.id).label("capacity"),
+            func.count(ShowtimeSeatStatus.id)
+            .filter(ShowtimeSeatStatus.status == "SOLD")
+            .label("sold_seats"),
+            func.count(ShowtimeSeatStatus.id)
+            .filter(ShowtimeSeatStatus.status == "HELD")
+            .label("held_seats"),
+        )
+        .where(ShowtimeSeatStatus.showtime_id.in_(showtime_ids))
+        .group_by(ShowtimeSeatStatus.showtime_id)
+        .subquery()
+    )
+    hold_counts = (
+        select(
+            Reservation.showtime_id.label("showtime_id"),
+            func.count(Reservation.id).label("active_holds"),
+        )
+        .where(Reservation.status == "ACTIVE", Reservation.showtime_id.in_(showtime_ids))
+        .group_by(Reservation.showtime_id)
+        .subquery()
+    )
+    order_totals = (
+        select(
+            Order.showtime_id.label("showtime_id"),
+            func.count(Order.id).label("paid_orders"),
+            func.sum(Order.total_cents).label("revenue_cents"),
+        )
+        .where(Order.status == "PAID", Order.showtime_id.in_(showtime_ids))
+        .group_by(Order.showtime_id)
+        .subquery()
+    )
+    source = (
+        select(
+            Showtime.id,
+            func.coalesce(seat_counts.c.capacity, 0),
+            func.coalesce(seat_counts.c.sold_seats, 0),
+            func.coalesce(seat_counts.c.held_seats, 0),
+            func.coalesce(hold_counts.c.active_holds, 0),
+            func.coalesce(order_totals.c.paid_orders, 0),
+            func.coalesce(order_totals.c.revenue_cents, 0),
+        )
+        .outerjoin(seat_counts, seat_counts.c.showtime_id == Showtime.id)
+        .outerjoin(hold_counts, hold_counts.c.showtime_id == Showtime.id)
+        .outerjoin(order_totals, order_totals.c.showtime_id == Showtime.id)
+        .where(Showtime.id.in_(showtime_ids))
+    )
+    stmt = insert(ShowtimeSalesRollup).from_select(
+        ["showtime_id", "capacity", *ROLLUP_COUNTER_FIELDS],
+        source,
+    )
+    result = await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ShowtimeSalesRollup.showtime_id],
+            set_={
+                "capacity": stmt.excluded.capacity,
+                **{field: stmt.excluded[field] for field in ROLLUP_COUNTER_FIELDS},
+                "updated_at": func.now(),
+            },
+        )
+    )
+    return max(0, result.rowcount or 0)
+
+
+async def recompute_sales_rollups_job() -> int:
+    async with AsyncSessionLocal() as session:
+        showtime_ids = list(
+            (await session.execute(select(Showtime.id).order_by(Showtime.id))).scalars()
+        )
+    rollup_rows = 0
+    for start in range(0, len(showtime_ids), RECONCILE_BATCH_SIZE):
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                rollup_rows += await recompute_sales_rollups(
+                    session,
+                    showtime_ids[start : start + RECONCILE_BATCH_SIZE],
+                )
+    return rollup_rows
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_cache_json_many, set_cache_json_many
+from app.core.config import settings
+from app.models.movie import Movie
+from app.models.sales_rollup import ShowtimeSalesRollup
+from app.models.showtime import Auditorium, Showtime, Theater
+
+BUCKET_STEPS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+MAX_TIMESERIES_BUCKETS = 1000
+
+
+def truncate_to_bucket(value: datetime, bucket: str) -> datetime:
+    """Mirror Postgres ``date_trunc`` on UTC timestamps (weeks start on Monday)."""
+    value = value.astimezone(UTC)
+    if bucket == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    day_start = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return day_start - timedelta(days=day_start.weekday())
+    return day_start
+
+
+def enumerate_buckets(date_from: datetime, date_to: datetime, bucket: str) -> list[datetime]:
+    step = BUCKET_STEPS[bucket]
+    bucket_start = truncate_to_bucket(date_from, bucket)
+    buckets: list[datetime] = []
+    while bucket_start < date_to:
+        buckets.append(bucket_start)
+        if len(buckets) > MAX_TIMESERIES_BUCKETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Date range spans more than {MAX_TIMESERIES_BUCKETS} {bucket} buckets",
+            )
+        bucket_start += step
+    return buckets
+
+
+def _bucket_cache_key(bucket: str, group_by: str, bucket_start: datetime) -> str:
+    return f"reports:timeseries:{bucket}:{group_by}:{bucket_start.isoformat()}"
+
+
+async def _query_bucket_rows(
+    session: AsyncSession,
+    *,
+    bucket: str,
+    group_by: str,
+    range_start: datetime,
+    range_end: datetime,
+) -> dict[datetime, list[dict]]:
+    bucket_start = func.date_trunc(bucket, func.timezone("UTC", Showtime.starts_at))
+    group_columns = []
+    if group_by == "theater":
+        group_columns = [Theater.id.label("group_id"), Theater.name.label("group_name")]
+    elif group_by == "movie":
+        group_columns = [Movie.id.label("group_id"), Movie.title.label("group_name")]
+
+    stmt = (
+        select(
+            bucket_start.label("bucket_start"),
+            *group_columns,
+            func.count(Showtime.id).label("showtimes"),
+            func.coalesce(func.sum(ShowtimeSalesRollup.sold_seats), 0).label("tickets_sold"),
+            func.coalesce(func.sum(ShowtimeSalesRollup.revenue_cents), 0).label("revenue_cents"),
+            func.coalesce(func.sum(ShowtimeSalesRollup.capacity), 0).label("capacity"),
+        )
+        .join(Movie, Movie.id == Showtime.movie_id)
+        .join(Auditorium, Auditorium.id == Showtime.auditorium_id)
+        .join(Theater, Theater.id == Auditorium.theater_id)
+        .outerjoin(ShowtimeSalesRollup, ShowtimeSalesRollup.showtime_id == Showtime.id)
+        .where(Showtime.starts_at >= range_start, Showtime.starts_at < range_end)
+        .group_by(bucket_start, *group_columns)
+        .order_by(bucket_start.asc(), *group_columns)
+    )
+    rows_by_bucket: defaultdict[datetime, list[dict]] = defaultdict(list)
+    for row in (await session.execute(stmt)).mappings():
+        capacity = int(row["capacity"])
+        tickets_sold = int(row["tickets_sold"])
+        rows_by_bucket[row["bucket_start"].replace(tzinfo=UTC)].append(
+            {
+                "group_id": row.get("group_id"),
+                "group_name": row.get("group_name"),
+                "showtimes": int(row["showtimes"]),
+                "tickets_sold": tickets_sold,
+                "revenue_cents": int(row["revenue_cents"]),
+                "capacity": capacity,
+                "occupancy_percent": (
+                    round(tickets_sold * 100.0 / capacity, 2) if capacity > 0 else 0.0
+                ),
+            }
+        )
+    return rows_by_bucket
+
+
+async def build_sales_timeseries(
+    session: AsyncSession,
+    *,
+    bucket: str,
+    group_by: str,
+    date_from: datetime,
+    date_to: datetime,
+) -> list[dict]:
+    """Return per-bucket sales rows keyed by showtime start, expanded to whole buckets.
+
+    Buckets that ended before now are immutable, so they are served from Redis when
+    present and cached without recomputation once fetched; only open or uncached
+    buckets hit Postgres.
+    """
+    step = BUCKET_STEPS[bucket]
+    buckets = enumerate_buckets(date_from, date_to, bucket)
+    now = datetime.now(tz=UTC)
+    closed_buckets = [bucket_start for bucket_start in buckets if bucket_start + step <= now]
+
+    rows_by_bucket: dict[datetime, list[dict]] = {}
+    cached_payloads = await get_cache_json_many(
+        [_bucket_cache_key(bucket, group_by, bucket_start) for bucket_start in closed_buckets]
+    )
+    for bucket_start, payload in zip(closed_buckets, cached_payloads, strict=True):
+        if payload is not None:
+            rows_by_bucket[bucket_start] = payload["rows"]
+
+    missing_buckets = [
+        bucket_start for bucket_start in buckets if bucket_start not in rows_by_bucket
+    ]
+    if missing_buckets:
+        fetched = await _query_bucket_rows(
+            session,
+            bucket=bucket,
+            group_by=group_by,
+            range_start=missing_buckets[0],
+            range_end=missing_buckets[-1] + step,
+        )
+        newly_closed: dict[str, dict] = {}
+        for bucket_start in missing_buckets:
+            rows_by_bucket[bucket_start] = fetched.get(bucket_start, [])
+            if bucket_start + step <= now:
+                newly_closed[_bucket_cache_key(bucket, group_by, bucket_start)] = {
+                    "rows": rows_by_bucket[bucket_start]
+                }
+        await set_cache_json_many(
+            newly_closed,
+            ttl_seconds=settings.report_closed_bucket_ttl_seconds,
+        )
+
+    return [
+        {"bucket_start": bucket_start, "closed": bucket_start + step <= now, **row}
+        for bucket_start in buckets
+        for row in rows_by_bucket[bucket_start]
+    ]
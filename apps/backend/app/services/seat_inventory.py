@@ -1,11 +1,25 @@
-from sqlalchemy import delete, func, select
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+from sqlalchemy import delete, literal, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.reservation import ShowtimeSeatStatus
 from app.models.showtime import Auditorium, Seat, SeatMap, Showtime
+from app.services.sales_rollup_service import sync_sales_rollup_capacities
 
 DEFAULT_ROWS = tuple("ABCDEFGH")
 DEFAULT_SEATS_PER_ROW = 12
+MAX_LAYOUT_SEATS = 2000
+
+
+@dataclass(frozen=True)
+class SeatSpec:
+    seat_code: str
+    row_label: str
+    seat_number: int
+    seat_type: str
 
 
 def _default_layout_json() -> dict:
@@ -25,10 +39,88 @@ def _seat_type_for_row(row_label: str) -> str:
     return "STANDARD"
 
 
+def _positive_int(value: object, field_name: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"{field_name} must be a positive integer")
+    return value
+
+
+def _position_set(value: object, field_name: str) -> set[int]:
+    if value is None:
+        return set()
+    if not isinstance(value, list):
+        raise ValueError(f"{field_name} must be a list of seat positions")
+    return {_positive_int(position, field_name) for position in value}
+
+
+def generate_seats_from_layout(layout_json: dict | None) -> list[SeatSpec]:
+    """Expand a seat map layout into seats, numbered by physical position.
+
+    ``rows`` holds either row labels, which use the layout-wide ``seats_per_row``,
+    ``gaps`` and ``seat_types`` (row label -> type), or objects that override them per
+    row: ``{"label", "seats", "gaps", "seat_type", "seat_types"}`` where the nested
+    ``seat_types`` maps a position to a type (e.g. wheelchair spaces). Gap positions get
+    no seat, so numbering skips them and the frontend can keep ``aisles_after`` aligned.
+    """
+    layout = layout_json or _default_layout_json()
+    rows = layout.get("rows")
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("rows must be a non-empty list")
+    default_seats_per_row = layout.get("seats_per_row", DEFAULT_SEATS_PER_ROW)
+    default_gaps = _position_set(layout.get("gaps"), "gaps")
+    row_seat_types = layout.get("seat_types") or {}
+    if not isinstance(row_seat_types, dict):
+        raise ValueError("seat_types must map row labels to seat types")
+
+    seats: list[SeatSpec] = []
+    seen_codes: set[str] = set()
+    for row in rows:
+        row_config = row if isinstance(row, dict) else {"label": row}
+        label = row_config.get("label")
+        if not isinstance(label, str) or not label.strip():
+            raise ValueError("every row needs a non-empty label")
+        label = label.strip()
+        seat_count = _positive_int(
+            row_config.get("seats", default_seats_per_row),
+            f"row {label} seats",
+        )
+        gaps = (
+            _position_set(row_config["gaps"], f"row {label} gaps")
+            if "gaps" in row_config
+            else default_gaps
+        )
+        row_type = str(
+            row_config.get("seat_type") or row_seat_types.get(label) or _seat_type_for_row(label)
+        )
+        position_types = row_config.get("seat_types") or {}
+        if not isinstance(position_types, dict):
+            raise ValueError(f"row {label} seat_types must map positions to seat types")
+
+        for position in range(1, seat_count + 1):
+            if position in gaps:
+                continue
+            seat_code = f"{label}{position}"
+            if len(seat_code) > 10 or seat_code in seen_codes:
+                raise ValueError(f"seat code {seat_code} is too long or duplicated")
+            seen_codes.add(seat_code)
+            seats.append(
+                SeatSpec(
+                    seat_code=seat_code,
+                    row_label=label,
+                    seat_number=position,
+                    seat_type=str(position_types.get(str(position)) or row_type)[:30],
+                )
+            )
+            if len(seats) > MAX_LAYOUT_SEATS:
+                raise ValueError(f"layout exceeds {MAX_LAYOUT_SEATS} seats")
+    return seats
+
+
 async def ensure_auditorium_seat_inventory(
     session: AsyncSession,
     auditorium: Auditorium,
 ) -> None:
+    """Create any seats the auditorium's layout defines but the seats table lacks."""
     if auditorium.seatmap_id is None:
         seatmap = SeatMap(
             name=f"{auditorium.name} Standard Layout",
@@ -37,77 +129,73 @@ async def ensure_auditorium_seat_inventory(
         session.add(seatmap)
         await session.flush()
         auditorium.seatmap_id = seatmap.id
-
-    seat_count = (
-        await session.execute(
-            select(func.count(Seat.id)).where(Seat.auditorium_id == auditorium.id)
+        layout_json = seatmap.layout_json
+    else:
+        layout_json = (
+            await session.execute(
+                select(SeatMap.layout_json).where(SeatMap.id == auditorium.seatmap_id)
+            )
+        ).scalar_one_or_none()
+
+    try:
+        seats = generate_seats_from_layout(layout_json)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid seat layout: {exc}") from exc
+
+    await session.execute(
+        insert(Seat)
+        .values(
+            [
+                {
+                    "auditorium_id": auditorium.id,
+                    "seat_code": seat.seat_code,
+                    "row_label": seat.row_label,
+                    "seat_number": seat.seat_number,
+                    "seat_type": seat.seat_type,
+                }
+                for seat in seats
+            ]
         )
-    ).scalar_one()
-    if seat_count > 0:
-        return
+        .on_conflict_do_nothing(constraint="uq_auditorium_seat")
+    )
 
-    seats = []
-    for row_label in DEFAULT_ROWS:
-        for seat_number in range(1, DEFAULT_SEATS_PER_ROW + 1):
-            seats.append(
-                Seat(
-                    auditorium_id=auditorium.id,
-                    seat_code=f"{row_label}{seat_number}",
-                    row_label=row_label,
-                    seat_number=seat_number,
-                    seat_type=_seat_type_for_row(row_label),
-                )
-            )
-    session.add_all(seats)
-    await session.flush()
+
+async def provision_showtime_seat_statuses(
+    session: AsyncSession,
+    showtime_ids: list[int],
+) -> int:
+    """Create missing AVAILABLE statuses for every seat of each showtime's auditorium.
+
+    One ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` covers all showtimes, so the
+    statement count does not grow with showtimes or seats.
+    """
+    if not showtime_ids:
+        return 0
+    source = (
+        select(Showtime.id, Seat.id, literal("AVAILABLE"))
+        .join(Seat, Seat.auditorium_id == Showtime.auditorium_id)
+        .where(Showtime.id.in_(showtime_ids))
+    )
+    result = await session.execute(
+        insert(ShowtimeSeatStatus)
+        .from_select(["showtime_id", "seat_id", "status"], source)
+        .on_conflict_do_nothing(constraint="uq_showtime_seat")
+    )
+    await sync_sales_rollup_capacities(session, showtime_ids)
+    return max(0, result.rowcount or 0)
 
 
 async def sync_showtime_seat_statuses(
     session: AsyncSession,
     showtime: Showtime,
 ) -> None:
-    seat_ids = list(
-        (
-            await session.execute(
-                select(Seat.id).where(Seat.auditorium_id == showtime.auditorium_id)
-            )
-        ).scalars()
-    )
-    if not seat_ids:
-        return
-
-    existing_seat_ids = set(
-        (
-            await session.execute(
-                select(ShowtimeSeatStatus.seat_id).where(
-                    ShowtimeSeatStatus.showtime_id == showtime.id
-                )
-            )
-        ).scalars()
-    )
-    target_seat_ids = set(seat_ids)
-
-    stale_seat_ids = [seat_id for seat_id in existing_seat_ids if seat_id not in target_seat_ids]
-    if stale_seat_ids:
-        await session.execute(
-            delete(ShowtimeSeatStatus).where(
-                ShowtimeSeatStatus.showtime_id == showtime.id,
-                ShowtimeSeatStatus.seat_id.in_(stale_seat_ids),
-            )
+    """Align a showtime's seat statuses with its auditorium, e.g. after a move."""
+    auditorium_seat_ids = select(Seat.id).where(Seat.auditorium_id == showtime.auditorium_id)
+    await session.execute(
+        delete(ShowtimeSeatStatus).where(
+            ShowtimeSeatStatus.showtime_id == showtime.id,
+            ShowtimeSeatStatus.seat_id.not_in(auditorium_seat_ids),
         )
-
-    missing_seat_ids = [seat_id for seat_id in seat_ids if seat_id not in existing_seat_ids]
-    if not missing_seat_ids:
-        return
-
-    session.add_all(
-        [
-            ShowtimeSeatStatus(
-                showtime_id=showtime.id,
-                seat_id=seat_id,
-                status="AVAILABLE",
-                held_by_reservation_id=None,
-            )
-            for seat_id in missing_seat_ids
-        ]
     )
+    await provision_showtime_seat_statuses(session, [showtime.id])
+
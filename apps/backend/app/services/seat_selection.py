@@ -0,0 +1,146 @@
+from collections import defaultdict
+from dataclasses import dataclass
+
+# Seats counted from the screen; the preferred row sits a little past the middle.
+PREFERRED_ROW_DEPTH = 0.6
+ROW_WEIGHT = 1.0
+CENTER_WEIGHT = 0.7
+# Leaving one seat stranded beside a block makes it hard to sell later.
+ORPHAN_SEAT_PENALTY = 0.5
+
+
+@dataclass(frozen=True)
+class GridSeat:
+    seat_id: int
+    row_label: str
+    seat_number: int
+    seat_type: str
+    available: bool
+
+
+@dataclass(frozen=True)
+class SeatBlock:
+    row_label: str
+    seat_ids: tuple[int, ...]
+    seat_numbers: tuple[int, ...]
+    score: float
+
+
+@dataclass(frozen=True)
+class SeatGrid:
+    """A showtime's seats with their current status, grouped into physical rows."""
+
+    rows: dict[str, list[GridSeat]]
+    row_order: list[str]
+    aisles_after: dict[str, frozenset[int]]
+
+
+def build_seat_grid(seats: list[GridSeat], layout_json: dict | None) -> SeatGrid:
+    """Group seats by row and read row order and aisles from the seat map layout.
+
+    Rows follow the layout's order (front to back); rows missing from the layout sort
+    after it by label. ``aisles_after`` may be set layout-wide or per row object.
+    """
+    rows: dict[str, list[GridSeat]] = defaultdict(list)
+    for seat in seats:
+        rows[seat.row_label].append(seat)
+    for row_seats in rows.values():
+        row_seats.sort(key=lambda seat: seat.seat_number)
+
+    layout = layout_json or {}
+    default_aisles = _aisle_positions(layout.get("aisles_after"))
+    layout_order: list[str] = []
+    aisles_after: dict[str, frozenset[int]] = {}
+    for row in layout.get("rows") or []:
+        row_config = row if isinstance(row, dict) else {"label": row}
+        label = str(row_config.get("label", "")).strip()
+        if not label:
+            continue
+        layout_order.append(label)
+        if "aisles_after" in row_config:
+            aisles_after[label] = _aisle_positions(row_config["aisles_after"])
+
+    known = set(layout_order)
+    row_order = [label for label in layout_order if label in rows]
+    row_order.extend(sorted(label for label in rows if label not in known))
+    for label in row_order:
+        aisles_after.setdefault(label, default_aisles)
+    return SeatGrid(rows=dict(rows), row_order=row_order, aisles_after=aisles_after)
+
+
+def _aisle_positions(value: object) -> frozenset[int]:
+    if not isinstance(value, list):
+        return frozenset()
+    return frozenset(item for item in value if isinstance(item, int))
+
+
+def find_best_seat_blocks(
+    grid: SeatGrid,
+    *,
+    party_size: int,
+    seat_type: str | None = None,
+    limit: int | None = None,
+) -> list[SeatBlock]:
+    """Rank every contiguous block of ``party_size`` available seats, best first.
+
+    Seats are contiguous when they share a row, their seat numbers are consecutive (gaps
+    in the layout skip numbers) and no aisle falls between them. Blocks score lower the
+    closer they sit to the preferred row depth and the row's center, with a penalty for
+    stranding a single seat beside the block.
+    """
+    row_count = len(grid.row_order)
+    preferred_row = PREFERRED_ROW_DEPTH * max(row_count - 1, 0)
+    blocks: list[SeatBlock] = []
+    for row_index, label in enumerate(grid.row_order):
+        row_seats = grid.rows[label]
+        first_number = row_seats[0].seat_number
+        last_number = row_seats[-1].seat_number
+        row_center = (first_number + last_number) / 2
+        half_width = max((last_number - first_number) / 2, 1.0)
+        row_score = ROW_WEIGHT * abs(row_index - preferred_row) / max(row_count - 1, 1)
+        aisles = grid.aisles_after[label]
+
+        for segment in _eligible_segments(row_seats, aisles, seat_type):
+            for start in range(len(segment) - party_size + 1):
+                window = segment[start : start + party_size]
+                block_center = (window[0].seat_number + window[-1].seat_number) / 2
+                score = row_score + CENTER_WEIGHT * abs(block_center - row_center) / half_width
+                if start == 1 or len(segment) - start - party_size == 1:
+                    score += ORPHAN_SEAT_PENALTY
+                blocks.append(
+                    SeatBlock(
+                        row_label=label,
+                        seat_ids=tuple(seat.seat_id for seat in window),
+                        seat_numbers=tuple(seat.seat_number for seat in window),
+                        score=round(score, 6),
+                    )
+                )
+    blocks.sort(key=lambda block: (block.score, block.row_label, block.seat_numbers))
+    return blocks if limit is None else blocks[:limit]
+
+
+def _eligible_segments(
+    row_seats: list[GridSeat],
+    aisles: frozenset[int],
+    seat_type: str | None,
+) -> list[list[GridSeat]]:
+    """Split a row into runs of adjacent seats that are available and of the wanted type."""
+    segments: list[list[GridSeat]] = []
+    current: list[GridSeat] = []
+    previous: GridSeat | None = None
+    for seat in row_seats:
+        adjacent = (
+            previous is not None
+            and seat.seat_number == previous.seat_number + 1
+            and previous.seat_number not in aisles
+        )
+        eligible = seat.available and (seat_type is None or seat.seat_type == seat_type)
+        if current and not (adjacent and eligible):
+            segments.append(current)
+            current = []
+        if eligible:
+            current.append(seat)
+        previous = seat
+    if current:
+        segments.append(current)
+    return segments
@@ -0,0 +1,284 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.movie import Movie
+from app.models.showtime import Auditorium, Showtime, Theater
+from app.schemas.catalog import ShowtimeBulkCreate
+from app.services.seat_inventory import provision_showtime_seat_statuses
+
+MAX_BULK_SHOWTIMES = 5000
+MAX_REPORTED_CONFLICTS = 50
+
+
+@dataclass(frozen=True)
+class ScheduledSlot:
+    movie_id: int
+    auditorium_id: int
+    starts_at: datetime
+    ends_at: datetime
+    status: str = "SCHEDULED"
+    # Set for rows that already exist; proposed slots have no id yet.
+    showtime_id: int | None = None
+
+
+@dataclass(frozen=True)
+class ScheduleConflict:
+    auditorium_id: int
+    starts_at: datetime
+    ends_at: datetime
+    conflicting_showtime_id: int | None
+    conflicting_starts_at: datetime
+    conflicting_ends_at: datetime
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def expand_schedule_rule(
+    *,
+    movie_id: int,
+    auditorium_ids: list[int],
+    start_date: date,
+    end_date: date,
+    start_times: list[time],
+    weekdays: list[int] | None,
+    duration: timedelta,
+    timezone: dict[int, str],
+) -> list[ScheduledSlot]:
+    """Expand a recurrence into slots; start times are local to each auditorium's theater."""
+    allowed_weekdays = set(weekdays) if weekdays else set(range(7))
+    slots: list[ScheduledSlot] = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in allowed_weekdays:
+            for auditorium_id in auditorium_ids:
+                zone = ZoneInfo(timezone[auditorium_id])
+                for start_time in start_times:
+                    starts_at = datetime.combine(day, start_time, tzinfo=zone).astimezone(UTC)
+                    slots.append(
+                        ScheduledSlot(
+                            movie_id=movie_id,
+                            auditorium_id=auditorium_id,
+                            starts_at=starts_at,
+                            ends_at=starts_at + duration,
+                        )
+                    )
+        day += timedelta(days=1)
+    return slots
+
+
+def find_schedule_conflicts(
+    proposed: list[ScheduledSlot],
+    existing: list[ScheduledSlot],
+    *,
+    turnover: timedelta = timedelta(0),
+) -> list[ScheduleConflict]:
+    """Report every proposed slot that overlaps another slot in the same auditorium.
+
+    Slots are grouped per auditorium and swept in start order while tracking the interval
+    that reaches furthest; anything starting before that end overlaps it. This is
+    O(n log n) per auditorium, and each overlapping proposed slot is reported at least
+    once. Overlaps between two existing showtimes are not reported.
+    """
+    by_auditorium: dict[int, list[tuple[ScheduledSlot, bool]]] = defaultdict(list)
+    for slot in existing:
+        by_auditorium[slot.auditorium_id].append((slot, False))
+    for slot in proposed:
+        by_auditorium[slot.auditorium_id].append((slot, True))
+
+    conflicts: list[ScheduleConflict] = []
+    for auditorium_id, slots in by_auditorium.items():
+        slots.sort(key=lambda item: (item[0].starts_at, item[0].ends_at))
+        furthest: tuple[ScheduledSlot, bool] | None = None
+        for slot, is_proposed in slots:
+            if furthest is not None and slot.starts_at < furthest[0].ends_at + turnover:
+                other, other_is_proposed = furthest
+                if is_proposed or other_is_proposed:
+                    reported, against = (slot, other) if is_proposed else (other, slot)
+                    conflicts.append(
+                        ScheduleConflict(
+                            auditorium_id=auditorium_id,
+                            starts_at=reported.starts_at,
+                            ends_at=reported.ends_at,
+                            conflicting_showtime_id=against.showtime_id,
+                            conflicting_starts_at=against.starts_at,
+                            conflicting_ends_at=against.ends_at,
+                        )
+                    )
+            if furthest is None or slot.ends_at > furthest[0].ends_at:
+                furthest = (slot, is_proposed)
+    return conflicts
+
+
+async def _load_existing_slots(
+    session: AsyncSession,
+    proposed: list[ScheduledSlot],
+    turnover: timedelta,
+) -> list[ScheduledSlot]:
+    window_start = min(slot.starts_at for slot in proposed) - turnover
+    window_end = max(slot.ends_at for slot in proposed) + turnover
+    rows = await session.execute(
+        select(
+            Showtime.id,
+            Showtime.movie_id,
+            Showtime.auditorium_id,
+            Showtime.starts_at,
+            Showtime.ends_at,
+            Showtime.status,
+        ).where(
+            Showtime.auditorium_id.in_({slot.auditorium_id for slot in proposed}),
+            Showtime.status != "CANCELED",
+            Showtime.starts_at < window_end,
+            Showtime.ends_at > window_start,
+        )
+    )
+    return [
+        ScheduledSlot(
+            movie_id=row.movie_id,
+            auditorium_id=row.auditorium_id,
+            starts_at=_as_utc(row.starts_at),
+            ends_at=_as_utc(row.ends_at),
+            status=row.status,
+            showtime_id=row.id,
+        )
+        for row in rows
+    ]
+
+
+async def schedule_showtimes(session: AsyncSession, payload: ShowtimeBulkCreate) -> list[int]:
+    """Validate, conflict-check and insert a batch of showtimes in set-based statements.
+
+    The caller owns the transaction and cache invalidation.
+    """
+    movie_ids = {item.movie_id for item in payload.showtimes}
+    movie_ids.update(rule.movie_id for rule in payload.rules)
+    auditorium_ids = {item.auditorium_id for item in payload.showtimes}
+    for rule in payload.rules:
+        auditorium_ids.update(rule.auditorium_ids)
+    if not movie_ids:
+        raise HTTPException(status_code=400, detail="Provide at least one showtime or rule")
+
+    runtimes = dict(
+        (
+            await session.execute(
+                select(Movie.id, Movie.runtime_minutes).where(Movie.id.in_(movie_ids))
+            )
+        ).all()
+    )
+    missing_movies = movie_ids.difference(runtimes)
+    if missing_movies:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Movies not found: {','.join(map(str, sorted(missing_movies)))}",
+        )
+    timezones = dict(
+        (
+            await session.execute(
+                select(Auditorium.id, Theater.timezone)
+                .join(Theater, Theater.id == Auditorium.theater_id)
+                .where(Auditorium.id.in_(auditorium_ids))
+            )
+        ).all()
+    )
+    missing_auditoriums = auditorium_ids.difference(timezones)
+    if missing_auditoriums:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Auditoriums not found: {','.join(map(str, sorted(missing_auditoriums)))}",
+        )
+
+    proposed: list[ScheduledSlot] = []
+    for item in payload.showtimes:
+        if item.starts_at >= item.ends_at:
+            raise HTTPException(status_code=400, detail="starts_at must be earlier than ends_at")
+        proposed.append(
+            ScheduledSlot(
+                movie_id=item.movie_id,
+                auditorium_id=item.auditorium_id,
+                starts_at=_as_utc(item.starts_at),
+                ends_at=_as_utc(item.ends_at),
+                status=item.status,
+            )
+        )
+    for rule in payload.rules:
+        if rule.start_date > rule.end_date:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+        try:
+            proposed.extend(
+                expand_schedule_rule(
+                    movie_id=rule.movie_id,
+                    auditorium_ids=rule.auditorium_ids,
+                    start_date=rule.start_date,
+                    end_date=rule.end_date,
+                    start_times=rule.start_times,
+                    weekdays=rule.weekdays,
+                    duration=timedelta(
+                        minutes=rule.duration_minutes or runtimes[rule.movie_id]
+                    ),
+                    timezone=timezones,
+                )
+            )
+        except ZoneInfoNotFoundError as exc:
+            raise HTTPException(status_code=400, detail="Theater has an unknown timezone") from exc
+        if len(proposed) > MAX_BULK_SHOWTIMES:
+            break
+    if len(proposed) > MAX_BULK_SHOWTIMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A schedule may create at most {MAX_BULK_SHOWTIMES} showtimes",
+        )
+
+    turnover = timedelta(minutes=payload.turnover_minutes)
+    existing = await _load_existing_slots(session, proposed, turnover)
+    conflicts = find_schedule_conflicts(proposed, existing, turnover=turnover)
+    if conflicts:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": f"{len(conflicts)} showtimes overlap existing or proposed showtimes",
+                "conflicts": [
+                    {
+                        "auditorium_id": conflict.auditorium_id,
+                        "starts_at": conflict.starts_at.isoformat(),
+                        "ends_at": conflict.ends_at.isoformat(),
+                        "conflicting_showtime_id": conflict.conflicting_showtime_id,
+                        "conflicting_starts_at": conflict.conflicting_starts_at.isoformat(),
+                        "conflicting_ends_at": conflict.conflicting_ends_at.isoformat(),
+                    }
+                    for conflict in conflicts[:MAX_REPORTED_CONFLICTS]
+                ],
+            },
+        )
+
+    showtime_ids = list(
+        (
+            await session.execute(
+                insert(Showtime)
+                .values(
+                    [
+                        {
+                            "movie_id": slot.movie_id,
+                            "auditorium_id": slot.auditorium_id,
+                            "starts_at": slot.starts_at,
+                            "ends_at": slot.ends_at,
+                            "status": slot.status,
+                        }
+                        for slot in proposed
+                    ]
+                )
+                .returning(Showtime.id)
+            )
+        ).scalars()
+    )
+    await provision_showtime_seat_statuses(session, showtime_ids)
+    return showtime_ids
@@ -0,0 +1,290 @@
+"""Per-showtime virtual waiting room backed by Redis sorted sets.
+
+Admins turn the room on for high-demand showtimes with a cap on active shoppers. Users
+join to get a token and queue position; each join or poll runs one admission script
+that drops expired shoppers and abandoned queue entries and admits from the head of the
+queue while there is room. Only admitted tokens may load the seat map or create holds
+for a gated showtime, which bounds how many transactions contend for its seat rows.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONFIG_KEY = "waiting_room:config"
+
+# KEYS: queue zset, active zset, heartbeat zset, arrival counter, then the token's owner
+# keys, which only live as long as the token is queued or admitted and being polled
+# ARGV: now_ms, capacity, admission_ms, abandon_before_ms, token ('' for none), join flag
+_ADMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local token = ARGV[5]
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local abandoned = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[4])
+for _, stale in ipairs(abandoned) do
+  redis.call('ZREM', KEYS[1], stale)
+  redis.call('ZREM', KEYS[3], stale)
+end
+if token ~= '' then
+  if ARGV[6] == '1' and not redis.call('ZSCORE', KEYS[2], token)
+      and not redis.call('ZSCORE', KEYS[1], token) then
+    redis.call('ZADD', KEYS[1], redis.call('INCR', KEYS[4]), token)
+  end
+  if redis.call('ZSCORE', KEYS[1], token) then
+    redis.call('ZADD', KEYS[3], now, token)
+  end
+end
+local free = capacity - redis.call('ZCARD', KEYS[2])
+if free > 0 then
+  local admitted = redis.call('ZRANGE', KEYS[1], 0, free - 1)
+  for _, next_token in ipairs(admitted) do
+    redis.call('ZREM', KEYS[1], next_token)
+    redis.call('ZREM', KEYS[3], next_token)
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[3]), next_token)
+  end
+end
+local ttl = tonumber(ARGV[3]) * 4
+for i = 1, 4 do
+  redis.call('PEXPIRE', KEYS[i], ttl)
+end
+if token == '' then
+  return {'NONE', 0, 0}
+end
+local result = {'UNKNOWN', 0, 0}
+local admitted_until = redis.call('ZSCORE', KEYS[2], token)
+local rank = redis.call('ZRANK', KEYS[1], token)
+if admitted_until then
+  result = {'ADMITTED', 0, admitted_until}
+elseif rank then
+  result = {'QUEUED', rank + 1, 0}
+end
+if result[1] ~= 'UNKNOWN' then
+  for i = 5, #KEYS do
+    redis.call('PEXPIRE', KEYS[i], ttl)
+  end
+end
+return result
+"""
+
+
+@dataclass(frozen=True)
+class WaitingRoomStatus:
+    token: str
+    showtime_id: int
+    status: str
+    position: int | None
+    admitted_until: datetime | None
+
+
+def _build_client() -> Redis:
+    return Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+
+
+def _room_keys(showtime_id: int) -> list[str]:
+    prefix = f"waiting_room:{showtime_id}"
+    return [f"{prefix}:queue", f"{prefix}:active", f"{prefix}:heartbeat", f"{prefix}:arrivals"]
+
+
+def _token_key(token: str) -> str:
+    return f"waiting_room:token:{token}"
+
+
+def _user_token_key(showtime_id: int, user_id: int) -> str:
+    return f"waiting_room:{showtime_id}:user:{user_id}"
+
+
+def _owner_keys(showtime_id: int, user_id: int, token: str) -> list[str]:
+    return [_token_key(token), _user_token_key(showtime_id, user_id)]
+
+
+async def get_room_capacity(showtime_id: int) -> int | None:
+    """Active-shopper cap for a gated showtime, or None when it has no waiting room."""
+    client = _build_client()
+    try:
+        capacity = await client.hget(CONFIG_KEY, str(showtime_id))
+    except Exception:
+        # Fail open like the rate limiter: a Redis outage must not close ticket sales.
+        logger.warning("waiting_room_config_failed", extra={"showtime_id": showtime_id})
+        return None
+    finally:
+        await client.aclose()
+    return int(capacity) if capacity else None
+
+
+async def configure_room(showtime_id: int, *, active_shoppers: int | None) -> None:
+    client = _build_client()
+    try:
+        if active_shoppers is None:
+            await client.hdel(CONFIG_KEY, str(showtime_id))
+            await client.delete(*_room_keys(showtime_id))
+        else:
+            await client.hset(CONFIG_KEY, str(showtime_id), active_shoppers)
+    finally:
+        await client.aclose()
+
+
+async def _run_admission(
+    client: Redis,
+    showtime_id: int,
+    capacity: int,
+    *,
+    token: str = "",
+    join: bool = False,
+    owner_keys: list[str] | None = None,
+) -> tuple[str, int, int]:
+    """Run one admission pass; a queued or admitted token's ``owner_keys`` get a fresh TTL."""
+    now_ms = int(datetime.now(tz=UTC).timestamp() * 1000)
+    status, position, admitted_until_ms = await client.register_script(_ADMIT_SCRIPT)(
+        keys=[*_room_keys(showtime_id), *(owner_keys or [])],
+        args=[
+            now_ms,
+            capacity,
+            settings.waiting_room_admission_seconds * 1000,
+            now_ms - settings.waiting_room_abandon_seconds * 1000,
+            token,
+            "1" if join else "0",
+        ],
+    )
+    return str(status), int(position), int(float(admitted_until_ms))
+
+
+def _status(
+    token: str,
+    showtime_id: int,
+    result: tuple[str, int, int],
+) -> WaitingRoomStatus:
+    status, position, admitted_until_ms = result
+    return WaitingRoomStatus(
+        token=token,
+        showtime_id=showtime_id,
+        status=status,
+        position=position or None,
+        admitted_until=(
+            datetime.fromtimestamp(admitted_until_ms / 1000, tz=UTC)
+            if admitted_until_ms
+            else None
+        ),
+    )
+
+
+async def join_room(showtime_id: int, user_id: int) -> WaitingRoomStatus:
+    """Queue the user (or return their existing place) and admit whoever fits."""
+    capacity = await get_room_capacity(showtime_id)
+    if capacity is None:
+        raise HTTPException(status_code=404, detail="Showtime has no waiting room")
+    ttl_seconds = settings.waiting_room_admission_seconds * 4
+    client = _build_client()
+    try:
+        token = await client.get(_user_token_key(showtime_id, user_id))
+        result = None
+        if token is not None and await client.exists(_token_key(token)):
+            result = await _run_admission(
+                client,
+                showtime_id,
+                capacity,
+                token=token,
+                owner_keys=_owner_keys(showtime_id, user_id, token),
+            )
+        if result is None or result[0] == "UNKNOWN":
+            # New or lapsed entrants go to the back of the queue.
+            token = uuid4().hex
+            await client.set(_token_key(token), f"{showtime_id}:{user_id}", ex=ttl_seconds)
+            await client.set(_user_token_key(showtime_id, user_id), token, ex=ttl_seconds)
+            result = await _run_admission(
+                client,
+                showtime_id,
+                capacity,
+                token=token,
+                join=True,
+                owner_keys=_owner_keys(showtime_id, user_id, token),
+            )
+    finally:
+        await client.aclose()
+    return _status(token, showtime_id, result)
+
+
+async def poll_room(showtime_id: int, token: str) -> WaitingRoomStatus:
+    capacity = await get_room_capacity(showtime_id)
+    if capacity is None:
+        raise HTTPException(status_code=404, detail="Showtime has no waiting room")
+    client = _build_client()
+    try:
+        owner = await client.get(_token_key(token))
+        result = ("UNKNOWN", 0, 0)
+        if owner is not None and owner.startswith(f"{showtime_id}:"):
+            user_id = int(owner.split(":", 1)[1])
+            result = await _run_admission(
+                client,
+                showtime_id,
+                capacity,
+                token=token,
+                owner_keys=_owner_keys(showtime_id, user_id, token),
+            )
+    finally:
+        await client.aclose()
+    if result[0] == "UNKNOWN":
+        raise HTTPException(status_code=404, detail="Waiting room token not found")
+    return _status(token, showtime_id, result)
+
+
+async def leave_room(showtime_id: int, token: str) -> None:
+    """Give up a place in the queue or an admission slot, letting the next user in."""
+    capacity = await get_room_capacity(showtime_id)
+    client = _build_client()
+    try:
+        queue_key, active_key, heartbeat_key, _ = _room_keys(showtime_id)
+        await client.zrem(queue_key, token)
+        await client.zrem(active_key, token)
+        await client.zrem(heartbeat_key, token)
+        if capacity is not None:
+            await _run_admission(client, showtime_id, capacity)
+    finally:
+        await client.aclose()
+
+
+async def require_admission(
+    showtime_id: int,
+    token: str | None,
+    *,
+    user_id: int | None = None,
+) -> None:
+    """Reject requests for a gated showtime unless the token is currently admitted.
+
+    Ungated showtimes cost one ``HGET``. When ``user_id`` is given the token must also
+    belong to that user, so an admitted token cannot be shared to skip the queue.
+    """
+    if await get_room_capacity(showtime_id) is None:
+        return
+    if token:
+        client = _build_client()
+        try:
+            _, active_key, _, _ = _room_keys(showtime_id)
+            admitted_until_ms = await client.zscore(active_key, token)
+            owner = await client.get(_token_key(token))
+        except Exception:
+            logger.warning("waiting_room_check_failed", extra={"showtime_id": showtime_id})
+            return
+        finally:
+            await client.aclose()
+        now_ms = datetime.now(tz=UTC).timestamp() * 1000
+        if (
+            admitted_until_ms is not None
+            and admitted_until_ms > now_ms
+            and owner is not None
+            and owner.startswith(f"{showtime_id}:")
+            and (user_id is None or owner == f"{showtime_id}:{user_id}")
+        ):
+            return
+    raise HTTPException(
+        status_code=403,
+        detail="This showtime uses a waiting room; join it and wait for admission",
+    )
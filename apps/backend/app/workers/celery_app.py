@@ -11,11 +11,31 @@ celery_app.conf.beat_schedule = {
         "task": "reservation.expire_overdue",
         "schedule": max(5, settings.reservation_expiry_sweep_seconds),
     },
+    "reconcile-redis-holds": {
+        "task": "reservation.reconcile_redis_holds",
+        "schedule": max(10, settings.redis_hold_reconcile_seconds),
+    },
     "rebuild-movie-similarity": {
         "task": "recommendation.rebuild_movie_similarity",
         "schedule": crontab(
             minute=settings.recommendation_rebuild_minute_utc,
             hour=settings.recommendation_rebuild_hour_utc,
         ),
-    }
+    },
+    "flush-recommendation-events": {
+        "task": "recommendation.flush_events",
+        "schedule": max(1, settings.recommendation_event_flush_seconds),
+    },
+    "refresh-recommendation-pool": {
+        "task": "recommendation.refresh_candidate_pool",
+        "schedule": max(10, settings.recommendation_pool_refresh_seconds),
+    },
+    "precompute-recommendation-candidates": {
+        "task": "recommendation.precompute_active_user_candidates",
+        "schedule": max(60, settings.recommendation_candidate_refresh_seconds),
+    },
+    "reconcile-sales-rollups": {
+        "task": "report.recompute_sales_rollups",
+        "schedule": max(60, settings.sales_rollup_reconcile_seconds),
+    },
 }
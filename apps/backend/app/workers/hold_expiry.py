@@ -0,0 +1,51 @@
+"""Hold expiry consumer: releases reservation holds as their expiry passes.
+
+Run with ``python -m app.workers.hold_expiry``. The loop pops due reservation ids from
+the Redis delay queue in batches of ``RESERVATION_EXPIRY_BATCH_SIZE`` and sleeps until
+the next queued expiry, waking at least every ``RESERVATION_EXPIRY_POLL_SECONDS`` to pick
+up holds created meanwhile. Several consumers can run side by side.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.services import hold_expiry_queue
+from app.services.reservation_service import expire_due_holds_job
+
+logger = logging.getLogger(__name__)
+
+
+async def run_hold_expiry_consumer(stop: asyncio.Event) -> None:
+    poll_seconds = max(0.05, settings.reservation_expiry_poll_seconds)
+    while not stop.is_set():
+        try:
+            expired_count = await expire_due_holds_job()
+            if expired_count:
+                logger.info("Expired %s reservations from the expiry queue", expired_count)
+            next_due = await hold_expiry_queue.seconds_until_next_due()
+        except Exception:
+            logger.exception("hold_expiry_batch_failed")
+            next_due = None
+        delay = poll_seconds if next_due is None else min(next_due, poll_seconds)
+        if delay <= 0:
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+        except TimeoutError:
+            pass
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await run_hold_expiry_consumer(stop)
+
+
+if __name__ == "__main__":
+    configure_logging(debug=settings.debug)
+    asyncio.run(_main())
@@ -2,7 +2,17 @@ import asyncio
 import logging
 
 from app.services.movie_similarity_service import rebuild_movie_similarity_job
-from app.services.reservation_service import expire_overdue_holds_job
+from app.services.recommendation_event_service import flush_recommendation_events_job
+from app.services.recommendation_pool_service import refresh_candidate_pool_job
+from app.services.recommendation_service import (
+    precompute_active_user_candidates_job,
+    precompute_user_candidates_job,
+)
+from app.services.reservation_service import (
+    expire_overdue_holds_job,
+    reconcile_redis_holds_job,
+)
+from app.services.sales_rollup_service import recompute_sales_rollups_job
 from app.workers.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
@@ -16,8 +26,51 @@ def expire_overdue_reservations_task() -> dict[str, int]:
     return {"expired_reservations": released_count}
 
 
+@celery_app.task(name="reservation.reconcile_redis_holds")
+def reconcile_redis_holds_task() -> dict[str, int]:
+    counts = asyncio.run(reconcile_redis_holds_job())
+    if counts["restored_holds"] or counts["lost_holds"]:
+        logger.info("Reconciled Redis seat holds", extra=counts)
+    return counts
+
+
 @celery_app.task(name="recommendation.rebuild_movie_similarity")
 def rebuild_movie_similarity_task() -> dict[str, int]:
     similarity_rows = asyncio.run(rebuild_movie_similarity_job())
     logger.info("Rebuilt movie similarity rows", extra={"similarity_rows": similarity_rows})
+    precompute_active_user_candidates_task.delay()
     return {"similarity_rows": similarity_rows}
+
+
+@celery_app.task(name="recommendation.flush_events")
+def flush_recommendation_events_task() -> dict[str, int]:
+    inserted_events = asyncio.run(flush_recommendation_events_job())
+    if inserted_events > 0:
+        logger.info("Flushed recommendation events", extra={"events": inserted_events})
+    return {"inserted_events": inserted_events}
+
+
+@celery_app.task(name="recommendation.refresh_candidate_pool")
+def refresh_candidate_pool_task() -> dict[str, int]:
+    pool_size = asyncio.run(refresh_candidate_pool_job())
+    return {"pool_movies": pool_size}
+
+
+@celery_app.task(name="recommendation.precompute_user_candidates")
+def precompute_user_candidates_task(user_id: int) -> dict[str, int]:
+    candidate_rows = asyncio.run(precompute_user_candidates_job(user_id))
+    return {"user_id": user_id, "candidate_rows": candidate_rows}
+
+
+@celery_app.task(name="recommendation.precompute_active_user_candidates")
+def precompute_active_user_candidates_task() -> dict[str, int]:
+    user_count = asyncio.run(precompute_active_user_candidates_job())
+    logger.info("Precomputed recommendation candidates", extra={"users": user_count})
+    return {"users": user_count}
+
+
+@celery_app.task(name="report.recompute_sales_rollups")
+def recompute_sales_rollups_task() -> dict[str, int]:
+    rollup_rows = asyncio.run(recompute_sales_rollups_job())
+    logger.info("Recomputed sales rollups", extra={"rollup_rows": rollup_rows})
+    return {"rollup_rows": rollup_rows}
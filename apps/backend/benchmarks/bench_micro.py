@@ -0,0 +1,420 @@
+"""Micro-benchmarks for pure-Python hot paths, checked against a stored baseline.
+
+Run from ``apps/backend`` (no database or Redis needed)::
+
+    python -m benchmarks.bench_micro                      # compare with the baseline
+    python -m benchmarks.bench_micro --case movie_similarity --scale large
+    python -m benchmarks.bench_micro --update-baseline    # after an intended change
+
+Every case is timed at several input scales as the best of ``--repeat`` samples, each
+sample looping enough calls to run for at least ``MIN_SAMPLE_SECONDS``. Timings are also
+divided by a fixed pure-Python calibration workload sampled alongside each case, and
+regressions are judged on that normalized figure so a baseline recorded on one machine
+stays meaningful on another. A case fails when its normalized time exceeds the baseline
+by more than its threshold (``--threshold`` or the per-case default); the process then
+exits non-zero. Reports go to ``benchmarks/results/micro-<git rev>.json``.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+from app.core import metrics
+from app.core.logging import JsonFormatter
+from app.core.ticket_lifecycle import build_ticket_lifecycle_window, resolve_ticket_lifecycle_state
+from app.services.movie_similarity_service import MovieFeatures, compute_movie_similarity
+from app.services.recommendation_pool_service import PoolMovie
+from app.services.recommendation_service import (
+    RankedCandidate,
+    WatchedMovie,
+    score_user_candidates,
+    select_diverse_candidates,
+)
+from benchmarks.common import git_revision, write_report
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "micro.json"
+MIN_SAMPLE_SECONDS = 0.05
+# Identical runs on a shared single-core runner still differ by about a fifth; pass a
+# tighter --threshold on a quiet, pinned machine.
+DEFAULT_THRESHOLD = 0.35
+
+GENRES = (
+    "Action",
+    "Animation",
+    "Comedy",
+    "Documentary",
+    "Drama",
+    "Family",
+    "Horror",
+    "Romance",
+    "Sci-Fi",
+    "Thriller",
+)
+RATINGS = ("G", "PG", "PG-13", "R", "NR")
+
+
+@dataclass(frozen=True)
+class MicroCase:
+    name: str
+    scales: dict[str, int]
+    # Builds the synthetic input for a size and returns the zero-argument call to time.
+    setup: Callable[[int, random.Random], Callable[[], object]]
+    threshold: float = DEFAULT_THRESHOLD
+
+
+def _setup_movie_similarity(size: int, rng: random.Random) -> Callable[[], object]:
+    features = {
+        movie_id: MovieFeatures(
+            movie_id=movie_id,
+            rating=rng.choice(RATINGS),
+            runtime_minutes=rng.randint(80, 170),
+            genres={genre.lower() for genre in rng.sample(GENRES, rng.randint(1, 3))},
+        )
+        for movie_id in range(1, size + 1)
+    }
+    watched = [set(rng.sample(range(1, size + 1), rng.randint(2, 8))) for _ in range(size * 2)]
+    return lambda: compute_movie_similarity(features, watched, top_k=16)
+
+
+def _pool(size: int, rng: random.Random) -> list[PoolMovie]:
+    now = datetime.now(tz=UTC)
+    return [
+        PoolMovie(
+            movie_id=movie_id,
+            rating=rng.choice(RATINGS),
+            release_date=date.today() - timedelta(days=rng.randint(0, 400)),
+            next_showtime_starts_at=now + timedelta(hours=rng.randint(1, 200)),
+            tickets_sold=rng.randint(0, 5000),
+            genres=rng.sample(GENRES, rng.randint(1, 3)),
+            freshness=rng.random(),
+        )
+        for movie_id in range(1, size + 1)
+    ]
+
+
+def _setup_recommendation_scoring(size: int, rng: random.Random) -> Callable[[], object]:
+    pool = _pool(size, rng)
+    history = [
+        WatchedMovie(
+            movie_id=movie.movie_id,
+            title=f"Movie {movie.movie_id}",
+            rating=movie.rating,
+            genres=movie.genres,
+            watch_count=float(rng.randint(1, 3)),
+        )
+        for movie in rng.sample(pool, min(25, size))
+    ]
+    similarity_rows = [
+        (watched.movie_id, rng.randint(1, size), rng.random())
+        for watched in history
+        for _ in range(16)
+    ]
+    return lambda: score_user_candidates(
+        watch_history=history,
+        similarity_rows=similarity_rows,
+        pool=pool,
+        weights=(0.6, 0.22, 0.18),
+    )
+
+
+def _setup_diversity_selection(size: int, rng: random.Random) -> Callable[[], object]:
+    candidates = [
+        RankedCandidate(
+            movie_id=movie_id,
+            base_score=rng.random(),
+            primary_genre=rng.choice([*GENRES, None]),
+            source_movie_id=None,
+            reason="",
+        )
+        for movie_id in range(size)
+    ]
+    boosts = {movie_id: 0.2 for movie_id in range(size) if rng.random() < 0.05}
+    return lambda: select_diverse_candidates(
+        candidates,
+        limit=50,
+        diversity_penalty=0.08,
+        score_boosts=boosts,
+    )
+
+
+def _setup_ticket_lifecycle(size: int, rng: random.Random) -> Callable[[], object]:
+    now = datetime.now(tz=UTC)
+    tickets = []
+    for _ in range(size):
+        starts_at = now + timedelta(minutes=rng.randint(-600, 600))
+        tickets.append(
+            (
+                rng.choice(("VALID", "VALID", "VALID", "USED", "VOID")),
+                starts_at,
+                starts_at + timedelta(minutes=rng.randint(90, 180)),
+            )
+        )
+
+    def run() -> list[str]:
+        return [
+            resolve_ticket_lifecycle_state(
+                ticket_status=status,
+                now=now,
+                window=build_ticket_lifecycle_window(
+                    showtime_starts_at=starts_at,
+                    showtime_ends_at=ends_at,
+                    entry_open_minutes=60,
+                    active_grace_minutes=20,
+                ),
+            )
+            for status, starts_at, ends_at in tickets
+        ]
+
+    return run
+
+
+def _setup_json_log_format(size: int, rng: random.Random) -> Callable[[], object]:
+    formatter = JsonFormatter()
+    records = [
+        logging.makeLogRecord(
+            {
+                "name": "app.request",
+                "levelno": logging.INFO,
+                "levelname": "INFO",
+                "msg": "request_completed",
+                "request_id": f"{rng.getrandbits(64):016x}",
+                "method": rng.choice(("GET", "POST", "PATCH")),
+                "path": f"/api/showtimes/{rng.randint(1, 5000)}/seats",
+                "status_code": rng.choice((200, 201, 404, 409)),
+                "duration_ms": round(rng.random() * 250, 2),
+            }
+        )
+        for _ in range(size)
+    ]
+    return lambda: [formatter.format(record) for record in records]
+
+
+def _setup_prometheus_render(size: int, rng: random.Random) -> Callable[[], object]:
+    # The registry is process-global; this process only exists to run benchmarks.
+    for index in range(size):
+        labels = {"variant": f"V{index}"}
+        metrics.increment_metric("recommendation_variant_assigned_total", labels=labels)
+        metrics.observe_metric("recommendation_ranking_duration_seconds", rng.random(), labels)
+    return metrics.render_prometheus_metrics
+
+
+CASES = (
+    MicroCase(
+        "movie_similarity",
+        {"small": 100, "medium": 300, "large": 700},
+        _setup_movie_similarity,
+    ),
+    MicroCase(
+        "recommendation_scoring",
+        {"small": 200, "medium": 2000, "large": 10000},
+        _setup_recommendation_scoring,
+    ),
+    MicroCase(
+        "diversity_selection",
+        {"small": 1000, "medium": 10000, "large": 50000},
+        _setup_diversity_selection,
+    ),
+    MicroCase(
+        "ticket_lifecycle",
+        {"small": 1000, "medium": 10000, "large": 50000},
+        _setup_ticket_lifecycle,
+    ),
+    MicroCase(
+        "json_log_format",
+        {"small": 1000, "medium": 10000, "large": 50000},
+        _setup_json_log_format,
+    ),
+    MicroCase(
+        "prometheus_render",
+        {"small": 10, "medium": 100, "large": 1000},
+        _setup_prometheus_render,
+        # Label growth between scales shares one registry, so allow more noise.
+        threshold=0.5,
+    ),
+)
+
+
+def _calibration_workload() -> int:
+    counts: dict[int, int] = {}
+    total = 0
+    for value in range(200_000):
+        key = value % 97
+        counts[key] = counts.get(key, 0) + 1
+        total += value * key
+    return total + len(counts)
+
+
+def _loops_for(func: Callable[[], object]) -> int:
+    started = time.perf_counter()
+    func()
+    single = max(time.perf_counter() - started, 1e-9)
+    return max(1, int(MIN_SAMPLE_SECONDS / single))
+
+
+def _sample(func: Callable[[], object], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return (time.perf_counter() - started) / loops
+
+
+def time_case(func: Callable[[], object], repeat: int) -> tuple[float, float, float]:
+    """Return best seconds per call, best calibration seconds and the normalized time.
+
+    Each case sample is followed by a calibration sample and the normalized time is the
+    best ratio of such pairs: on shared hosts machine speed drifts over seconds, and
+    pairing cancels most of that drift. Like ``timeit``, the collector is paused while
+    sampling so a collection triggered by earlier allocations does not land in a case.
+    """
+    loops = _loops_for(func)
+    calibration_loops = _loops_for(_calibration_workload)
+    best_seconds = best_calibration = best_ratio = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            seconds = _sample(func, loops)
+            calibration = _sample(_calibration_workload, calibration_loops)
+            best_seconds = min(best_seconds, seconds)
+            best_calibration = min(best_calibration, calibration)
+            best_ratio = min(best_ratio, seconds / calibration)
+    finally:
+        gc.enable()
+    return best_seconds, best_calibration, best_ratio
+
+
+def run_suite(
+    *,
+    case_names: set[str] | None,
+    scale_names: set[str] | None,
+    repeat: int,
+    seed: int,
+) -> tuple[float, dict[str, dict[str, float]]]:
+    results: dict[str, dict[str, float]] = {}
+    calibrations: list[float] = []
+    for case in CASES:
+        if case_names and case.name not in case_names:
+            continue
+        for scale, size in case.scales.items():
+            if scale_names and scale not in scale_names:
+                continue
+            func = case.setup(size, random.Random(seed))
+            seconds, calibration, normalized = time_case(func, repeat)
+            calibrations.append(calibration)
+            results[f"{case.name}[{scale}]"] = {
+                "size": size,
+                "seconds": seconds,
+                "normalized": normalized,
+            }
+    calibration = min(calibrations) if calibrations else 0.0
+    return calibration, results
+
+
+def compare_with_baseline(
+    results: dict[str, dict[str, float]],
+    baseline: dict,
+    *,
+    threshold: float | None,
+) -> dict[str, dict[str, float | bool | None]]:
+    thresholds = {case.name: case.threshold for case in CASES}
+    comparison: dict[str, dict[str, float | bool | None]] = {}
+    for key, result in results.items():
+        allowed = threshold if threshold is not None else thresholds[key.split("[")[0]]
+        previous = baseline.get("cases", {}).get(key)
+        if previous is None:
+            comparison[key] = {"change": None, "threshold": allowed, "regressed": False}
+            continue
+        change = result["normalized"] / previous["normalized"] - 1
+        comparison[key] = {
+            "change": round(change, 4),
+            "threshold": allowed,
+            "regressed": change > allowed,
+        }
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--case", action="append", dest="cases", help="Run only these cases")
+    parser.add_argument("--scale", action="append", dest="scales", help="Run only these scales")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="Allowed normalized slowdown (0.35 = 35%%); overrides per-case defaults",
+    )
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", default=None, help="Report path (JSON)")
+    args = parser.parse_args()
+    known_cases = {case.name for case in CASES}
+    if args.cases and not set(args.cases) <= known_cases:
+        parser.error(f"unknown cases; choose from {', '.join(sorted(known_cases))}")
+
+    calibration, results = run_suite(
+        case_names=set(args.cases) if args.cases else None,
+        scale_names=set(args.scales) if args.scales else None,
+        repeat=max(1, args.repeat),
+        seed=args.seed,
+    )
+    baseline_path = Path(args.baseline)
+    baseline = (
+        json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    )
+    comparison = compare_with_baseline(results, baseline, threshold=args.threshold)
+
+    for key, result in results.items():
+        change = comparison[key]["change"]
+        change_text = "    new" if change is None else f"{change:+7.1%}"
+        flag = "  REGRESSION" if comparison[key]["regressed"] else ""
+        print(f"{key:<36} {result['seconds'] * 1000:>10.3f} ms  {change_text}{flag}")
+
+    report_path = write_report(
+        "micro",
+        {
+            "python": sys.version.split()[0],
+            "calibration_seconds": calibration,
+            "baseline_revision": baseline.get("git_revision"),
+            "cases": results,
+            "comparison": comparison,
+        },
+        args.output,
+    )
+    print(f"report written to {report_path}")
+
+    if args.update_baseline:
+        merged = {**baseline.get("cases", {}), **results}
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps(
+                {
+                    "git_revision": git_revision(),
+                    "python": sys.version.split()[0],
+                    "calibration_seconds": calibration,
+                    "cases": dict(sorted(merged.items())),
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        print(f"baseline updated at {baseline_path}")
+        return
+
+    regressions = [key for key, item in comparison.items() if item["regressed"]]
+    if regressions:
+        raise SystemExit(f"regressions over threshold: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""Race concurrent buyers for overlapping seats through hold, checkout and payment.
+
+Run from ``apps/backend`` against a local, disposable Postgres (Redis optional; cache
+writes fail open)::
+
+    python -m benchmarks.bench_reservation_contention --users 400 --concurrency 64
+    python -m benchmarks.bench_reservation_contention --output /tmp/before.json
+
+Each run seeds its own theater, auditorium, showtime and users, then every simulated user
+picks a contiguous block of seats and drives ``ReservationService.create_hold``,
+``PaymentService.create_checkout_session`` (then ``open_stripe_checkout``) and
+``PaymentService.finalize_paid_order`` in separate transactions, retrying on a 409 seat
+conflict. Checkout goes through the ``STRIPE_CHECKOUT`` provider with the Stripe call
+replaced by a fake that only sleeps, so results measure this service rather than the
+network. The JSON report (default ``benchmarks/results/reservation_contention-<git
+rev>.json``) carries throughput, latency percentiles per phase, the conflict rate and the
+oversell invariant; the process exits non-zero if any seat was sold twice or counters
+disagree.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.security import hash_password
+from app.models.movie import Movie
+from app.models.order import Order, Ticket
+from app.models.reservation import ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
+from app.models.showtime import Auditorium, Seat, SeatMap, Showtime, Theater
+from app.models.user import User
+from app.services.payment_service import PaymentService
+from app.services.reservation_service import ReservationService
+from app.services.seat_inventory import (
+    ensure_auditorium_seat_inventory,
+    provision_showtime_seat_statuses,
+)
+from benchmarks.common import latency_summary, write_report
+
+BENCHMARK_NAME = "reservation_contention"
+
+
+class FakeStripePaymentService(PaymentService):
+    """Payment service whose Stripe Checkout call is a fixed-latency stand-in."""
+
+    def __init__(self, latency_seconds: float) -> None:
+        super().__init__()
+        self._latency_seconds = latency_seconds
+
+    async def _create_stripe_checkout_session(
+        self,
+        *,
+        order_id: int,
+        user_id: int,
+        reservation_id: int,
+        seat_rows: list[tuple[int, str]],
+        currency: str,
+    ) -> tuple[str, str]:
+        await asyncio.sleep(self._latency_seconds)
+        session_id = f"cs_bench_{uuid4().hex}"
+        return session_id, f"https://checkout.stripe.test/pay/{session_id}"
+
+
+@dataclass
+class _Results:
+    hold_attempts: int = 0
+    hold_conflicts: int = 0
+    deadlocks: int = 0
+    errors: Counter[str] = field(default_factory=Counter)
+    purchases: int = 0
+    seats_sold: int = 0
+    gave_up: int = 0
+    latencies: dict[str, list[float]] = field(
+        default_factory=lambda: {"hold": [], "checkout": [], "finalize": [], "purchase": []}
+    )
+
+
+async def _seed(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    rows: int,
+    seats_per_row: int,
+    users: int,
+) -> tuple[int, list[list[int]], list[int]]:
+    run_id = uuid4().hex[:8]
+    async with session_factory() as session:
+        async with session.begin():
+            movie = (await session.execute(select(Movie).limit(1))).scalar_one_or_none()
+            if movie is None:
+                movie = Movie(title="Benchmark Feature", runtime_minutes=110, rating="PG")
+                session.add(movie)
+            theater = Theater(
+                name=f"Benchmark Theater {run_id}",
+                address="1 Load Test Way",
+                city="New York",
+                timezone="America/New_York",
+            )
+            seatmap = SeatMap(
+                name=f"Benchmark Layout {run_id}",
+                layout_json={
+                    "rows": [chr(ord("A") + index) for index in range(rows)],
+                    "seats_per_row": seats_per_row,
+                },
+            )
+            session.add_all([theater, seatmap])
+            await session.flush()
+            auditorium = Auditorium(
+                theater_id=theater.id,
+                name=f"Benchmark Hall {run_id}",
+                seatmap_id=seatmap.id,
+            )
+            session.add(auditorium)
+            await session.flush()
+            await ensure_auditorium_seat_inventory(session, auditorium)
+
+            starts_at = datetime.now(tz=UTC) + timedelta(days=2)
+            showtime = Showtime(
+                movie_id=movie.id,
+                auditorium_id=auditorium.id,
+                starts_at=starts_at,
+                ends_at=starts_at + timedelta(minutes=movie.runtime_minutes + 20),
+                status="SCHEDULED",
+            )
+            session.add(showtime)
+            await session.flush()
+            await provision_showtime_seat_statuses(session, [showtime.id])
+
+            seat_rows = (
+                await session.execute(
+                    select(Seat.row_label, Seat.id)
+                    .where(Seat.auditorium_id == auditorium.id)
+                    .order_by(Seat.row_label.asc(), Seat.seat_number.asc())
+                )
+            ).all()
+            seats_by_row: dict[str, list[int]] = {}
+            for row_label, seat_id in seat_rows:
+                seats_by_row.setdefault(row_label, []).append(seat_id)
+
+            password_hash = hash_password(uuid4().hex)
+            user_ids = list(
+                (
+                    await session.execute(
+                        insert(User)
+                        .values(
+                            [
+                                {
+                                    "email": f"bench-{run_id}-{index}@example.test",
+                                    "password_hash": password_hash,
+                                    "role": "USER",
+                                }
+                                for index in range(users)
+                            ]
+                        )
+                        .returning(User.id)
+                    )
+                ).scalars()
+            )
+            return showtime.id, list(seats_by_row.values()), user_ids
+
+
+def _pick_block(rng: random.Random, rows: list[list[int]], max_party: int) -> list[int]:
+    row = rng.choice(rows)
+    party = min(len(row), rng.randint(1, max_party))
+    start = rng.randrange(len(row) - party + 1)
+    return row[start : start + party]
+
+
+async def _buyer(
+    *,
+    user_id: int,
+    showtime_id: int,
+    rows: list[list[int]],
+    rng: random.Random,
+    args: argparse.Namespace,
+    session_factory: async_sessionmaker[AsyncSession],
+    reservation_service: ReservationService,
+    payment_service: PaymentService,
+    results: _Results,
+    gate: asyncio.Semaphore,
+) -> None:
+    async with gate:
+        purchase_started = time.perf_counter()
+        for _ in range(args.max_attempts):
+            seat_ids = _pick_block(rng, rows, args.max_party)
+            results.hold_attempts += 1
+            started = time.perf_counter()
+            try:
+                async with session_factory() as session:
+                    async with session.begin():
+                        reservation = await reservation_service.create_hold(
+                            session,
+                            user_id=user_id,
+                            showtime_id=showtime_id,
+                            seat_ids=seat_ids,
+                            hold_minutes=settings.reservation_hold_minutes,
+                        )
+                results.latencies["hold"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                async with session_factory() as session:
+                    async with session.begin():
+                        checkout = await payment_service.create_checkout_session(
+                            session,
+                            user_id=user_id,
+                            reservation_id=reservation.id,
+                            provider="STRIPE_CHECKOUT",
+                        )
+                    checkout = await payment_service.open_stripe_checkout(
+                        session,
+                        checkout=checkout,
+                        user_id=user_id,
+                    )
+                results.latencies["checkout"].append(time.perf_counter() - started)
+
+                # Time the buyer spends on the hosted page before the webhook arrives.
+                await asyncio.sleep(args.payment_delay_ms / 1000)
+
+                started = time.perf_counter()
+                async with session_factory() as session:
+                    async with session.begin():
+                        order = await payment_service.get_order_for_user(
+                            session,
+                            order_id=checkout.order_id,
+                            user_id=user_id,
+                        )
+                        finalized = await payment_service.finalize_paid_order(
+                            session,
+                            order=order,
+                        )
+                results.latencies["finalize"].append(time.perf_counter() - started)
+            except HTTPException as exc:
+                if exc.status_code == 409:
+                    results.hold_conflicts += 1
+                    continue
+                results.errors[f"http_{exc.status_code}"] += 1
+                return
+            except DBAPIError as exc:
+                if "deadlock" in str(exc.orig).lower():
+                    results.deadlocks += 1
+                    continue
+                results.errors[type(exc.orig).__name__] += 1
+                return
+
+            if finalized.order_status == "PAID":
+                results.purchases += 1
+                results.seats_sold += finalized.ticket_count
+                results.latencies["purchase"].append(time.perf_counter() - purchase_started)
+            else:
+                results.errors[f"order_{finalized.order_status.lower()}"] += 1
+            return
+        results.gave_up += 1
+
+
+async def _check_invariants(
+    session_factory: async_sessionmaker[AsyncSession],
+    showtime_id: int,
+) -> dict[str, int | bool]:
+    async with session_factory() as session:
+        ticket_counts = (
+            await session.execute(
+                select(Ticket.seat_id, func.count(Ticket.id))
+                .join(Order, Order.id == Ticket.order_id)
+                .where(Order.showtime_id == showtime_id, Order.status == "PAID")
+                .group_by(Ticket.seat_id)
+            )
+        ).all()
+        sold_statuses = (
+            await session.execute(
+                select(func.count(ShowtimeSeatStatus.id)).where(
+                    ShowtimeSeatStatus.showtime_id == showtime_id,
+                    ShowtimeSeatStatus.status == "SOLD",
+                )
+            )
+        ).scalar_one()
+        rollup_sold = (
+            await session.execute(
+                select(ShowtimeSalesRollup.sold_seats).where(
+                    ShowtimeSalesRollup.showtime_id == showtime_id
+                )
+            )
+        ).scalar_one_or_none()
+    tickets = sum(count for _, count in ticket_counts)
+    oversold_seats = sum(1 for _, count in ticket_counts if count > 1)
+    return {
+        "tickets": tickets,
+        "oversold_seats": oversold_seats,
+        "sold_seat_statuses": sold_statuses,
+        "rollup_sold_seats": rollup_sold or 0,
+        "ok": oversold_seats == 0 and tickets == sold_statuses == (rollup_sold or 0),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    engine = create_async_engine(
+        settings.database_url,
+        pool_size=args.pool_size,
+        max_overflow=0,
+    )
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        showtime_id, rows, user_ids = await _seed(
+            session_factory,
+            rows=args.rows,
+            seats_per_row=args.seats_per_row,
+            users=args.users,
+        )
+        results = _Results()
+        gate = asyncio.Semaphore(args.concurrency)
+        reservation_service = ReservationService()
+        payment_service = FakeStripePaymentService(args.stripe_latency_ms / 1000)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _buyer(
+                    user_id=user_id,
+                    showtime_id=showtime_id,
+                    rows=rows,
+                    rng=random.Random(args.seed * 1_000_003 + index),
+                    args=args,
+                    session_factory=session_factory,
+                    reservation_service=reservation_service,
+                    payment_service=payment_service,
+                    results=results,
+                    gate=gate,
+                )
+                for index, user_id in enumerate(user_ids)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        invariants = await _check_invariants(session_factory, showtime_id)
+    finally:
+        await engine.dispose()
+
+    return {
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in {"output"}
+        },
+        "showtime_id": showtime_id,
+        "capacity": sum(len(row) for row in rows),
+        "elapsed_seconds": round(elapsed, 3),
+        "totals": {
+            "users": len(user_ids),
+            "purchases": results.purchases,
+            "seats_sold": results.seats_sold,
+            "gave_up": results.gave_up,
+            "hold_attempts": results.hold_attempts,
+            "hold_conflicts": results.hold_conflicts,
+            "deadlocks": results.deadlocks,
+            "errors": dict(results.errors),
+        },
+        "conflict_rate": round(results.hold_conflicts / max(1, results.hold_attempts), 4),
+        "throughput": {
+            "purchases_per_second": round(results.purchases / elapsed, 2),
+            "hold_attempts_per_second": round(results.hold_attempts / elapsed, 2),
+        },
+        "latency_ms": {
+            phase: latency_summary(values) for phase, values in results.latencies.items()
+        },
+        "invariants": invariants,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--seats-per-row", type=int, default=20)
+    parser.add_argument("--max-party", type=int, default=4)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--stripe-latency-ms", type=float, default=80.0)
+    parser.add_argument("--payment-delay-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Report path (JSON)")
+    args = parser.parse_args()
+    if min(args.users, args.concurrency, args.pool_size, args.rows, args.seats_per_row) < 1:
+        parser.error("sizes must be positive")
+
+    report = asyncio.run(run(args))
+    path = write_report(BENCHMARK_NAME, report, args.output)
+
+    totals = report["totals"]
+    print(
+        f"users={totals['users']} purchases={totals['purchases']} "
+        f"seats_sold={totals['seats_sold']}/{report['capacity']} "
+        f"conflict_rate={report['conflict_rate']:.2%} deadlocks={totals['deadlocks']}"
+    )
+    print(
+        f"throughput={report['throughput']['purchases_per_second']} purchases/s "
+        f"elapsed={report['elapsed_seconds']}s"
+    )
+    for phase, summary in report["latency_ms"].items():
+        print(
+            f"{phase:>9}: p50={summary['p50']:.1f}ms p95={summary['p95']:.1f}ms "
+            f"p99={summary['p99']:.1f}ms"
+        )
+    print(f"invariants={report['invariants']}")
+    print(f"report written to {path}")
+    if not report["invariants"]["ok"]:
+        raise SystemExit("oversell invariant violated")
+
+
+if __name__ == "__main__":
+    main()
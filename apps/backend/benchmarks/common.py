@@ -0,0 +1,54 @@
+"""Helpers shared by benchmarks that write comparable JSON reports."""
+
+import json
+import subprocess
+from datetime import UTC, datetime
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def percentile(sorted_values: list[float], percentile_rank: float) -> float:
+    """Nearest-rank percentile of an already sorted list; 0.0 when it is empty."""
+    if not sorted_values:
+        return 0.0
+    index = round(percentile_rank / 100 * len(sorted_values)) - 1
+    return sorted_values[min(len(sorted_values) - 1, max(0, index))]
+
+
+def latency_summary(seconds: list[float]) -> dict[str, float]:
+    values_ms = sorted(value * 1000 for value in seconds)
+    return {
+        "count": len(values_ms),
+        "p50": round(percentile(values_ms, 50), 3),
+        "p95": round(percentile(values_ms, 95), 3),
+        "p99": round(percentile(values_ms, 99), 3),
+        "max": round(values_ms[-1], 3) if values_ms else 0.0,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_report(name: str, payload: dict, output: str | None) -> Path:
+    """Write a report stamped with the git revision; defaults to ``results/<name>-<rev>.json``."""
+    revision = git_revision()
+    report = {
+        "benchmark": name,
+        "git_revision": revision,
+        "generated_at": datetime.now(tz=UTC).isoformat(),
+        **payload,
+    }
+    path = Path(output) if output else RESULTS_DIR / f"{name}-{revision}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return path
@@ -0,0 +1,127 @@
+"""Replay historical PAID orders against recommendation ranker variants.
+
+Run from ``apps/backend`` against a database with production-like history::
+
+    python -m scripts.evaluate_recommendations --variants A,B --k 10 --workers 4
+    python -m scripts.evaluate_recommendations --weights tuned=0.55,0.27,0.18 --output eval.json
+
+Every PAID order becomes a case: the buyer's earlier orders and feedback are replayed,
+the candidate pool is rebuilt as of the order time, and the order's movie is the item
+the ranker should surface. Movie similarity is read as currently stored, so it already
+reflects the held-out purchases; compare variants against each other, not against an
+absolute target.
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import asdict
+from datetime import datetime
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.services.recommendation_evaluation_service import (
+    ReplayCase,
+    ReplayCatalog,
+    evaluate_variants,
+    load_replay_cases,
+    load_replay_catalog,
+)
+from app.services.recommendation_variant_service import (
+    RANKER_VARIANT_WEIGHTS,
+    RankerVariant,
+    load_variant_table,
+)
+
+
+def _parse_weights(value: str) -> tuple[str, tuple[float, float, float]]:
+    name, _, raw_weights = value.partition("=")
+    parts = [float(part) for part in raw_weights.split(",") if part.strip()]
+    if not name or len(parts) != 3:
+        raise argparse.ArgumentTypeError(
+            "weights must look like NAME=personalized,popularity,freshness"
+        )
+    return name, (parts[0], parts[1], parts[2])
+
+
+async def _load(
+    since: datetime | None,
+    max_cases: int | None,
+) -> tuple[ReplayCatalog, list[ReplayCase], tuple[RankerVariant, ...]]:
+    try:
+        table_variants = await load_variant_table()
+        async with AsyncSessionLocal() as session:
+            catalog = await load_replay_catalog(session)
+            cases = await load_replay_cases(
+                session,
+                catalog,
+                since=since,
+                max_cases=max_cases,
+            )
+    finally:
+        await engine.dispose()
+    return catalog, cases, table_variants
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--variants",
+        default=",".join(RANKER_VARIANT_WEIGHTS),
+        help="Comma-separated variants to evaluate, from the variants table or built-ins",
+    )
+    parser.add_argument(
+        "--weights",
+        action="append",
+        type=_parse_weights,
+        default=[],
+        help="Extra candidate weights as NAME=personalized,popularity,freshness",
+    )
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--max-cases", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    catalog, cases, table_variants = asyncio.run(_load(args.since, args.max_cases))
+    known_weights = {
+        **RANKER_VARIANT_WEIGHTS,
+        **{variant.name: variant.weights for variant in table_variants},
+    }
+    requested = [name.strip().upper() for name in args.variants.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in known_weights]
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(unknown)}")
+    variants = {name: known_weights[name] for name in requested}
+    variants.update(dict(args.weights))
+
+    reports = evaluate_variants(
+        catalog,
+        cases,
+        variants=variants,
+        k=args.k,
+        diversity_penalty=settings.recommendation_diversity_penalty,
+        save_for_later_boost=settings.recommendation_save_for_later_boost,
+        workers=args.workers,
+    )
+    payload = {
+        "generated_at": datetime.now().astimezone().isoformat(),
+        "cases": len(cases),
+        "variants": [asdict(report) for report in reports],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(payload, output_file, indent=2)
+
+    print(f"cases={len(cases)} k={args.k}")
+    for report in reports:
+        print(
+            f"{report.variant:>10}  hit_rate={report.hit_rate:.4f}  ndcg={report.ndcg:.4f}  "
+            f"coverage={report.pool_coverage:.4f}  p50={report.latency_ms['p50']:.3f}ms  "
+            f"p95={report.latency_ms['p95']:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
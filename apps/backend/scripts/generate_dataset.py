@@ -0,0 +1,595 @@
+"""Bulk-load a large synthetic cinema dataset for local benchmarking.
+
+Run from ``apps/backend`` against a disposable database::
+
+    python -m scripts.generate_dataset --reset
+    python -m scripts.generate_dataset --movies 5000 --theaters 400 --days-back 14 --days-ahead 21
+
+Rows are streamed with ``COPY`` (asyncpg ``copy_records_to_table``) inside one
+transaction, with explicit ids taken above each table's current maximum, so the tool can
+append to an existing database. It takes exclusive locks on the tables it writes; do not
+run it against a database that is serving traffic. Generation is deterministic per
+``--seed``. Sales rollups are recomputed afterwards and movie similarity is rebuilt unless
+``--skip-similarity`` is passed.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+import asyncpg
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.config import settings
+from app.core.security import hash_password
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, engine
+from app.services.movie_similarity_service import rebuild_movie_similarity
+from app.services.payment_service import SEAT_TYPE_PRICE_CENTS
+from app.services.sales_rollup_service import recompute_sales_rollups_job
+from app.services.seat_inventory import SeatSpec, generate_seats_from_layout
+
+SYNTHETIC_PASSWORD = "Synthetic123!"
+SHOWTIME_CHUNK_SIZE = 500
+
+# Tables written by the generator, in truncate order for --reset.
+GENERATED_TABLES = (
+    "tickets",
+    "orders",
+    "reservation_seats",
+    "showtime_seat_status",
+    "showtime_sales_rollups",
+    "reservations",
+    "showtimes",
+    "seats",
+    "auditoriums",
+    "seat_maps",
+    "theaters",
+    "movie_similarity",
+    "user_recommendation_candidates",
+    "recommendation_events",
+    "user_movie_events",
+    "movies",
+)
+
+GENRES = (
+    "Action",
+    "Adventure",
+    "Animation",
+    "Comedy",
+    "Crime",
+    "Documentary",
+    "Drama",
+    "Family",
+    "Fantasy",
+    "Horror",
+    "Mystery",
+    "Romance",
+    "Sci-Fi",
+    "Thriller",
+)
+RATINGS = ("G", "PG", "PG-13", "R", "NR")
+TITLE_WORDS = (
+    "Midnight",
+    "Skyline",
+    "Echo",
+    "Harbor",
+    "Orbit",
+    "Last",
+    "Silent",
+    "Empire",
+    "Golden",
+    "Neon",
+    "River",
+    "Shadow",
+    "Summer",
+    "Iron",
+    "Paper",
+    "Crimson",
+)
+CITIES = (
+    ("New York", "America/New_York"),
+    ("Boston", "America/New_York"),
+    ("Chicago", "America/Chicago"),
+    ("Austin", "America/Chicago"),
+    ("Denver", "America/Denver"),
+    ("Phoenix", "America/Phoenix"),
+    ("Seattle", "America/Los_Angeles"),
+    ("Los Angeles", "America/Los_Angeles"),
+)
+SEAT_MAP_LAYOUTS = (
+    (
+        "Synthetic Standard 96",
+        {
+            "rows": list("ABCDEFGH"),
+            "seats_per_row": 12,
+            "aisles_after": [4, 8],
+            "screen_position": "top",
+        },
+    ),
+    (
+        "Synthetic Large 240",
+        {
+            "rows": list("ABCDEFGHIJKL"),
+            "seats_per_row": 20,
+            "aisles_after": [5, 15],
+            "seat_types": {"A": "VIP", "B": "VIP", "C": "PREMIUM", "D": "PREMIUM"},
+            "screen_position": "top",
+        },
+    ),
+    (
+        "Synthetic Flagship 500",
+        {
+            "rows": list("ABCDEFGHIJKLMNOPQRST"),
+            "seats_per_row": 25,
+            "aisles_after": [6, 19],
+            "seat_types": {"A": "VIP", "B": "VIP", "C": "VIP", "D": "PREMIUM"},
+            "screen_position": "top",
+        },
+    ),
+)
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    movies: int
+    theaters: int
+    auditoriums_per_theater: int
+    days_back: int
+    days_ahead: int
+    shows_per_day: int
+    users: int
+    sell_through: float
+    seed: int
+
+
+@dataclass
+class _Counts:
+    rows: dict[str, int] = field(default_factory=dict)
+
+    def add(self, table: str, count: int) -> None:
+        self.rows[table] = self.rows.get(table, 0) + count
+
+
+@dataclass
+class _Auditorium:
+    id: int
+    timezone: str
+    seats: list[tuple[int, SeatSpec]]
+
+
+class _Loader:
+    def __init__(self, connection: asyncpg.Connection, counts: _Counts) -> None:
+        self._connection = connection
+        self._counts = counts
+        self._next_ids: dict[str, int] = {}
+
+    async def lock_and_reserve_ids(self) -> None:
+        for table in GENERATED_TABLES + ("users",):
+            await self._connection.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+            if table == "showtime_sales_rollups":
+                continue
+            self._next_ids[table] = (
+                await self._connection.fetchval(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+            )
+
+    def allocate(self, table: str, count: int) -> range:
+        start = self._next_ids[table]
+        self._next_ids[table] = start + count
+        return range(start, start + count)
+
+    async def copy(self, table: str, columns: tuple[str, ...], records: list[tuple]) -> None:
+        if not records:
+            return
+        await self._connection.copy_records_to_table(table, columns=columns, records=records)
+        self._counts.add(table, len(records))
+
+    async def sync_sequences(self) -> None:
+        for table in self._next_ids:
+            await self._connection.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+            )
+
+
+def _movie_records(rng: random.Random, ids: range, today: date) -> list[tuple]:
+    records = []
+    for movie_id in ids:
+        title = f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {movie_id}"
+        genres = rng.sample(GENRES, rng.randint(1, 3))
+        records.append(
+            (
+                movie_id,
+                title,
+                f"Synthetic {genres[0].lower()} feature #{movie_id}.",
+                rng.randint(82, 172),
+                rng.choice(RATINGS),
+                today - timedelta(days=rng.randint(-60, 720)),
+                None,
+                json.dumps({"genre": genres}),
+            )
+        )
+    return records
+
+
+def _showtime_starts(day: date, timezone: str, shows_per_day: int) -> Iterator[datetime]:
+    zone = ZoneInfo(timezone)
+    first = datetime.combine(day, datetime.min.time(), tzinfo=zone) + timedelta(hours=11)
+    for index in range(shows_per_day):
+        yield (first + timedelta(minutes=195 * index)).astimezone(UTC)
+
+
+async def _load_catalog(
+    loader: _Loader,
+    spec: DatasetSpec,
+    rng: random.Random,
+    today: date,
+) -> tuple[list[int], list[int], list[_Auditorium]]:
+    movie_ids = loader.allocate("movies", spec.movies)
+    movie_records = _movie_records(rng, movie_ids, today)
+    await loader.copy(
+        "movies",
+        (
+            "id",
+            "title",
+            "description",
+            "runtime_minutes",
+            "rating",
+            "release_date",
+            "poster_url",
+            "metadata_json",
+        ),
+        movie_records,
+    )
+    runtimes = [record[3] for record in movie_records]
+
+    seat_map_ids = loader.allocate("seat_maps", len(SEAT_MAP_LAYOUTS))
+    await loader.copy(
+        "seat_maps",
+        ("id", "name", "layout_json"),
+        [
+            (seat_map_id, name, json.dumps(layout))
+            for seat_map_id, (name, layout) in zip(seat_map_ids, SEAT_MAP_LAYOUTS, strict=True)
+        ],
+    )
+    layout_seats = [generate_seats_from_layout(layout) for _, layout in SEAT_MAP_LAYOUTS]
+
+    theater_ids = loader.allocate("theaters", spec.theaters)
+    theater_records = []
+    for theater_id in theater_ids:
+        city, timezone = rng.choice(CITIES)
+        theater_records.append(
+            (theater_id, f"Synthetic Cinemas {theater_id}", f"{theater_id} Main St", city, timezone)
+        )
+    await loader.copy("theaters", ("id", "name", "address", "city", "timezone"), theater_records)
+
+    auditoriums: list[_Auditorium] = []
+    auditorium_records = []
+    seat_records = []
+    auditorium_ids = iter(
+        loader.allocate("auditoriums", spec.theaters * spec.auditoriums_per_theater)
+    )
+    for theater_id, _, _, _, timezone in theater_records:
+        for number in range(1, spec.auditoriums_per_theater + 1):
+            auditorium_id = next(auditorium_ids)
+            # Mostly standard rooms, some large ones, one flagship per theater.
+            layout_index = 2 if number == 1 else (1 if rng.random() < 0.3 else 0)
+            auditorium_records.append(
+                (auditorium_id, theater_id, f"Auditorium {number}", seat_map_ids[layout_index])
+            )
+            seats = layout_seats[layout_index]
+            seat_ids = loader.allocate("seats", len(seats))
+            seat_records.extend(
+                (
+                    seat_id,
+                    auditorium_id,
+                    seat.seat_code,
+                    seat.row_label,
+                    seat.seat_number,
+                    seat.seat_type,
+                )
+                for seat_id, seat in zip(seat_ids, seats, strict=True)
+            )
+            auditoriums.append(
+                _Auditorium(
+                    id=auditorium_id,
+                    timezone=timezone,
+                    seats=list(zip(seat_ids, seats, strict=True)),
+                )
+            )
+    await loader.copy(
+        "auditoriums",
+        ("id", "theater_id", "name", "seatmap_id"),
+        auditorium_records,
+    )
+    await loader.copy(
+        "seats",
+        ("id", "auditorium_id", "seat_code", "row_label", "seat_number", "seat_type"),
+        seat_records,
+    )
+    return list(movie_ids), runtimes, auditoriums
+
+
+async def _load_users(loader: _Loader, spec: DatasetSpec) -> list[int]:
+    user_ids = loader.allocate("users", spec.users)
+    password_hash = hash_password(SYNTHETIC_PASSWORD)
+    await loader.copy(
+        "users",
+        ("id", "email", "password_hash", "role"),
+        [
+            (user_id, f"synthetic-{user_id}@example.test", password_hash, "USER")
+            for user_id in user_ids
+        ],
+    )
+    return list(user_ids)
+
+
+async def _load_showtimes_and_sales(
+    loader: _Loader,
+    spec: DatasetSpec,
+    rng: random.Random,
+    today: date,
+    movie_ids: list[int],
+    runtimes: list[int],
+    auditoriums: list[_Auditorium],
+    user_ids: list[int],
+) -> None:
+    now = datetime.now(tz=UTC)
+    # Zipf-like popularity so a few titles dominate sales, as in real box office data.
+    movie_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(movie_ids))]
+    days = [today + timedelta(days=offset) for offset in range(-spec.days_back, spec.days_ahead)]
+
+    slots = [
+        (auditorium, starts_at)
+        for auditorium in auditoriums
+        for day in days
+        for starts_at in _showtime_starts(day, auditorium.timezone, spec.shows_per_day)
+    ]
+    for chunk_start in range(0, len(slots), SHOWTIME_CHUNK_SIZE):
+        chunk = slots[chunk_start : chunk_start + SHOWTIME_CHUNK_SIZE]
+        showtime_ids = loader.allocate("showtimes", len(chunk))
+        showtimes = []
+        statuses = []
+        reservations = []
+        reservation_seats = []
+        orders = []
+        tickets = []
+        for showtime_id, (auditorium, starts_at) in zip(showtime_ids, chunk, strict=True):
+            movie_index = rng.choices(range(len(movie_ids)), weights=movie_weights)[0]
+            ends_at = starts_at + timedelta(minutes=runtimes[movie_index] + 20)
+            movie_id = movie_ids[movie_index]
+            showtimes.append(
+                (showtime_id, movie_id, auditorium.id, starts_at, ends_at, "SCHEDULED")
+            )
+
+            # Past shows are closer to their final sell-through than upcoming ones.
+            progress = 1.0 if starts_at <= now else max(0.1, 1 - (starts_at - now).days / 14)
+            capacity = len(auditorium.seats)
+            sold_target = min(
+                capacity,
+                int(capacity * spec.sell_through * progress * rng.random() * 2),
+            )
+            sold_seat_ids: set[int] = set()
+            seat_index = rng.randrange(capacity)
+            while len(sold_seat_ids) < sold_target:
+                group = auditorium.seats[seat_index : seat_index + rng.randint(1, 4)]
+                seat_index = (seat_index + len(group) + rng.randint(0, 6)) % capacity
+                group = [(seat_id, seat) for seat_id, seat in group if seat_id not in sold_seat_ids]
+                if not group:
+                    continue
+                reservation_id = loader.allocate("reservations", 1)[0]
+                order_id = loader.allocate("orders", 1)[0]
+                user_id = rng.choice(user_ids)
+                purchased_at = min(
+                    now,
+                    starts_at - timedelta(minutes=rng.randint(15, 14 * 24 * 60)),
+                )
+                reservations.append(
+                    (
+                        reservation_id,
+                        user_id,
+                        showtime_id,
+                        "COMPLETED",
+                        purchased_at + timedelta(minutes=10),
+                        purchased_at,
+                    )
+                )
+                orders.append(
+                    (
+                        order_id,
+                        user_id,
+                        showtime_id,
+                        reservation_id,
+                        "PAID",
+                        sum(SEAT_TYPE_PRICE_CENTS.get(seat.seat_type, 1500) for _, seat in group),
+                        "USD",
+                        "synthetic",
+                        f"synthetic_{order_id}",
+                        purchased_at,
+                    )
+                )
+                for seat_id, _ in group:
+                    sold_seat_ids.add(seat_id)
+                    reservation_seats.append(
+                        (loader.allocate("reservation_seats", 1)[0], reservation_id, seat_id)
+                    )
+                    tickets.append(
+                        (
+                            loader.allocate("tickets", 1)[0],
+                            order_id,
+                            seat_id,
+                            f"tkt_{UUID(int=rng.getrandbits(128)).hex}",
+                            "USED" if starts_at <= now else "VALID",
+                            purchased_at,
+                        )
+                    )
+
+            status_ids = loader.allocate("showtime_seat_status", len(auditorium.seats))
+            statuses.extend(
+                (
+                    status_id,
+                    showtime_id,
+                    seat_id,
+                    "SOLD" if seat_id in sold_seat_ids else "AVAILABLE",
+                )
+                for status_id, (seat_id, _) in zip(status_ids, auditorium.seats, strict=True)
+            )
+
+        await loader.copy(
+            "showtimes",
+            ("id", "movie_id", "auditorium_id", "starts_at", "ends_at", "status"),
+            showtimes,
+        )
+        await loader.copy(
+            "reservations",
+            ("id", "user_id", "showtime_id", "status", "expires_at", "created_at"),
+            reservations,
+        )
+        await loader.copy(
+            "orders",
+            (
+                "id",
+                "user_id",
+                "showtime_id",
+                "reservation_id",
+                "status",
+                "total_cents",
+                "currency",
+                "provider",
+                "provider_session_id",
+                "created_at",
+            ),
+            orders,
+        )
+        await loader.copy(
+            "reservation_seats",
+            ("id", "reservation_id", "seat_id"),
+            reservation_seats,
+        )
+        await loader.copy(
+            "tickets",
+            ("id", "order_id", "seat_id", "qr_token", "status", "created_at"),
+            tickets,
+        )
+        await loader.copy(
+            "showtime_seat_status",
+            ("id", "showtime_id", "seat_id", "status"),
+            statuses,
+        )
+
+
+async def generate_dataset(
+    spec: DatasetSpec,
+    *,
+    reset: bool,
+    rebuild_similarity: bool,
+) -> dict[str, int]:
+    counts = _Counts()
+    rng = random.Random(spec.seed)
+    today = datetime.now(tz=UTC).date()
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with engine.connect() as connection:
+        raw_connection = await connection.get_raw_connection()
+        driver_connection: asyncpg.Connection = raw_connection.driver_connection
+        async with driver_connection.transaction():
+            if reset:
+                await driver_connection.execute(
+                    f"TRUNCATE {', '.join(GENERATED_TABLES)} RESTART IDENTITY CASCADE"
+                )
+            loader = _Loader(driver_connection, counts)
+            await loader.lock_and_reserve_ids()
+            movie_ids, runtimes, auditoriums = await _load_catalog(loader, spec, rng, today)
+            user_ids = await _load_users(loader, spec)
+            await _load_showtimes_and_sales(
+                loader,
+                spec,
+                rng,
+                today,
+                movie_ids,
+                runtimes,
+                auditoriums,
+                user_ids,
+            )
+            await loader.sync_sequences()
+        await driver_connection.execute("ANALYZE")
+
+    await recompute_sales_rollups_job()
+    if rebuild_similarity:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await rebuild_movie_similarity(
+                    session,
+                    top_k=settings.recommendation_similarity_top_k,
+                )
+    return counts.rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=2000)
+    parser.add_argument("--theaters", type=int, default=200)
+    parser.add_argument("--auditoriums-per-theater", type=int, default=8)
+    parser.add_argument("--days-back", type=int, default=7)
+    parser.add_argument("--days-ahead", type=int, default=14)
+    parser.add_argument("--shows-per-day", type=int, default=4)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument(
+        "--sell-through",
+        type=float,
+        default=0.35,
+        help="Average fraction of seats sold for a show that has already started",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Truncate catalog, inventory, sales and recommendation tables first",
+    )
+    parser.add_argument("--skip-similarity", action="store_true")
+    args = parser.parse_args()
+    if min(args.movies, args.theaters, args.auditoriums_per_theater, args.users) < 1:
+        parser.error("--movies, --theaters, --auditoriums-per-theater and --users must be >= 1")
+    if not 0 <= args.sell_through <= 1:
+        parser.error("--sell-through must be between 0 and 1")
+
+    spec = DatasetSpec(
+        movies=args.movies,
+        theaters=args.theaters,
+        auditoriums_per_theater=args.auditoriums_per_theater,
+        days_back=args.days_back,
+        days_ahead=args.days_ahead,
+        shows_per_day=args.shows_per_day,
+        users=args.users,
+        sell_through=args.sell_through,
+        seed=args.seed,
+    )
+
+    async def run() -> dict[str, int]:
+        try:
+            return await generate_dataset(
+                spec,
+                reset=args.reset,
+                rebuild_similarity=not args.skip_similarity,
+            )
+        finally:
+            await engine.dispose()
+
+    started_at = time.perf_counter()
+    counts = asyncio.run(run())
+    elapsed = time.perf_counter() - started_at
+    for table, count in sorted(counts.items()):
+        print(f"{table:>22}  {count:>12,}")
+    print(f"loaded {sum(counts.values()):,} rows in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
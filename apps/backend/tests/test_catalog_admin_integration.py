@@ -1,7 +1,10 @@
+from collections import Counter
 from datetime import UTC, datetime, timedelta
 
 from fastapi.testclient import TestClient
 
+from app.core.cache import delete_cache_prefix
+
 
 def test_catalog_list_endpoints_return_seeded_data(client: TestClient) -> None:
     movies_response = client.get("/api/movies", params={"limit": 5, "offset": 0})
@@ -34,6 +37,19 @@ def test_showtime_seat_map_endpoint_returns_inventory(client: TestClient) -> Non
     assert len(payload["seats"]) > 0
     assert all("status" in seat for seat in payload["seats"])
 
+    client.portal.call(delete_cache_prefix, "catalog:showtimes:")
+    listed = next(
+        item
+        for item in client.get("/api/showtimes", params={"limit": 100}).json()["items"]
+        if item["id"] == showtime_id
+    )
+    statuses = Counter(seat["status"] for seat in payload["seats"])
+    assert (listed["available_seats"], listed["held_seats"], listed["sold_seats"]) == (
+        statuses["AVAILABLE"],
+        statuses["HELD"],
+        statuses["SOLD"],
+    )
+
 
 def test_admin_movie_crud_flow(client: TestClient) -> None:
     create_response = client.post(
@@ -88,6 +104,71 @@ def test_admin_auditorium_create_and_list(client: TestClient) -> None:
     assert any(item["id"] == created["id"] for item in list_response.json()["items"])
 
 
+def test_admin_auditorium_seats_follow_custom_layout(client: TestClient) -> None:
+    theater_response = client.post(
+        "/api/admin/theaters",
+        json={
+            "name": "Layout Theater",
+            "address": "201 Test Ave",
+            "city": "New York",
+            "timezone": "America/New_York",
+        },
+    )
+    assert theater_response.status_code == 201
+    theater_id = theater_response.json()["id"]
+
+    invalid_response = client.post(
+        "/api/admin/auditoriums",
+        json={"theater_id": theater_id, "name": "Broken Hall", "layout_json": {"rows": []}},
+    )
+    assert invalid_response.status_code == 400
+
+    layout = {
+        "rows": [
+            "A",
+            {"label": "B", "seats": 6, "gaps": [3], "seat_types": {"6": "ACCESSIBLE"}},
+        ],
+        "seats_per_row": 5,
+        "seat_types": {"A": "VIP"},
+        "aisles_after": [2],
+    }
+    auditorium_response = client.post(
+        "/api/admin/auditoriums",
+        json={"theater_id": theater_id, "name": "Layout Hall", "layout_json": layout},
+    )
+    assert auditorium_response.status_code == 201
+    auditorium_id = auditorium_response.json()["id"]
+
+    movie_id = client.get("/api/movies", params={"limit": 1, "offset": 0}).json()["items"][0][
+        "id"
+    ]
+    starts_at = datetime.now(tz=UTC).replace(microsecond=0) + timedelta(days=3)
+    showtime_response = client.post(
+        "/api/admin/showtimes",
+        json={
+            "movie_id": movie_id,
+            "auditorium_id": auditorium_id,
+            "starts_at": starts_at.isoformat(),
+            "ends_at": (starts_at + timedelta(hours=2)).isoformat(),
+        },
+    )
+    assert showtime_response.status_code == 201
+    showtime_id = showtime_response.json()["id"]
+
+    seats_response = client.get(f"/api/showtimes/{showtime_id}/seats")
+    assert seats_response.status_code == 200
+    payload = seats_response.json()
+    assert payload["layout_json"]["aisles_after"] == [2]
+    seats = {seat["seat_code"]: seat for seat in payload["seats"]}
+    assert sorted(seats) == ["A1", "A2", "A3", "A4", "A5", "B1", "B2", "B4", "B5", "B6"]
+    assert seats["A1"]["seat_type"] == "VIP"
+    assert seats["B4"]["seat_number"] == 4
+    assert seats["B6"]["seat_type"] == "ACCESSIBLE"
+    assert all(seat["status"] == "AVAILABLE" for seat in seats.values())
+
+    assert client.delete(f"/api/admin/showtimes/{showtime_id}").status_code == 204
+
+
 def test_admin_showtime_crud_flow(client: TestClient) -> None:
     movies_response = client.get("/api/movies", params={"limit": 1, "offset": 0})
     movie_id = movies_response.json()["items"][0]["id"]
@@ -344,3 +425,86 @@ def test_movie_delete_rejected_when_orders_exist(client: TestClient) -> None:
     delete_response = client.delete(f"/api/admin/movies/{movie_id}")
     assert delete_response.status_code == 409
     assert "tickets/orders exist" in delete_response.json()["detail"]
+
+
+def test_admin_bulk_schedule_creates_week_and_rejects_overlaps(client: TestClient) -> None:
+    theater_response = client.post(
+        "/api/admin/theaters",
+        json={
+            "name": "Bulk Schedule Theater",
+            "address": "202 Test Ave",
+            "city": "New York",
+            "timezone": "America/New_York",
+        },
+    )
+    assert theater_response.status_code == 201
+    theater_id = theater_response.json()["id"]
+    auditorium_ids = []
+    for name in ("Bulk Hall 1", "Bulk Hall 2"):
+        response = client.post(
+            "/api/admin/auditoriums",
+            json={"theater_id": theater_id, "name": name},
+        )
+        assert response.status_code == 201
+        auditorium_ids.append(response.json()["id"])
+    movie_id = client.get("/api/movies", params={"limit": 1, "offset": 0}).json()["items"][0][
+        "id"
+    ]
+
+    start_date = (datetime.now(tz=UTC) + timedelta(days=30)).date()
+    week = {
+        "movie_id": movie_id,
+        "auditorium_ids": auditorium_ids,
+        "start_date": start_date.isoformat(),
+        "end_date": (start_date + timedelta(days=6)).isoformat(),
+        "start_times": ["13:00:00", "16:00:00", "19:30:00"],
+        "duration_minutes": 150,
+    }
+    create_response = client.post("/api/admin/showtimes/bulk", json={"rules": [week]})
+    assert create_response.status_code == 201
+    created = create_response.json()
+    assert created["created"] == 7 * 2 * 3
+    assert len(created["showtime_ids"]) == created["created"]
+
+    seats_response = client.get(f"/api/showtimes/{created['showtime_ids'][0]}/seats")
+    assert seats_response.status_code == 200
+    assert len(seats_response.json()["seats"]) == 96
+
+    local_date_response = client.get(
+        "/api/showtimes",
+        params={"theater_id": theater_id, "date": start_date.isoformat(), "limit": 50},
+    )
+    assert local_date_response.status_code == 200
+    assert local_date_response.json()["total"] == 6
+
+    # 16:00 + 150 minutes runs into 19:30 once a 45-minute turnover is required.
+    turnover_response = client.post(
+        "/api/admin/showtimes/bulk",
+        json={
+            "rules": [{**week, "start_times": ["10:00:00"], "duration_minutes": 120}],
+            "turnover_minutes": 45,
+        },
+    )
+    assert turnover_response.status_code == 201
+    overlap_response = client.post(
+        "/api/admin/showtimes/bulk",
+        json={"rules": [{**week, "start_times": ["18:00:00"], "duration_minutes": 60}]},
+    )
+    assert overlap_response.status_code == 409
+    conflicts = overlap_response.json()["detail"]["conflicts"]
+    assert len(conflicts) == 14
+    assert all(conflict["conflicting_showtime_id"] for conflict in conflicts)
+
+    duplicate_starts_at = datetime.now(tz=UTC).replace(microsecond=0) + timedelta(days=60)
+    duplicate = {
+        "movie_id": movie_id,
+        "auditorium_id": auditorium_ids[0],
+        "starts_at": duplicate_starts_at.isoformat(),
+        "ends_at": (duplicate_starts_at + timedelta(hours=2)).isoformat(),
+    }
+    in_batch_response = client.post(
+        "/api/admin/showtimes/bulk",
+        json={"showtimes": [duplicate, duplicate]},
+    )
+    assert in_batch_response.status_code == 409
+    assert in_batch_response.json()["detail"]["conflicts"][0]["conflicting_showtime_id"] is None
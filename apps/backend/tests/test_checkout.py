@@ -1,9 +1,22 @@
 from uuid import uuid4
 
+import pytest
 from fastapi.testclient import TestClient
+from redis.asyncio import Redis
+from sqlalchemy import text
 
+from app.api.v1 import checkout
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.reservation import Reservation
+from app.services.reservation_service import reconcile_redis_holds_job
+from app.workers.celery_app import celery_app
 
-def _create_active_reservation(client: TestClient) -> tuple[int, int]:
+
+def _create_active_reservation(
+    client: TestClient,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, int]:
     showtimes_response = client.get("/api/showtimes", params={"limit": 1, "offset": 0})
     assert showtimes_response.status_code == 200
     showtime_id = showtimes_response.json()["items"][0]["id"]
@@ -18,6 +31,7 @@ def _create_active_reservation(client: TestClient) -> tuple[int, int]:
 
     reservation_response = client.post(
         "/api/reservations",
+        headers=headers,
         json={"showtime_id": showtime_id, "seat_ids": [seat["seat_id"]]},
     )
     assert reservation_response.status_code == 201
@@ -50,6 +64,164 @@ def test_checkout_demo_confirm_marks_order_paid_and_sells_seat(client: TestClien
     assert status_response.json()["order_status"] == "PAID"
 
 
+def test_paying_for_an_order_enqueues_buyer_candidate_precompute(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sent_tasks: list[tuple[str, list[int]]] = []
+    monkeypatch.setattr(
+        celery_app,
+        "send_task",
+        lambda name, args: sent_tasks.append((name, args)),
+    )
+    register_response = client.post(
+        "/api/auth/register",
+        json={
+            "email": f"buyer-{uuid4().hex[:10]}@bigapplecinemas.local",
+            "password": "Password123!",
+        },
+    )
+    assert register_response.status_code == 201
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+    reservation_id, _ = _create_active_reservation(client, headers)
+    order_id = client.post(
+        "/api/checkout/session",
+        headers=headers,
+        json={"reservation_id": reservation_id},
+    ).json()["order_id"]
+
+    for _ in range(2):
+        confirm_response = client.post(
+            "/api/checkout/demo/confirm",
+            headers=headers,
+            json={"order_id": order_id},
+        )
+        assert confirm_response.json()["order_status"] == "PAID"
+
+    # Only the confirm that paid the order enqueues; the repeat finds it already paid.
+    assert sent_tasks == [("recommendation.precompute_user_candidates", [user_id])]
+
+
+def test_stripe_checkout_session_is_created_once_when_the_order_transaction_retries(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    stripe_calls: list[int] = []
+    order_attempts = 0
+    create_order = checkout.payment_service.create_checkout_session
+
+    async def create_order_then_deadlock_once(session, **kwargs):  # type: ignore[no-untyped-def]
+        nonlocal order_attempts
+        order_attempts += 1
+        checkout_session = await create_order(session, **kwargs)
+        if order_attempts == 1:
+            await session.execute(
+                text(
+                    "DO $$ BEGIN RAISE EXCEPTION 'simulated' "
+                    "USING ERRCODE = 'deadlock_detected'; END $$"
+                )
+            )
+        return checkout_session
+
+    async def fake_stripe_session(*, order_id: int, **_: object) -> tuple[str, str]:
+        stripe_calls.append(order_id)
+        return f"cs_test_{order_id}", f"https://checkout.stripe.test/pay/{order_id}"
+
+    monkeypatch.setattr(
+        checkout.payment_service,
+        "create_checkout_session",
+        create_order_then_deadlock_once,
+    )
+    monkeypatch.setattr(
+        checkout.payment_service,
+        "_create_stripe_checkout_session",
+        fake_stripe_session,
+    )
+    monkeypatch.setattr(settings, "db_retry_base_delay_ms", 1)
+    register_response = client.post(
+        "/api/auth/register",
+        json={
+            "email": f"stripe-{uuid4().hex[:10]}@bigapplecinemas.local",
+            "password": "Password123!",
+        },
+    )
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    reservation_id, _ = _create_active_reservation(client, headers)
+
+    checkout_response = client.post(
+        "/api/checkout/session",
+        headers=headers,
+        json={"reservation_id": reservation_id, "provider": "STRIPE_CHECKOUT"},
+    )
+    assert checkout_response.status_code == 201
+    payload = checkout_response.json()
+    assert order_attempts == 2
+    assert stripe_calls == [payload["order_id"]]
+    assert payload["provider_session_id"] == f"cs_test_{payload['order_id']}"
+    assert payload["checkout_url"] == f"https://checkout.stripe.test/pay/{payload['order_id']}"
+
+    repeat_response = client.post(
+        "/api/checkout/session",
+        headers=headers,
+        json={"reservation_id": reservation_id, "provider": "STRIPE_CHECKOUT"},
+    )
+    assert repeat_response.json()["provider_session_id"] == payload["provider_session_id"]
+    assert len(stripe_calls) == 1
+
+
+def test_idempotency_key_replays_hold_and_checkout_session(client: TestClient) -> None:
+    register_response = client.post(
+        "/api/auth/register",
+        json={
+            "email": f"idempotent-{uuid4().hex[:10]}@bigapplecinemas.local",
+            "password": "Password123!",
+        },
+    )
+    assert register_response.status_code == 201
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    showtime_id = client.get("/api/showtimes", params={"limit": 1, "offset": 2}).json()[
+        "items"
+    ][0]["id"]
+    seat_ids = [
+        seat["seat_id"]
+        for seat in client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+        if seat["status"] == "AVAILABLE"
+    ][:2]
+
+    hold_headers = {**headers, "Idempotency-Key": uuid4().hex}
+    hold_body = {"showtime_id": showtime_id, "seat_ids": seat_ids[:1]}
+    first_hold = client.post("/api/reservations", headers=hold_headers, json=hold_body)
+    retried_hold = client.post("/api/reservations", headers=hold_headers, json=hold_body)
+    assert first_hold.status_code == retried_hold.status_code == 201
+    assert retried_hold.json() == first_hold.json()
+    assert retried_hold.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first_hold.headers
+
+    reused_key = client.post(
+        "/api/reservations",
+        headers=hold_headers,
+        json={"showtime_id": showtime_id, "seat_ids": seat_ids[1:]},
+    )
+    assert reused_key.status_code == 422
+
+    checkout_headers = {**headers, "Idempotency-Key": uuid4().hex}
+    checkout_body = {"reservation_id": first_hold.json()["id"]}
+    first_checkout = client.post(
+        "/api/checkout/session",
+        headers=checkout_headers,
+        json=checkout_body,
+    )
+    retried_checkout = client.post(
+        "/api/checkout/session",
+        headers=checkout_headers,
+        json=checkout_body,
+    )
+    assert first_checkout.status_code == retried_checkout.status_code == 201
+    assert retried_checkout.json() == first_checkout.json()
+    assert retried_checkout.headers["Idempotent-Replayed"] == "true"
+
+
 def test_webhook_is_idempotent_for_duplicate_event_id(client: TestClient) -> None:
     reservation_id, _ = _create_active_reservation(client)
 
@@ -84,3 +256,91 @@ def test_webhook_is_idempotent_for_duplicate_event_id(client: TestClient) -> Non
     )
     assert second_webhook.status_code == 200
     assert second_webhook.json()["duplicate"] is True
+
+
+def test_redis_hold_backend_defers_postgres_writes_until_checkout(client: TestClient) -> None:
+    previous_backend = settings.reservation_hold_backend
+    settings.reservation_hold_backend = "redis"
+    try:
+        showtime_id = client.get("/api/showtimes", params={"limit": 1, "offset": 2}).json()[
+            "items"
+        ][0]["id"]
+        available = [
+            seat["seat_id"]
+            for seat in client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+            if seat["status"] == "AVAILABLE"
+        ]
+        first_seat, second_seat = available[:2]
+
+        def seat_status(seat_id: int) -> str:
+            seats = client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+            return next(seat["status"] for seat in seats if seat["seat_id"] == seat_id)
+
+        async def reservation_row_exists(reservation_id: int) -> bool:
+            async with AsyncSessionLocal() as session:
+                return await session.get(Reservation, reservation_id) is not None
+
+        hold_response = client.post(
+            "/api/reservations",
+            json={"showtime_id": showtime_id, "seat_ids": [first_seat]},
+        )
+        assert hold_response.status_code == 201
+        reservation_id = hold_response.json()["id"]
+        assert seat_status(first_seat) == "HELD"
+        assert not client.portal.call(reservation_row_exists, reservation_id)
+
+        conflict_response = client.post(
+            "/api/reservations",
+            json={"showtime_id": showtime_id, "seat_ids": [first_seat]},
+        )
+        assert conflict_response.status_code == 409
+        active_response = client.get(
+            "/api/reservations/active",
+            params={"showtime_id": showtime_id},
+        )
+        assert active_response.json()["id"] == reservation_id
+
+        canceled_response = client.post(
+            "/api/reservations",
+            json={"showtime_id": showtime_id, "seat_ids": [second_seat]},
+        )
+        assert canceled_response.status_code == 201
+        delete_response = client.delete(f"/api/reservations/{canceled_response.json()['id']}")
+        assert delete_response.status_code == 204
+        assert seat_status(second_seat) == "AVAILABLE"
+
+        checkout_response = client.post(
+            "/api/checkout/session",
+            json={"reservation_id": reservation_id},
+        )
+        assert checkout_response.status_code == 201
+        assert client.portal.call(reservation_row_exists, reservation_id)
+
+        # Simulate a Redis restart; reconciliation restores the checked-out hold.
+        async def drop_hold_keys() -> None:
+            redis = Redis.from_url(settings.redis_url)
+            try:
+                await redis.delete(
+                    f"holds:reservation:{reservation_id}",
+                    f"holds:showtime:{showtime_id}",
+                )
+            finally:
+                await redis.aclose()
+
+        client.portal.call(drop_hold_keys)
+        assert seat_status(first_seat) == "AVAILABLE"
+        counts = client.portal.call(reconcile_redis_holds_job)
+        assert counts["restored_holds"] >= 1
+        assert seat_status(first_seat) == "HELD"
+
+        confirm_response = client.post(
+            "/api/checkout/demo/confirm",
+            json={"order_id": checkout_response.json()["order_id"]},
+        )
+        assert confirm_response.status_code == 200
+        assert confirm_response.json()["order_status"] == "PAID"
+        assert confirm_response.json()["ticket_count"] == 1
+        assert seat_status(first_seat) == "SOLD"
+        assert client.get(f"/api/reservations/{reservation_id}").json()["status"] == "COMPLETED"
+    finally:
+        settings.reservation_hold_backend = previous_backend
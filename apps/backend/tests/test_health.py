@@ -1,4 +1,9 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.bootstrap import BOOTSTRAP_STATE_KEY, bootstrap_local_data
+from app.db.session import AsyncSessionLocal
+from app.models.bootstrap_state import BootstrapState
 
 
 def test_health_endpoint(client: TestClient) -> None:
@@ -18,3 +23,19 @@ def test_metrics_endpoint_exposes_counters(client: TestClient) -> None:
     assert "app_requests_total" in payload
     assert "reservation_attempt_total" in payload
     assert "ticket_scan_attempt_total" in payload
+
+
+def test_bootstrap_skips_warm_database_until_fingerprint_changes(client: TestClient) -> None:
+    async def invalidate_fingerprint() -> None:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    update(BootstrapState)
+                    .where(BootstrapState.key == BOOTSTRAP_STATE_KEY)
+                    .values(fingerprint="stale")
+                )
+
+    assert client.portal.call(bootstrap_local_data) is False
+    client.portal.call(invalidate_fingerprint)
+    assert client.portal.call(bootstrap_local_data) is True
+    assert client.portal.call(bootstrap_local_data) is False
@@ -1,8 +1,11 @@
+import json
 from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
 from fastapi.testclient import TestClient
 
+from app.services.recommendation_event_service import flush_recommendation_events_job
+
 
 def _register_user_headers(client: TestClient) -> dict[str, str]:
     email = f"reco-{uuid4().hex[:10]}@bigapplecinemas.local"
@@ -261,6 +264,79 @@ def test_recommendation_event_tracking_endpoint(client: TestClient) -> None:
     assert track_response.status_code == 200
     assert track_response.json()["recorded"] is True
 
+    unknown_response = client.post(
+        "/api/me/recommendations/events",
+        headers=headers,
+        json={"movie_id": 999999999, "event_type": "CLICK"},
+    )
+    assert unknown_response.status_code == 404
+
+
+def test_recommendation_event_batch_is_flushed_to_event_table(client: TestClient) -> None:
+    headers = _register_user_headers(client)
+    items = client.get(
+        "/api/me/recommendations", params={"limit": 10}, headers=headers
+    ).json()["items"]
+    assert items
+
+    batch_response = client.post(
+        "/api/me/recommendations/events/batch",
+        headers=headers,
+        json={
+            "events": [
+                *({"movie_id": item["movie_id"], "event_type": "IMPRESSION"} for item in items),
+                {"movie_id": items[0]["movie_id"], "event_type": "CLICK"},
+            ]
+        },
+    )
+    assert batch_response.status_code == 202
+    assert batch_response.json()["accepted"] == len(items) + 1
+
+    empty_response = client.post(
+        "/api/me/recommendations/events/batch",
+        headers=headers,
+        json={"events": []},
+    )
+    assert empty_response.status_code == 422
+
+    inserted = client.portal.call(flush_recommendation_events_job)
+    assert inserted >= len(items) + 1
+
+
+def test_admin_variant_weights_drive_user_assignment_and_metrics(client: TestClient) -> None:
+    upsert_response = client.put(
+        "/api/admin/recommendations/variants/exp1",
+        json={
+            "traffic_weight": 100,
+            "personalized_weight": 0.5,
+            "popularity_weight": 0.3,
+            "freshness_weight": 0.2,
+        },
+    )
+    assert upsert_response.status_code == 200
+    assert upsert_response.json()["name"] == "EXP1"
+    try:
+        headers = _register_user_headers(client)
+        response = client.get("/api/me/recommendations", params={"limit": 5}, headers=headers)
+        assert response.status_code == 200
+
+        listed = client.get("/api/admin/recommendations/variants").json()
+        assert any(item["name"] == "EXP1" for item in listed["items"])
+        metrics = client.get("/metrics").text
+        assert 'recommendation_variant_assigned_total{variant="EXP1"}' in metrics
+        assert 'recommendation_ranking_duration_seconds_count{variant="EXP1"}' in metrics
+    finally:
+        client.put(
+            "/api/admin/recommendations/variants/exp1",
+            json={
+                "traffic_weight": 0,
+                "personalized_weight": 0.5,
+                "popularity_weight": 0.3,
+                "freshness_weight": 0.2,
+                "is_active": False,
+            },
+        )
+
 
 def test_admin_sales_report_endpoint(client: TestClient) -> None:
     response = client.get("/api/admin/reports/sales", params={"limit": 5})
@@ -270,3 +346,79 @@ def test_admin_sales_report_endpoint(client: TestClient) -> None:
     assert "gross_revenue_cents" in payload
     assert "showtimes" in payload
     assert "recommendation_clicks" in payload
+
+
+def test_admin_sales_report_reflects_new_purchase(client: TestClient) -> None:
+    before = client.get("/api/admin/reports/sales", params={"limit": 50}).json()
+
+    _create_paid_ticket(client)
+
+    after = client.get("/api/admin/reports/sales", params={"limit": 50}).json()
+    assert after["paid_orders"] == before["paid_orders"] + 1
+    assert after["tickets_sold"] == before["tickets_sold"] + 1
+    assert after["gross_revenue_cents"] > before["gross_revenue_cents"]
+    assert after["active_holds"] == before["active_holds"]
+
+
+def test_admin_export_streams_orders_csv_and_tickets_ndjson(client: TestClient) -> None:
+    _create_paid_ticket(client)
+    date_from = (datetime.now(tz=UTC) - timedelta(hours=1)).isoformat()
+
+    orders_response = client.get(
+        "/api/admin/reports/exports/orders",
+        params={"format": "csv", "date_from": date_from},
+    )
+    assert orders_response.status_code == 200
+    assert orders_response.headers["content-type"].startswith("text/csv")
+    lines = orders_response.text.strip().splitlines()
+    assert lines[0].startswith("order_id,user_id,showtime_id")
+    assert len(lines) >= 2
+
+    tickets_response = client.get(
+        "/api/admin/reports/exports/tickets",
+        params={"format": "ndjson", "date_from": date_from},
+    )
+    assert tickets_response.status_code == 200
+    records = [json.loads(line) for line in tickets_response.text.strip().splitlines()]
+    assert records
+    assert {"ticket_id", "order_id", "seat_code", "status"}.issubset(records[0])
+
+    occupancy_response = client.get(
+        "/api/admin/reports/exports/occupancy",
+        params={"format": "ndjson"},
+    )
+    assert occupancy_response.status_code == 200
+    occupancy = [json.loads(line) for line in occupancy_response.text.strip().splitlines()]
+    assert occupancy
+    assert isinstance(occupancy[0]["occupancy_percent"], float)
+
+    missing_response = client.get("/api/admin/reports/exports/unknown")
+    assert missing_response.status_code == 404
+
+
+def test_admin_sales_timeseries_buckets_by_movie(client: TestClient) -> None:
+    _create_paid_ticket(client)
+    now = datetime.now(tz=UTC)
+    params = {
+        "date_from": (now - timedelta(days=3)).isoformat(),
+        "date_to": (now + timedelta(days=14)).isoformat(),
+        "bucket": "day",
+        "group_by": "movie",
+    }
+
+    response = client.get("/api/admin/reports/timeseries", params=params)
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["bucket"] == "day"
+    assert payload["points"]
+    assert all(point["group_id"] is not None for point in payload["points"])
+    assert sum(point["tickets_sold"] for point in payload["points"]) >= 1
+
+    cached_response = client.get("/api/admin/reports/timeseries", params=params)
+    assert cached_response.json() == payload
+
+    invalid_response = client.get(
+        "/api/admin/reports/timeseries",
+        params={**params, "date_from": params["date_to"]},
+    )
+    assert invalid_response.status_code == 400
@@ -0,0 +1,143 @@
+import random
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+from app.core.config import settings
+from app.services.recommendation_evaluation_service import (
+    CatalogMovie,
+    ReplayCase,
+    ReplayCatalog,
+    evaluate_variants,
+    ndcg_at_k,
+)
+from app.services.recommendation_pool_service import PoolMovie, _decode_pool, _encode_pool
+from app.services.recommendation_service import (
+    RankedCandidate,
+    WatchedMovie,
+    select_diverse_candidates,
+)
+from app.services.recommendation_variant_service import RankerVariant, assign_variant
+from benchmarks.bench_recommendation_diversity import rescan_select
+
+
+def test_heap_diversity_selection_matches_rescanning_greedy() -> None:
+    rng = random.Random(20260501)
+    genres = ["drama", "comedy", "horror", "sci-fi", None]
+    for _ in range(200):
+        candidates = [
+            RankedCandidate(
+                movie_id=movie_id,
+                # Coarse scores force plenty of ties between and across genres.
+                base_score=round(rng.random(), 1),
+                primary_genre=rng.choice(genres),
+                source_movie_id=None,
+                reason="",
+            )
+            for movie_id in range(rng.randint(0, 40))
+        ]
+        score_boosts = {
+            candidate.movie_id: 0.2 for candidate in candidates if rng.random() < 0.15
+        }
+        limit = rng.randint(1, 25)
+        penalty = rng.choice([0.0, 0.08, 0.1, 0.5])
+
+        expected = rescan_select(
+            candidates, limit=limit, diversity_penalty=penalty, score_boosts=score_boosts
+        )
+        actual = select_diverse_candidates(
+            candidates, limit=limit, diversity_penalty=penalty, score_boosts=score_boosts
+        )
+        assert [(item.movie_id, score) for item, score in actual] == [
+            (item.movie_id, score) for item, score in expected
+        ]
+
+
+def test_offline_replay_scores_held_out_purchase() -> None:
+    cutoff = datetime(2026, 3, 1, 18, 0, tzinfo=UTC)
+    catalog = ReplayCatalog(
+        movies={
+            1: CatalogMovie(title="Seen", rating="PG", release_date=None, genres=["Drama"]),
+            2: CatalogMovie(title="Similar", rating="PG", release_date=None, genres=["Drama"]),
+            3: CatalogMovie(title="Other", rating="R", release_date=None, genres=["Horror"]),
+        },
+        showtime_starts={
+            1: [cutoff - timedelta(days=3)],
+            2: [cutoff + timedelta(hours=30)],
+            3: [cutoff + timedelta(hours=2)],
+        },
+        sales={3: [(cutoff - timedelta(hours=1), cutoff + timedelta(hours=2), 4)]},
+        similarity_rows=[(1, 2, 0.9)],
+    )
+    watched = WatchedMovie(movie_id=1, title="Seen", rating="PG", genres=["Drama"], watch_count=1)
+    cases = [
+        ReplayCase(user_id=1, cutoff=cutoff, held_out_movie_id=2, watch_history=[watched]),
+        ReplayCase(
+            user_id=2,
+            cutoff=cutoff,
+            held_out_movie_id=2,
+            watch_history=[watched],
+            hidden_movie_ids={2},
+        ),
+    ]
+
+    personalized, popular = evaluate_variants(
+        catalog,
+        cases,
+        variants={"personalized": (1.0, 0.0, 0.0), "popular": (0.0, 1.0, 0.0)},
+        k=1,
+        diversity_penalty=0.0,
+        save_for_later_boost=0.2,
+        workers=1,
+    )
+    assert (personalized.cases, personalized.hits, personalized.hit_rate) == (2, 1, 0.5)
+    assert personalized.ndcg == 0.5
+    assert personalized.pool_coverage == 1.0
+    assert popular.hits == 0
+    assert ndcg_at_k(3, 10) == 0.5
+
+
+def test_variant_assignment_is_deterministic_and_follows_traffic_weights() -> None:
+    variants = (
+        RankerVariant(name="A", weights=(0.6, 0.22, 0.18), traffic_weight=1),
+        RankerVariant(name="B", weights=(0.48, 0.32, 0.2), traffic_weight=3),
+    )
+    assignments = Counter(assign_variant(user_id, variants).name for user_id in range(1, 4001))
+    assert assign_variant(42, variants) == assign_variant(42, variants)
+    assert 800 < assignments["A"] < 1200
+    assert assignments["A"] + assignments["B"] == 4000
+    assert assign_variant(42, ()).name == settings.recommendation_ranker_variant.upper()
+
+
+def test_cached_pool_moves_past_showtimes_that_have_started() -> None:
+    built_at = datetime(2026, 6, 1, 18, 0, tzinfo=UTC)
+    now = built_at + timedelta(minutes=4)
+
+    def pool_movie(movie_id: int, starts: list[datetime]) -> PoolMovie:
+        return PoolMovie(
+            movie_id=movie_id,
+            rating="PG",
+            release_date=None,
+            next_showtime_starts_at=starts[0],
+            tickets_sold=0,
+            genres=["drama"],
+            freshness=0.5,
+            later_showtime_starts=starts[1:],
+        )
+
+    payload = _encode_pool(
+        [
+            pool_movie(1, [built_at + timedelta(minutes=2), built_at + timedelta(hours=3)]),
+            pool_movie(2, [built_at + timedelta(minutes=1)]),
+            pool_movie(3, [built_at + timedelta(hours=1)]),
+        ],
+        built_at,
+    )
+    decoded = {movie.movie_id: movie for movie in _decode_pool(payload, now=now)}
+
+    # Movie 1's first showtime started, but it still has a later one today.
+    assert decoded[1].next_showtime_starts_at == built_at + timedelta(hours=3)
+    assert decoded[1].later_showtime_starts == []
+    assert decoded[1].freshness != 0.5
+    assert 2 not in decoded
+    assert decoded[3].next_showtime_starts_at == built_at + timedelta(hours=1)
+    assert decoded[3].freshness == 0.5
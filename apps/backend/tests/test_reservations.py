@@ -1,4 +1,24 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+from redis.asyncio import Redis
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import get_metric_value
+from app.db.retry import run_transaction
+from app.db.session import AsyncSessionLocal
+from app.models.reservation import Reservation, ShowtimeSeatStatus
+from app.models.sales_rollup import ShowtimeSalesRollup
+from app.services import availability_gate, hold_expiry_queue
+from app.services.reservation_service import ReservationService
+from app.services.sales_rollup_service import recompute_sales_rollups
+from app.services.seat_selection import GridSeat, build_seat_grid, find_best_seat_blocks
+from app.workers.hold_expiry import run_hold_expiry_consumer
 
 
 def _first_available_seat(client: TestClient) -> tuple[int, int]:
@@ -68,6 +88,62 @@ def test_reservation_blocks_double_hold(client: TestClient) -> None:
     assert cleanup_response.status_code == 204
 
 
+def test_availability_gate_rejects_seats_redis_knows_are_taken(client: TestClient) -> None:
+    showtime_id, seat_id = _first_available_seat(client)
+    headers = _register_headers(client, "gate")
+    gate_rejections_before = get_metric_value("reservation_gate_rejected_total")
+
+    async def build_gate_and_mark_held() -> None:
+        async with AsyncSessionLocal() as session:
+            await availability_gate.reject_unavailable(
+                session,
+                showtime_id=showtime_id,
+                seat_ids=[seat_id],
+            )
+        # A hold Postgres does not know about: only the gate can reject the request.
+        await availability_gate.record_hold(
+            showtime_id,
+            0,
+            [seat_id],
+            datetime.now(tz=UTC) + timedelta(minutes=1),
+        )
+
+    client.portal.call(build_gate_and_mark_held)
+    rejected = client.post(
+        "/api/reservations",
+        headers=headers,
+        json={"showtime_id": showtime_id, "seat_ids": [seat_id]},
+    )
+    assert rejected.status_code == 409
+    assert get_metric_value("reservation_gate_rejected_total") == gate_rejections_before + 1
+
+    client.portal.call(availability_gate.record_release, showtime_id, 0, [seat_id])
+    created = client.post(
+        "/api/reservations",
+        headers=headers,
+        json={"showtime_id": showtime_id, "seat_ids": [seat_id]},
+    )
+    assert created.status_code == 201
+
+    taken_by_other = client.post(
+        "/api/reservations",
+        headers=_register_headers(client, "gate-other"),
+        json={"showtime_id": showtime_id, "seat_ids": [seat_id]},
+    )
+    assert taken_by_other.status_code == 409
+    assert get_metric_value("reservation_gate_rejected_total") == gate_rejections_before + 2
+
+    delete_response = client.delete(f"/api/reservations/{created.json()['id']}", headers=headers)
+    assert delete_response.status_code == 204
+    retaken = client.post(
+        "/api/reservations",
+        headers=headers,
+        json={"showtime_id": showtime_id, "seat_ids": [seat_id]},
+    )
+    assert retaken.status_code == 201
+    client.delete(f"/api/reservations/{retaken.json()['id']}", headers=headers)
+
+
 def test_active_reservation_endpoint_returns_current_hold(client: TestClient) -> None:
     showtime_id, seat_id = _first_available_seat(client)
 
@@ -91,3 +167,497 @@ def test_active_reservation_endpoint_returns_current_hold(client: TestClient) ->
 
     cleanup_response = client.delete(f"/api/reservations/{reservation_id}")
     assert cleanup_response.status_code == 204
+
+
+def _register_headers(client: TestClient, prefix: str) -> dict[str, str]:
+    register_response = client.post(
+        "/api/auth/register",
+        json={
+            "email": f"{prefix}-{uuid4().hex[:10]}@bigapplecinemas.local",
+            "password": "Password123!",
+        },
+    )
+    assert register_response.status_code == 201
+    return {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+
+
+def test_patch_reservation_swaps_seats_and_keeps_expiry(client: TestClient) -> None:
+    showtime_id = client.get("/api/showtimes", params={"limit": 1, "offset": 1}).json()[
+        "items"
+    ][0]["id"]
+    seats = client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+    first_seat, second_seat, third_seat = [
+        seat["seat_id"] for seat in seats if seat["status"] == "AVAILABLE"
+    ][:3]
+    headers = _register_headers(client, "modify")
+    other_headers = _register_headers(client, "modify-other")
+
+    create_response = client.post(
+        "/api/reservations",
+        headers=headers,
+        json={"showtime_id": showtime_id, "seat_ids": [first_seat]},
+    )
+    assert create_response.status_code == 201
+    reservation = create_response.json()
+    other_response = client.post(
+        "/api/reservations",
+        headers=other_headers,
+        json={"showtime_id": showtime_id, "seat_ids": [third_seat]},
+    )
+    assert other_response.status_code == 201
+
+    try:
+        patch_response = client.patch(
+            f"/api/reservations/{reservation['id']}",
+            headers=headers,
+            json={"add_seat_ids": [second_seat], "remove_seat_ids": [first_seat]},
+        )
+        assert patch_response.status_code == 200
+        patched = patch_response.json()
+        assert patched["seat_ids"] == [second_seat]
+        assert patched["expires_at"] == reservation["expires_at"]
+
+        statuses = {
+            seat["seat_id"]: seat["status"]
+            for seat in client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+        }
+        assert statuses[first_seat] == "AVAILABLE"
+        assert statuses[second_seat] == "HELD"
+
+        conflict_response = client.patch(
+            f"/api/reservations/{reservation['id']}",
+            headers=headers,
+            json={"add_seat_ids": [third_seat]},
+        )
+        assert conflict_response.status_code == 409
+        empty_response = client.patch(
+            f"/api/reservations/{reservation['id']}",
+            headers=headers,
+            json={"remove_seat_ids": [second_seat]},
+        )
+        assert empty_response.status_code == 400
+    finally:
+        client.delete(f"/api/reservations/{reservation['id']}", headers=headers)
+        client.delete(f"/api/reservations/{other_response.json()['id']}", headers=other_headers)
+
+
+def test_expiry_queue_consumer_releases_hold_as_it_lapses(client: TestClient) -> None:
+    showtime_id = client.get("/api/showtimes", params={"limit": 1, "offset": 1}).json()[
+        "items"
+    ][0]["id"]
+    seat_id = next(
+        seat["seat_id"]
+        for seat in client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+        if seat["status"] == "AVAILABLE"
+    )
+    headers = _register_headers(client, "expiry")
+    create_response = client.post(
+        "/api/reservations",
+        headers=headers,
+        json={"showtime_id": showtime_id, "seat_ids": [seat_id]},
+    )
+    assert create_response.status_code == 201
+    reservation_id = create_response.json()["id"]
+
+    async def expire_soon_and_consume() -> tuple[float, str]:
+        expires_at = datetime.now(tz=UTC) + timedelta(milliseconds=300)
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    update(Reservation)
+                    .where(Reservation.id == reservation_id)
+                    .values(expires_at=expires_at)
+                )
+        await hold_expiry_queue.schedule_expiry(reservation_id, expires_at)
+        await availability_gate.record_hold(showtime_id, reservation_id, [seat_id], expires_at)
+
+        stop = asyncio.Event()
+        consumer = asyncio.create_task(run_hold_expiry_consumer(stop))
+        try:
+            for _ in range(50):
+                await asyncio.sleep(0.05)
+                async with AsyncSessionLocal() as session:
+                    seat_status = (
+                        await session.execute(
+                            select(ShowtimeSeatStatus.status).where(
+                                ShowtimeSeatStatus.showtime_id == showtime_id,
+                                ShowtimeSeatStatus.seat_id == seat_id,
+                            )
+                        )
+                    ).scalar_one()
+                if seat_status == "AVAILABLE":
+                    break
+        finally:
+            stop.set()
+            await consumer
+        return (datetime.now(tz=UTC) - expires_at).total_seconds(), seat_status
+
+    released_after, seat_status = client.portal.call(expire_soon_and_consume)
+    assert seat_status == "AVAILABLE"
+    assert released_after < 1.5
+    reservation_response = client.get(f"/api/reservations/{reservation_id}", headers=headers)
+    assert reservation_response.json()["status"] == "EXPIRED"
+
+
+def test_new_hold_expires_lapsed_holder_and_frees_its_other_seats(client: TestClient) -> None:
+    showtime_id = client.get("/api/showtimes", params={"limit": 1, "offset": 1}).json()[
+        "items"
+    ][0]["id"]
+    seat_ids = [
+        seat["seat_id"]
+        for seat in client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+        if seat["status"] == "AVAILABLE"
+    ][:2]
+    lapsed_headers = _register_headers(client, "lapsed")
+    lapsed_response = client.post(
+        "/api/reservations",
+        headers=lapsed_headers,
+        json={"showtime_id": showtime_id, "seat_ids": seat_ids},
+    )
+    assert lapsed_response.status_code == 201
+    lapsed_id = lapsed_response.json()["id"]
+
+    async def lapse_hold() -> tuple[int, int]:
+        expires_at = datetime.now(tz=UTC) - timedelta(seconds=1)
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    update(Reservation)
+                    .where(Reservation.id == lapsed_id)
+                    .values(expires_at=expires_at)
+                )
+                rollup_holds = await _rollup_holds(session, showtime_id)
+        await availability_gate.record_hold(showtime_id, lapsed_id, seat_ids, expires_at)
+        return rollup_holds
+
+    held_before, active_before = client.portal.call(lapse_hold)
+    create_response = client.post(
+        "/api/reservations",
+        headers=_register_headers(client, "lapsed-taker"),
+        json={"showtime_id": showtime_id, "seat_ids": seat_ids[:1]},
+    )
+    assert create_response.status_code == 201
+
+    async def read_state() -> tuple[str | None, tuple[int, int]]:
+        async with AsyncSessionLocal() as session:
+            other_seat_status = (
+                await session.execute(
+                    select(ShowtimeSeatStatus.status).where(
+                        ShowtimeSeatStatus.showtime_id == showtime_id,
+                        ShowtimeSeatStatus.seat_id == seat_ids[1],
+                    )
+                )
+            ).scalar_one()
+            return other_seat_status, await _rollup_holds(session, showtime_id)
+
+    other_seat_status, (held_after, active_after) = client.portal.call(read_state)
+    assert other_seat_status == "AVAILABLE"
+    assert (held_after, active_after) == (held_before - 1, active_before)
+    lapsed_read = client.get(f"/api/reservations/{lapsed_id}", headers=lapsed_headers)
+    assert lapsed_read.json()["status"] == "EXPIRED"
+
+
+async def _rollup_holds(session: AsyncSession, showtime_id: int) -> tuple[int, int]:
+    row = (
+        await session.execute(
+            select(ShowtimeSalesRollup.held_seats, ShowtimeSalesRollup.active_holds).where(
+                ShowtimeSalesRollup.showtime_id == showtime_id
+            )
+        )
+    ).one()
+    return row.held_seats, row.active_holds
+
+
+def test_rollup_reconcile_keeps_a_release_that_commits_while_it_runs(client: TestClient) -> None:
+    showtime_id, seat_id = _first_available_seat(client)
+    create_response = client.post(
+        "/api/reservations",
+        headers=_register_headers(client, "reconcile"),
+        json={"showtime_id": showtime_id, "seat_ids": [seat_id]},
+    )
+    assert create_response.status_code == 201
+    reservation_id = create_response.json()["id"]
+
+    async def release_during_reconcile() -> tuple[tuple[int, int], tuple[int, int]]:
+        async def reconcile() -> None:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await recompute_sales_rollups(session, [showtime_id])
+
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                reservation = await session.get(Reservation, reservation_id)
+                await ReservationService().release_hold(session, reservation=reservation)
+                reconcile_task = asyncio.create_task(reconcile())
+                # Let the reconcile start while the release is still uncommitted.
+                await asyncio.sleep(0.3)
+            await reconcile_task
+        await availability_gate.record_release(showtime_id, reservation_id, [seat_id])
+
+        async with AsyncSessionLocal() as session:
+            held_seats = (
+                await session.execute(
+                    select(func.count(ShowtimeSeatStatus.id)).where(
+                        ShowtimeSeatStatus.showtime_id == showtime_id,
+                        ShowtimeSeatStatus.status == "HELD",
+                    )
+                )
+            ).scalar_one()
+            active_holds = (
+                await session.execute(
+                    select(func.count(Reservation.id)).where(
+                        Reservation.showtime_id == showtime_id,
+                        Reservation.status == "ACTIVE",
+                    )
+                )
+            ).scalar_one()
+            return await _rollup_holds(session, showtime_id), (held_seats, active_holds)
+
+    rollup_counts, source_counts = client.portal.call(release_during_reconcile)
+    assert rollup_counts == source_counts
+
+
+def test_run_transaction_retries_deadlocks_then_gives_up_with_503(client: TestClient) -> None:
+    deadlock = text(
+        "DO $$ BEGIN RAISE EXCEPTION 'simulated' USING ERRCODE = 'deadlock_detected'; END $$"
+    )
+    labels = {"operation": "test_deadlock", "reason": "deadlock_detected"}
+    retries_before = get_metric_value("db_transaction_retry_total", labels)
+    exhausted_before = get_metric_value("db_transaction_retry_exhausted_total", labels)
+    calls = 0
+
+    async def run() -> tuple[int, HTTPException]:
+        async with AsyncSessionLocal() as session:
+
+            async def deadlocks_once() -> int:
+                nonlocal calls
+                calls += 1
+                if calls == 1:
+                    await session.execute(deadlock)
+                return (await session.execute(text("SELECT 1"))).scalar_one()
+
+            async def always_deadlocks() -> None:
+                await session.execute(deadlock)
+
+            result = await run_transaction(session, deadlocks_once, operation="test_deadlock")
+            try:
+                await run_transaction(session, always_deadlocks, operation="test_deadlock")
+            except HTTPException as exc:
+                return result, exc
+        raise AssertionError("expected the retries to be exhausted")
+
+    original_delay = settings.db_retry_base_delay_ms
+    settings.db_retry_base_delay_ms = 1
+    try:
+        result, exc = client.portal.call(run)
+    finally:
+        settings.db_retry_base_delay_ms = original_delay
+
+    assert result == 1
+    assert calls == 2
+    assert exc.status_code == 503
+    assert exc.headers == {"Retry-After": "1"}
+    assert get_metric_value("db_transaction_retry_total", labels) == (
+        retries_before + settings.db_retry_attempts
+    )
+    assert get_metric_value("db_transaction_retry_exhausted_total", labels) == (
+        exhausted_before + 1
+    )
+
+
+def test_best_available_blocks_respect_aisles_and_taken_seats() -> None:
+    seats = [
+        GridSeat(
+            seat_id=row_index * 10 + number,
+            row_label=label,
+            seat_number=number,
+            seat_type="STANDARD",
+            available=(label, number) not in {("B", 3), ("B", 4)},
+        )
+        for row_index, label in enumerate("ABC")
+        for number in range(1, 9)
+    ]
+    grid = build_seat_grid(seats, {"rows": ["A", "B", "C"], "aisles_after": [4]})
+
+    blocks = find_best_seat_blocks(grid, party_size=3)
+
+    assert blocks
+    for block in blocks:
+        numbers = block.seat_numbers
+        assert numbers == tuple(range(numbers[0], numbers[0] + 3))
+        assert not (numbers[0] <= 4 < numbers[-1]), "block crosses the aisle"
+    assert all(
+        not (block.row_label == "B" and {3, 4} & set(block.seat_numbers)) for block in blocks
+    )
+    assert blocks[0].row_label == "B"
+    assert find_best_seat_blocks(grid, party_size=5) == []
+
+
+def test_best_available_reservation_claims_adjacent_block(client: TestClient) -> None:
+    showtimes_response = client.get("/api/showtimes", params={"limit": 1, "offset": 1})
+    showtime_id = showtimes_response.json()["items"][0]["id"]
+
+    invalid_response = client.post(
+        "/api/reservations",
+        json={"showtime_id": showtime_id, "seat_ids": [1], "party_size": 2},
+    )
+    assert invalid_response.status_code == 422
+
+    first_response = client.post(
+        "/api/reservations",
+        json={"showtime_id": showtime_id, "party_size": 3},
+    )
+    assert first_response.status_code == 201
+    first_seat_ids = first_response.json()["seat_ids"]
+    assert len(first_seat_ids) == 3
+
+    seats_by_id = {
+        seat["seat_id"]: seat
+        for seat in client.get(f"/api/showtimes/{showtime_id}/seats").json()["seats"]
+    }
+    held = [seats_by_id[seat_id] for seat_id in first_seat_ids]
+    assert {seat["status"] for seat in held} == {"HELD"}
+    assert len({seat["row_label"] for seat in held}) == 1
+    numbers = sorted(seat["seat_number"] for seat in held)
+    assert numbers == list(range(numbers[0], numbers[0] + 3))
+
+    second_response = client.post(
+        "/api/reservations",
+        json={"showtime_id": showtime_id, "party_size": 3, "seat_type": "STANDARD"},
+    )
+    assert second_response.status_code == 201
+    second_seat_ids = second_response.json()["seat_ids"]
+    assert not set(second_seat_ids) & set(first_seat_ids)
+    assert {seats_by_id[seat_id]["seat_type"] for seat_id in second_seat_ids} == {"STANDARD"}
+
+    for response in (first_response, second_response):
+        cleanup_response = client.delete(f"/api/reservations/{response.json()['id']}")
+        assert cleanup_response.status_code == 204
+
+
+def test_waiting_room_admits_up_to_capacity_and_gates_seat_map(client: TestClient) -> None:
+    showtime_id = client.get("/api/showtimes", params={"limit": 1, "offset": 3}).json()[
+        "items"
+    ][0]["id"]
+    config_response = client.put(
+        f"/api/admin/showtimes/{showtime_id}/waiting-room",
+        json={"enabled": True, "active_shoppers": 1},
+    )
+    assert config_response.status_code == 200
+    try:
+        assert client.get(f"/api/showtimes/{showtime_id}/seats").status_code == 403
+
+        admitted = client.post(f"/api/showtimes/{showtime_id}/waiting-room").json()
+        assert admitted["status"] == "ADMITTED"
+        assert client.post(f"/api/showtimes/{showtime_id}/waiting-room").json()["token"] == (
+            admitted["token"]
+        )
+
+        register_response = client.post(
+            "/api/auth/register",
+            json={
+                "email": f"queue-{uuid4().hex[:10]}@bigapplecinemas.local",
+                "password": "Password123!",
+            },
+        )
+        other_headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+        queued = client.post(
+            f"/api/showtimes/{showtime_id}/waiting-room",
+            headers=other_headers,
+        ).json()
+        assert queued["status"] == "QUEUED"
+        assert queued["position"] == 1
+
+        seat_response = client.get(
+            f"/api/showtimes/{showtime_id}/seats",
+            headers={"X-Waiting-Room-Token": admitted["token"]},
+        )
+        assert seat_response.status_code == 200
+        queued_hold = client.post(
+            "/api/reservations",
+            headers={**other_headers, "X-Waiting-Room-Token": admitted["token"]},
+            json={"showtime_id": showtime_id, "party_size": 1},
+        )
+        assert queued_hold.status_code == 403
+
+        leave_response = client.delete(
+            f"/api/showtimes/{showtime_id}/waiting-room/{admitted['token']}"
+        )
+        assert leave_response.status_code == 204
+        poll_response = client.get(
+            f"/api/showtimes/{showtime_id}/waiting-room/{queued['token']}"
+        )
+        assert poll_response.json()["status"] == "ADMITTED"
+    finally:
+        client.put(
+            f"/api/admin/showtimes/{showtime_id}/waiting-room",
+            json={"enabled": False},
+        )
+    assert client.get(f"/api/showtimes/{showtime_id}/seats").status_code == 200
+
+
+def test_waiting_room_token_outlives_its_initial_ttl_while_polled(client: TestClient) -> None:
+    showtime_id = client.get("/api/showtimes", params={"limit": 1, "offset": 3}).json()[
+        "items"
+    ][0]["id"]
+    client.put(
+        f"/api/admin/showtimes/{showtime_id}/waiting-room",
+        json={"enabled": True, "active_shoppers": 1},
+    )
+    try:
+        admitted = client.post(f"/api/showtimes/{showtime_id}/waiting-room").json()
+        assert admitted["status"] == "ADMITTED"
+        register_response = client.post(
+            "/api/auth/register",
+            json={
+                "email": f"long-wait-{uuid4().hex[:10]}@bigapplecinemas.local",
+                "password": "Password123!",
+            },
+        )
+        headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+        user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+        queued = client.post(f"/api/showtimes/{showtime_id}/waiting-room", headers=headers).json()
+        assert queued["status"] == "QUEUED"
+        owner_keys = (
+            f"waiting_room:token:{queued['token']}",
+            f"waiting_room:{showtime_id}:user:{user_id}",
+        )
+
+        async def age_owner_keys() -> None:
+            # As if the shopper had been waiting for almost the whole initial TTL.
+            redis = Redis.from_url(settings.redis_url)
+            try:
+                for key in owner_keys:
+                    await redis.pexpire(key, 300)
+            finally:
+                await redis.aclose()
+
+        async def owner_key_ttls() -> list[int]:
+            redis = Redis.from_url(settings.redis_url)
+            try:
+                return [await redis.pttl(key) for key in owner_keys]
+            finally:
+                await redis.aclose()
+
+        client.portal.call(age_owner_keys)
+        poll_path = f"/api/showtimes/{showtime_id}/waiting-room/{queued['token']}"
+        assert client.get(poll_path).json()["status"] == "QUEUED"
+        for ttl_ms in client.portal.call(owner_key_ttls):
+            assert ttl_ms > 300
+        client.portal.call(asyncio.sleep, 0.4)
+
+        client.delete(f"/api/showtimes/{showtime_id}/waiting-room/{admitted['token']}")
+        assert client.get(poll_path).json()["status"] == "ADMITTED"
+        seat_response = client.get(
+            f"/api/showtimes/{showtime_id}/seats",
+            headers={"X-Waiting-Room-Token": queued["token"]},
+        )
+        assert seat_response.status_code == 200
+        # The same user rejoining keeps their admitted token instead of starting over.
+        rejoined = client.post(f"/api/showtimes/{showtime_id}/waiting-room", headers=headers)
+        assert rejoined.json()["token"] == queued["token"]
+    finally:
+        client.put(
+            f"/api/admin/showtimes/{showtime_id}/waiting-room",
+            json={"enabled": False},
+        )